@@ -0,0 +1,102 @@
+#!/bin/bash
+#
+# Profile Management Script
+# Roaming profile sizes and quota checks (via profile_scanner.py)
+#
+# Usage:
+#   ./manage_profiles.sh --scan [options]     Profile sizes, growth and quota
+#   ./manage_profiles.sh --over-quota         Only profiles over quota
+#   ./manage_profiles.sh --metrics            Quiet scan for Prometheus (cron)
+#   ./manage_profiles.sh --install-cron       Run --metrics every 15 minutes
+#
+
+set -euo pipefail
+
+# Colors
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m'
+
+# Logging
+log_info() { echo -e "${BLUE}[INFO]${NC} $1"; }
+log_success() { echo -e "${GREEN}[SUCCESS]${NC} $1"; }
+log_warning() { echo -e "${YELLOW}[WARNING]${NC} $1"; }
+log_error() { echo -e "${RED}[ERROR]${NC} $1"; }
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+SCANNER="$SCRIPT_DIR/profile_scanner.py"
+PROFILE_ROOT="${PROFILE_ROOT:-/srv/profiles}"
+TEXTFILE_DIR="${TEXTFILE_DIR:-/var/lib/prometheus/node-exporter}"
+CRON_FILE=/etc/cron.d/esports-profile-scan
+
+show_help() {
+    cat << EOF
+Profile Management
+
+Usage:
+  $0 --scan [options]      Size, growth since last scan and quota per user
+  $0 --over-quota          Only profiles over profiles.max_profile_size_mb
+  $0 --metrics             Quiet scan, metrics to $TEXTFILE_DIR/profiles.prom
+  $0 --install-cron        Run --metrics every 15 minutes ($CRON_FILE)
+  $0 --help                Show this help
+
+Scans run at idle I/O priority, so they don't compete with players' logons.
+Extra options are passed to profile_scanner.py (see: python3 $SCANNER --help),
+e.g. --full to re-list every directory. Set PROFILE_ROOT or TEXTFILE_DIR to
+override the defaults.
+EOF
+}
+
+run_scanner() {
+    if [ ! -d "$PROFILE_ROOT" ]; then
+        log_error "Profile directory not found: $PROFILE_ROOT"
+        exit 1
+    fi
+    local low_priority=(nice -n 19)
+    if command -v ionice &> /dev/null; then
+        low_priority=(ionice -c 3 nice -n 19)
+    fi
+    exec "${low_priority[@]}" python3 "$SCANNER" --root "$PROFILE_ROOT" "$@"
+}
+
+install_cron() {
+    if [[ $EUID -ne 0 ]]; then
+        log_error "Installing the cron job must be run as root (use sudo)"
+        exit 1
+    fi
+    mkdir -p "$TEXTFILE_DIR"
+    cat > "$CRON_FILE" << EOF
+# Roaming profile sizes for Prometheus (installed by manage_profiles.sh)
+*/15 * * * * root PROFILE_ROOT=$PROFILE_ROOT TEXTFILE_DIR=$TEXTFILE_DIR /bin/bash $SCRIPT_DIR/manage_profiles.sh --metrics
+EOF
+    chmod 644 "$CRON_FILE"
+    log_success "Profile scan scheduled every 15 minutes ($CRON_FILE)"
+}
+
+case "${1:-}" in
+    --scan|-s)
+        shift
+        run_scanner "$@"
+        ;;
+    --over-quota)
+        shift
+        run_scanner --over-quota "$@"
+        ;;
+    --metrics)
+        shift
+        run_scanner --quiet --textfile "$TEXTFILE_DIR/profiles.prom" "$@"
+        ;;
+    --install-cron)
+        install_cron
+        ;;
+    --help|-h|"")
+        show_help
+        ;;
+    *)
+        log_error "Unknown option: $1"
+        show_help
+        exit 1
+        ;;
+esac
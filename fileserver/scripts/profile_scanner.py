@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Roaming Profile Scanner
+High School Esports LAN Infrastructure
+
+Measures every roaming profile under /srv/profiles and checks it against
+profiles.max_profile_size_mb from config.yaml:
+
+- Size per user (Windows' username.V6-style folders are added together)
+- Growth since the last scan
+- Users over quota
+
+Walking hundreds of profiles with du reads every inode on the data disk each
+time. Instead, directories are listed by a pool of threads with os.scandir,
+and each directory's mtime, file bytes and subdirectories are remembered in
+a state file. A rescan stats each directory and lists again only the ones
+whose mtime changed, i.e. where files were added, removed or renamed.
+
+A file rewritten in place doesn't change its directory's mtime, so those
+changes are only seen by a full walk. One is done automatically when the
+last was more than --full-every hours ago, or on request with --full.
+
+Results go to the terminal, JSON (--json) and Prometheus metrics for
+node_exporter's textfile collector (--textfile).
+
+Usage:
+    python3 profile_scanner.py
+    python3 profile_scanner.py --over-quota
+    python3 profile_scanner.py --textfile /var/lib/prometheus/node-exporter/profiles.prom --quiet
+    python3 profile_scanner.py --full --json profiles.json
+"""
+
+import argparse
+import json
+import os
+import queue
+import re
+import stat
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+from config_loader import Config, load_config
+
+DEFAULT_ROOT = Path('/srv/profiles')
+DEFAULT_STATE = Path('/var/lib/esports/profile-scan.json')
+
+# Windows appends the profile version to roaming profile folders (alice.V6)
+VERSION_SUFFIX = re.compile(r'\.V\d+$', re.IGNORECASE)
+
+MB = 1024 * 1024
+# Directories modified this close to the scan may change again within the
+# same mtime tick; they are listed again next time rather than trusted.
+RACY_NS = 2 * 10**9
+
+
+class DirEntry(NamedTuple):
+    mtime: int          # st_mtime_ns of the directory
+    bytes: int          # regular files directly inside it
+    files: int
+    subdirs: List[str]  # names
+
+
+def user_of(profile_dir: str) -> str:
+    return VERSION_SUFFIX.sub('', profile_dir)
+
+
+def list_dir(path: str) -> Tuple[int, int, List[str]]:
+    """(file bytes, file count, subdirectory names) of one directory."""
+    size = files = 0
+    subdirs = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.is_file(follow_symlinks=False):
+                    size += entry.stat(follow_symlinks=False).st_size
+                    files += 1
+            except OSError:
+                continue  # removed while listing
+    return size, files, subdirs
+
+
+class Scanner:
+    """Walks the profile tree on a thread pool, reusing unchanged directories."""
+
+    def __init__(self, root: Path, cache: Dict[str, DirEntry], workers: int = 8, full: bool = False):
+        self.root = root
+        self.cache = cache
+        self.workers = workers
+        self.full = full
+        self.dirs: Dict[str, DirEntry] = {}
+        self.errors: List[str] = []
+        self.started_ns = time.time_ns()
+        self._queue: 'queue.Queue[Optional[str]]' = queue.Queue()
+
+    def _visit(self, rel: str) -> None:
+        path = os.path.join(self.root, rel)
+        try:
+            st = os.lstat(path)
+        except OSError as e:
+            self.errors.append(f"{rel}: {e.strerror}")
+            return
+        if not stat.S_ISDIR(st.st_mode):
+            return
+        cached = self.cache.get(rel)
+        if cached is not None and cached.mtime == st.st_mtime_ns and not self.full:
+            entry = cached
+        else:
+            try:
+                size, files, subdirs = list_dir(path)
+            except OSError as e:
+                self.errors.append(f"{rel}: {e.strerror}")
+                if cached is None:
+                    return
+                entry = cached  # keep the last known numbers
+            else:
+                racy = st.st_mtime_ns > self.started_ns - RACY_NS
+                entry = DirEntry(0 if racy else st.st_mtime_ns, size, files, subdirs)
+        self.dirs[rel] = entry
+        for name in entry.subdirs:
+            self._queue.put(os.path.join(rel, name))
+
+    def _worker(self) -> None:
+        while True:
+            rel = self._queue.get()
+            if rel is None:
+                return
+            try:
+                self._visit(rel)
+            finally:
+                self._queue.task_done()
+
+    @property
+    def reused(self) -> int:
+        return sum(entry is self.cache.get(rel) for rel, entry in self.dirs.items())
+
+    @property
+    def listed(self) -> int:
+        return len(self.dirs) - self.reused
+
+    def scan(self) -> Dict[str, Dict[str, int]]:
+        """Per-user {'bytes', 'files', 'dirs'}."""
+        _, _, profiles = list_dir(str(self.root))  # the root is always listed
+        threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        for name in profiles:
+            self._queue.put(name)
+        self._queue.join()
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join()
+
+        users: Dict[str, Dict[str, int]] = {}
+        for rel, entry in self.dirs.items():
+            user = user_of(rel.split(os.sep, 1)[0])
+            totals = users.setdefault(user, {'bytes': 0, 'files': 0, 'dirs': 0})
+            totals['bytes'] += entry.bytes
+            totals['files'] += entry.files
+            totals['dirs'] += 1
+        return users
+
+
+def load_state(path: Path) -> Dict[str, Any]:
+    try:
+        state = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    state['dirs'] = {rel: DirEntry(*entry) for rel, entry in state.get('dirs', {}).items()}
+    return state
+
+
+def save_state(path: Path, state: Dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'.{path.name}.tmp')
+    tmp.write_text(json.dumps(state, separators=(',', ':')))
+    os.replace(tmp, path)
+
+
+def build_report(users: Dict[str, Dict[str, int]], previous: Dict[str, int], quota_mb: Optional[float],
+                 scanner: Scanner, seconds: float, full: bool) -> Dict[str, Any]:
+    quota = int(quota_mb * MB) if quota_mb else None
+    rows = []
+    for user, totals in sorted(users.items(), key=lambda item: -item[1]['bytes']):
+        rows.append({
+            'user': user,
+            'bytes': totals['bytes'],
+            'files': totals['files'],
+            'growth_bytes': totals['bytes'] - previous[user] if user in previous else None,
+            'quota_used': totals['bytes'] / quota if quota else None,
+            'over_quota': bool(quota and totals['bytes'] > quota),
+        })
+    return {
+        'scanned_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seconds': round(seconds, 3),
+        'full_walk': full,
+        'quota_bytes': quota,
+        'dirs_listed': scanner.listed,
+        'dirs_reused': scanner.reused,
+        'errors': scanner.errors,
+        'users': rows,
+    }
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_metrics(report: Dict[str, Any]) -> str:
+    """Prometheus text exposition format."""
+    lines = [
+        '# HELP profile_bytes Size of each roaming profile (files, apparent size).',
+        '# TYPE profile_bytes gauge',
+    ]
+    for row in report['users']:
+        lines.append(f'profile_bytes{{user="{_escape(row["user"])}"}} {row["bytes"]}')
+
+    lines += [
+        '# HELP profile_growth_bytes Change in profile size since the previous scan.',
+        '# TYPE profile_growth_bytes gauge',
+    ]
+    for row in report['users']:
+        if row['growth_bytes'] is not None:
+            lines.append(f'profile_growth_bytes{{user="{_escape(row["user"])}"}} {row["growth_bytes"]}')
+
+    if report['quota_bytes']:
+        lines += [
+            '# HELP profile_quota_bytes profiles.max_profile_size_mb from config.yaml.',
+            '# TYPE profile_quota_bytes gauge',
+            f'profile_quota_bytes {report["quota_bytes"]}',
+            '# HELP profile_over_quota 1 if the profile is larger than the quota.',
+            '# TYPE profile_over_quota gauge',
+        ]
+        for row in report['users']:
+            lines.append(f'profile_over_quota{{user="{_escape(row["user"])}"}} {int(row["over_quota"])}')
+
+    lines += [
+        '# HELP profile_scan_dirs Directories listed or reused from the cache in the last scan.',
+        '# TYPE profile_scan_dirs gauge',
+        f'profile_scan_dirs{{result="listed"}} {report["dirs_listed"]}',
+        f'profile_scan_dirs{{result="reused"}} {report["dirs_reused"]}',
+        '# HELP profile_scan_errors Directories that could not be read in the last scan.',
+        '# TYPE profile_scan_errors gauge',
+        f'profile_scan_errors {len(report["errors"])}',
+        '# HELP profile_scan_seconds Duration of the last scan.',
+        '# TYPE profile_scan_seconds gauge',
+        f'profile_scan_seconds {report["seconds"]}',
+        '# HELP profile_scan_timestamp_seconds When the last scan finished.',
+        '# TYPE profile_scan_timestamp_seconds gauge',
+        f'profile_scan_timestamp_seconds {int(time.time())}',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def format_bytes(n: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+
+def print_report(report: Dict[str, Any], over_quota_only: bool) -> None:
+    rows = [row for row in report['users'] if row['over_quota'] or not over_quota_only]
+    print("=" * 60)
+    print("Roaming Profile Sizes")
+    print("=" * 60)
+    quota = report['quota_bytes']
+    print(f"Quota: {format_bytes(quota) if quota else 'not set'}")
+    print()
+    print(f"{'User':<24} {'Size':>10} {'Growth':>11} {'Quota':>7}")
+    for row in rows:
+        growth = row['growth_bytes']
+        growth_text = '-' if growth is None else ('+' if growth > 0 else '') + format_bytes(growth)
+        used = f"{row['quota_used'] * 100:.0f}%" if row['quota_used'] is not None else '-'
+        flag = '  ❌ over quota' if row['over_quota'] else ''
+        print(f"{row['user'][:24]:<24} {format_bytes(row['bytes']):>10} {growth_text:>11} {used:>7}{flag}")
+    if not rows:
+        print("(none)")
+    print()
+
+    total = sum(row['bytes'] for row in report['users'])
+    over = sum(row['over_quota'] for row in report['users'])
+    kind = 'full walk' if report['full_walk'] else 'incremental'
+    print(f"{len(report['users'])} profiles, {format_bytes(total)} total")
+    print(f"Scanned in {report['seconds']:.2f}s ({kind}: {report['dirs_listed']} directories listed, "
+          f"{report['dirs_reused']} unchanged)")
+    for error in report['errors'][:5]:
+        print(f"⚠️  {error}")
+    if len(report['errors']) > 5:
+        print(f"⚠️  ... and {len(report['errors']) - 5} more unreadable directories")
+    if over:
+        print(f"❌ {over} profile(s) over quota")
+    elif quota:
+        print("✅ All profiles within quota")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Measure roaming profile sizes incrementally')
+    parser.add_argument('--config', default=os.environ.get('ESPORTS_CONFIG', PROJECT_ROOT / 'config.yaml'),
+                        help='Path to config.yaml (for profiles.max_profile_size_mb)')
+    parser.add_argument('--root', default=str(DEFAULT_ROOT), help=f'Profile share (default: {DEFAULT_ROOT})')
+    parser.add_argument('--state', default=str(DEFAULT_STATE), help=f'Scan cache (default: {DEFAULT_STATE})')
+    parser.add_argument('--quota-mb', type=float, help='Quota per profile (default: from config.yaml)')
+    parser.add_argument('--workers', type=int, default=8, help='Directory listing threads (default: 8)')
+    parser.add_argument('--full', action='store_true', help='List every directory, ignoring the cache')
+    parser.add_argument('--full-every', type=float, default=24,
+                        help='Hours after which a full walk is done anyway (default: 24, 0 = never)')
+    parser.add_argument('--over-quota', action='store_true', help='Only show profiles over quota')
+    parser.add_argument('--json', metavar='FILE', help="Write the report as JSON ('-' for stdout)")
+    parser.add_argument('--textfile', help='Write Prometheus metrics to this file (node_exporter textfile collector)')
+    parser.add_argument('--quiet', action='store_true', help='No terminal report (for cron)')
+    args = parser.parse_args()
+
+    root = Path(args.root)
+    if not root.is_dir():
+        print(f"❌ Profile directory not found: {root}", file=sys.stderr)
+        sys.exit(1)
+
+    quota_mb = args.quota_mb
+    if quota_mb is None:
+        config_path = Path(args.config)
+        try:
+            config = load_config(config_path) if config_path.exists() else Config({}, config_path)
+        except (OSError, yaml.YAMLError) as e:
+            print(f"❌ Could not load {config_path}: {e}", file=sys.stderr)
+            sys.exit(1)
+        quota_mb = config.get('profiles.max_profile_size_mb')
+        if quota_mb is None and not args.quiet:
+            print(f"⚠️  profiles.max_profile_size_mb not set in {config_path}; skipping quota checks",
+                  file=sys.stderr)
+
+    state_path = Path(args.state)
+    state = load_state(state_path)
+    if state.get('root') != str(root.resolve()):
+        state = {}  # cache belongs to another share
+    last_full = state.get('last_full', 0)
+    full = args.full or not state or (args.full_every > 0 and time.time() - last_full > args.full_every * 3600)
+
+    started = time.monotonic()
+    scanner = Scanner(root, state.get('dirs', {}), args.workers, full)
+    try:
+        users = scanner.scan()
+    except OSError as e:
+        print(f"❌ Could not read {root}: {e}", file=sys.stderr)
+        sys.exit(1)
+    report = build_report(users, state.get('users', {}), quota_mb, scanner, time.monotonic() - started, full)
+
+    try:
+        save_state(state_path, {
+            'root': str(root.resolve()),
+            'last_full': time.time() if full else last_full,
+            'users': {user: totals['bytes'] for user, totals in users.items()},
+            'dirs': {rel: list(entry) for rel, entry in scanner.dirs.items()},
+        })
+    except OSError as e:
+        print(f"⚠️  Could not save scan cache {state_path}: {e}", file=sys.stderr)
+
+    if args.textfile:
+        path = Path(args.textfile)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'.{path.name}.tmp')
+        tmp.write_text(render_metrics(report))
+        os.replace(tmp, path)
+    if args.json:
+        text = json.dumps(report, indent=2)
+        if args.json == '-':
+            print(text)
+        else:
+            Path(args.json).write_text(text)
+    if not args.quiet and args.json != '-':
+        print_report(report, args.over_quota)
+
+
+if __name__ == '__main__':
+    main()
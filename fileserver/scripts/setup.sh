@@ -48,7 +48,9 @@ apt-get install -y \
     libnss-winbind \
     krb5-user \
     attr \
-    acl
+    acl \
+    python3-yaml \
+    prometheus-node-exporter
 
 log_success "Packages installed"
 
@@ -188,29 +190,14 @@ echo "User $USERNAME deleted and profile archived"
 SCRIPT
 chmod +x /usr/local/bin/delete-user
 
-# Profile sizes script
-cat > /usr/local/bin/profile-sizes <<'SCRIPT'
+# Profile sizes script (incremental scanner instead of du over every profile)
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+cat > /usr/local/bin/profile-sizes <<SCRIPT
 #!/bin/bash
-echo "User Profile Sizes"
-echo "=================="
-echo
-
-for dir in /srv/profiles/*; do
-    if [ -d "$dir" ]; then
-        username=$(basename "$dir")
-        size=$(du -sh "$dir" 2>/dev/null | cut -f1)
-        size_bytes=$(du -sb "$dir" 2>/dev/null | cut -f1)
-        limit_bytes=$((2 * 1024 * 1024 * 1024))  # 2GB
-        
-        if [ $size_bytes -gt $limit_bytes ]; then
-            echo -e "$username: \033[0;31m$size (OVER LIMIT!)\033[0m"
-        else
-            echo "$username: $size"
-        fi
-    fi
-done
+exec /bin/bash "$SCRIPT_DIR/manage_profiles.sh" --scan "\$@"
 SCRIPT
 chmod +x /usr/local/bin/profile-sizes
+bash "$SCRIPT_DIR/manage_profiles.sh" --install-cron
 
 # Status script
 cat > /usr/local/bin/fileserver-status <<'SCRIPT'
@@ -324,6 +311,7 @@ if command -v ufw &> /dev/null; then
     ufw allow 445/tcp comment 'Samba SMB'
     ufw allow 137/udp comment 'Samba NetBIOS Name'
     ufw allow 138/udp comment 'Samba NetBIOS Datagram'
+    ufw allow 9100/tcp comment 'node_exporter'
     log_success "Firewall configured"
 fi
 
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Per-Machine iPXE Boot Script Service
+High School Esports LAN Infrastructure
+
+Serves boot.ipxe rendered for the machine asking, so per-machine settings
+apply on the next boot without redeploying:
+
+- Themed hostname from config/mac-addresses.yaml (mac_mappings)
+- Boot target, menu timeout and maintenance mode from boot_overrides
+  (keyed by machine name or MAC)
+
+nginx proxies /boot.ipxe here. A request without ?mac= gets a two-line
+script that chains back with the MAC filled in by iPXE (${net0/mac}), so
+dnsmasq keeps pointing at the plain /boot.ipxe URL. If the service is
+down, nginx falls back to the static script Ansible rendered.
+
+boot.ipxe.j2 is compiled once; machines are looked up in an in-memory
+MAC index and rendered scripts are cached per MAC. The cache is dropped
+whenever config.yaml, mac-addresses.yaml or the template changes, so
+hundreds of simultaneous boots cost a dictionary lookup each.
+
+Usage:
+    python3 boot_service.py
+    python3 boot_service.py --port 8081 --bind 127.0.0.1
+    python3 boot_service.py --render aa:bb:cc:dd:ee:ff    # print one script
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+try:
+    import jinja2
+except ImportError:
+    print("jinja2 is not installed. Install it with: pip3 install jinja2")
+    sys.exit(1)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+from config_loader import Config, ConfigWatcher
+from network_conflicts import MAC_ADDRESSES_FILE, parse_mac
+
+TEMPLATE = PROJECT_ROOT / "ipxe" / "config" / "boot.ipxe.j2"
+DEFAULT_PORT = 8081
+
+CHAIN_SCRIPT = b"#!ipxe\nchain /boot.ipxe?mac=${net0/mac} || chain /boot.ipxe?mac=unknown\n"
+
+
+def normalize_mac(text: str) -> Optional[str]:
+    try:
+        value = parse_mac(text)
+    except ValueError:
+        return None
+    return ':'.join(f"{(value >> shift) & 0xff:02x}" for shift in range(40, -8, -8))
+
+
+def build_index(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """MAC -> template variables for that machine, from mac-addresses.yaml."""
+    mappings = data.get('mac_mappings') or {}
+    overrides = data.get('boot_overrides') or {}
+    display = data.get('display') or {}
+    max_length = display.get('max_length', 15)
+
+    # Hostnames get their theme's prefix (e.g. NCC-ENTERPRISE) when display.show_prefix is on
+    prefixes = {}
+    for theme in (data.get('themes') or {}).values():
+        if isinstance(theme, dict) and theme.get('prefix'):
+            for name in theme.get('names') or []:
+                prefixes.setdefault(str(name).upper(), theme['prefix'])
+
+    index = {}
+    for raw_mac, name in mappings.items():
+        mac = normalize_mac(str(raw_mac))
+        if mac is None or not name:
+            continue  # reported by validate_config.py
+        name = str(name)
+        hostname = name
+        if display.get('show_prefix') and name.upper() in prefixes:
+            hostname = f"{prefixes[name.upper()]}-{name}"
+        if display.get('uppercase', True):
+            hostname = hostname.upper()
+        machine = {'name': name, 'mac': mac, 'hostname': hostname[:max_length]}
+        for key in (name, name.upper(), str(raw_mac), mac):
+            if isinstance(overrides.get(key), dict):
+                machine.update(overrides[key])
+                break
+        index[mac] = machine
+    return index
+
+
+class BootScripts:
+    """Renders boot.ipxe per MAC with a cache tied to the source files."""
+
+    def __init__(self, config_path: Path, template_path: Path = TEMPLATE, check_interval: float = 2.0):
+        self.config = ConfigWatcher(config_path, check_interval)
+        self.macs = ConfigWatcher(config_path.parent / MAC_ADDRESSES_FILE, check_interval)
+        self.template_path = template_path
+        self.check_interval = check_interval
+        self.env = jinja2.Environment(trim_blocks=True)  # same as Ansible's template module
+        self.cache: Dict[str, bytes] = {}
+        self.lock = threading.Lock()
+        self.generation = 0  # bumped on every invalidation
+        self.renders = 0
+        self.hits = 0
+        self._compile()
+        self.index = build_index(self.macs.current().raw)
+        self.config.on_change(lambda old, new: self._invalidate('config.yaml'))
+        self.macs.on_change(self._reindex)
+
+    def _compile(self) -> None:
+        """Compile the template; raises OSError or jinja2.TemplateSyntaxError."""
+        stat = self.template_path.stat()
+        self.template = self.env.from_string(self.template_path.read_text())
+        self.template_mtime = stat.st_mtime_ns
+        self._template_checked = time.monotonic()
+
+    def _invalidate(self, reason: str) -> None:
+        with self.lock:
+            self.cache = {}
+            self.generation += 1
+        print(f"{reason} changed, cleared cached boot scripts", flush=True)
+
+    def _reindex(self, old: Config, new: Config) -> None:
+        self.index = build_index(new.raw)
+        self._invalidate(MAC_ADDRESSES_FILE)
+
+    def _check_template(self) -> None:
+        now = time.monotonic()
+        if now - self._template_checked < self.check_interval:
+            return
+        self._template_checked = now
+        try:
+            if self.template_path.stat().st_mtime_ns != self.template_mtime:
+                self._compile()
+                self._invalidate(self.template_path.name)
+        except (OSError, jinja2.TemplateError) as e:
+            # Keep serving the last good template
+            print(f"⚠️  Could not reload {self.template_path.name}: {e}", flush=True)
+
+    def script(self, mac: Optional[str]) -> bytes:
+        """Rendered boot script for a MAC (the generic menu for unknown MACs)."""
+        # Read before the sources: a render that overlaps an invalidation
+        # may have used the old config, index or template, so it isn't cached
+        generation = self.generation
+        config = self.config.current()  # also picks up file changes
+        self.macs.current()
+        self._check_template()
+
+        key = normalize_mac(mac) if mac else None
+        machine = self.index.get(key)
+        if machine is None:
+            key, machine = '', {}  # every unknown MAC shares the generic script
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        body = self.template.render(config.raw, machine=machine).encode()
+        with self.lock:
+            if self.generation == generation:
+                self.cache[key] = body
+            self.renders += 1
+        return body
+
+
+def make_handler(scripts: BootScripts):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, body: bytes) -> None:
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Cache-Control', 'no-store')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == '/health':
+                self._send(200, f"OK {len(scripts.index)} machines, "
+                                f"{scripts.renders} renders, {scripts.hits} cache hits\n".encode())
+                return
+            if url.path != '/boot.ipxe':
+                self._send(404, b"Not found\n")
+                return
+            mac = parse_qs(url.query).get('mac', [None])[0]
+            if mac is None:
+                self._send(200, CHAIN_SCRIPT)
+                return
+            try:
+                self._send(200, scripts.script(mac))
+            except jinja2.TemplateError as e:
+                print(f"❌ Render failed for {mac}: {e}", flush=True)
+                self._send(500, b"Render failed\n")  # nginx falls back to the static script
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Serve per-machine iPXE boot scripts')
+    parser.add_argument('--config', default=os.environ.get('ESPORTS_CONFIG', PROJECT_ROOT / 'config.yaml'),
+                        help='Path to config.yaml')
+    parser.add_argument('--template', default=str(TEMPLATE), help='boot.ipxe.j2 template')
+    parser.add_argument('--bind', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'Port (default: {DEFAULT_PORT})')
+    parser.add_argument('--check-interval', type=float, default=2.0,
+                        help='Seconds between checks for changed files (default: 2)')
+    parser.add_argument('--render', metavar='MAC', help='Print the script for one MAC and exit')
+    args = parser.parse_args()
+
+    config_path = Path(args.config)
+    if not config_path.exists():
+        print(f"❌ Config file not found: {config_path}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        scripts = BootScripts(config_path, Path(args.template), args.check_interval)
+    except (OSError, jinja2.TemplateError) as e:
+        print(f"❌ Could not load {args.template}: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.render:
+        sys.stdout.write(scripts.script(args.render).decode())
+        return
+
+    server = ThreadingHTTPServer((args.bind, args.port), make_handler(scripts))
+    server.daemon_threads = True
+    print(f"Serving boot scripts for {len(scripts.index)} machine(s) on http://{args.bind}:{args.port}/boot.ipxe",
+          flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
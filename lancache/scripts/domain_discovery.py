@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Uncached Domain Discovery
+High School Esports LAN Infrastructure
+
+Finds high-volume hostnames that bypass LANCache. The cache-domain list
+lancache-dns serves (uklans/cache-domains, CACHE_DOMAINS_REPO in
+lancache-dns.env) is compiled into a suffix trie keyed on reversed labels,
+then lancache-dns (bind) query logs are streamed through it. Hostnames
+that are not cached are ranked by query volume and grouped into candidate
+additions for the domain list.
+
+The list is read from a local checkout of the same repository, cloned on
+first use; --update pulls the latest version (lancache-dns pulls it each
+time the container starts).
+
+Every uncached game update that gets through costs WAN bandwidth during
+an event, so run this against the DNS log after a test day.
+
+Usage:
+    python3 domain_discovery.py /var/log/lancache-dns/query.log
+    docker logs lancache-dns 2>&1 | python3 domain_discovery.py -
+    python3 domain_discovery.py query.log --cdn-only --emit candidates.json
+    python3 domain_discovery.py query.log --update
+"""
+
+import argparse
+import json
+import mmap
+import re
+import subprocess
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set
+
+# Same list and branch as lancache-dns.env.j2
+CACHE_DOMAINS_REPO = 'https://github.com/uklans/cache-domains.git'
+CACHE_DOMAINS_BRANCH = 'master'
+CACHE_DOMAINS_CHECKOUT = Path('/var/cache/esports/cache-domains')
+CACHE_DOMAINS_FILE = CACHE_DOMAINS_CHECKOUT / "cache_domains.json"
+
+# bind query log, plain or wrapped in docker json-file lines:
+#   client @0x7f3c... 192.168.1.105#53122 (host): query: host IN A + (172.18.0.2)
+QUERY_RE = re.compile(rb'client (?:@\S+ )?([0-9a-fA-F.:]+)#\d+[^\n]*?query: (\S+) IN (\S+)')
+
+# Lookups that never reach a CDN
+IGNORED_TYPES = {'PTR', 'SOA', 'SRV', 'TXT', 'NS'}
+IGNORED_SUFFIXES = ('.arpa', '.local', '.lan', '.localdomain', '.home')
+
+# Label fragments typical of download CDNs, for --cdn-only
+CDN_HINTS = re.compile(
+    r'cdn|download|dl\d*\.|patch|content|update|depot|akamai|edgesuite|llnwd|'
+    r'cloudfront|fastly|edgecast|level3|steampipe|dist'
+)
+
+# Two-label public suffixes, so co.uk-style names group one label deeper
+MULTI_LABEL_SUFFIXES = {'co.uk', 'com.au', 'co.jp', 'com.br', 'co.nz', 'com.cn'}
+
+CHUNK_SIZE = 8 * 1024 * 1024
+EXACT, WILDCARD = '$', '*'
+
+
+class DomainTrie:
+    """
+    Cache-domain matcher keyed on reversed labels.
+
+    'lancache.steamcontent.com' is stored as com -> steamcontent ->
+    lancache; an exact entry marks its last node with EXACT and
+    '*.steamcontent.com' marks the steamcontent node with WILDCARD, which
+    matches any name with at least one more label. The deepest match wins.
+    """
+
+    def __init__(self):
+        self.root: Dict = {}
+        self.size = 0
+
+    def add(self, pattern: str, group: str) -> None:
+        pattern = pattern.strip().lower().rstrip('.')
+        wildcard = pattern.startswith('*.')
+        if wildcard:
+            pattern = pattern[2:]
+        node = self.root
+        for label in reversed(pattern.split('.')):
+            node = node.setdefault(label, {})
+        node[WILDCARD if wildcard else EXACT] = group
+        self.size += 1
+
+    def match(self, hostname: str) -> Optional[str]:
+        """Cache group serving hostname, or None if it is not cached."""
+        labels = hostname.split('.')
+        node = self.root
+        found = None
+        for i in range(len(labels) - 1, -1, -1):
+            node = node.get(labels[i])
+            if node is None:
+                return found
+            if i and WILDCARD in node:
+                found = node[WILDCARD]
+        return node.get(EXACT, found)
+
+
+def load_cache_domains(path=CACHE_DOMAINS_FILE) -> DomainTrie:
+    """
+    Compile cache-domains.json. Each group lists its patterns inline
+    ("domains") or, as in uklans/cache-domains, in text files next to the
+    JSON ("domain_files"). Raises FileNotFoundError or ValueError.
+    """
+    path = Path(path)
+    data = json.loads(path.read_text())
+    groups = data.get('cache_domains') if isinstance(data, dict) else None
+    if not isinstance(groups, list):
+        raise ValueError(f"{path}: expected a 'cache_domains' list")
+
+    trie = DomainTrie()
+    for group in groups:
+        name = group.get('name', 'unnamed')
+        patterns = list(group.get('domains', []))
+        for domain_file in group.get('domain_files', []):
+            lines = (path.parent / domain_file).read_text().splitlines()
+            patterns += [line for line in lines if line.strip() and not line.startswith('#')]
+        for pattern in patterns:
+            trie.add(pattern, name)
+    return trie
+
+
+def update_checkout(checkout: Path = CACHE_DOMAINS_CHECKOUT) -> None:
+    """Clone uklans/cache-domains into checkout, or pull it. Raises OSError."""
+    if (checkout / '.git').is_dir():
+        command = ['git', '-C', str(checkout), 'pull', '--ff-only', '--quiet']
+    else:
+        checkout.parent.mkdir(parents=True, exist_ok=True)
+        command = ['git', 'clone', '--quiet', '--depth', '1', '--branch', CACHE_DOMAINS_BRANCH,
+                   CACHE_DOMAINS_REPO, str(checkout)]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=120)
+    except subprocess.TimeoutExpired:
+        raise OSError(f"timed out fetching {CACHE_DOMAINS_REPO}")
+    if result.returncode != 0:
+        raise OSError(f"{' '.join(command[:3])} failed: {result.stderr.strip()}")
+
+
+class Classifier:
+    """Streams DNS query logs and tallies uncached hostnames."""
+
+    def __init__(self, trie: DomainTrie):
+        self.trie = trie
+        self.seen: Dict[bytes, Optional[str]] = {}  # raw name -> cached group, '' if ignored, None if uncached
+        self.cached = Counter()  # group -> queries
+        self.uncached = Counter()  # hostname -> queries
+        self.clients: Dict[str, Set[bytes]] = {}  # uncached hostname -> client addresses
+        self.queries = 0
+
+    def _classify(self, raw: bytes, qtype: bytes) -> Optional[str]:
+        if qtype.decode(errors='replace') in IGNORED_TYPES:
+            return ''
+        name = raw.decode(errors='replace').lower().rstrip('.')
+        if '.' not in name or name.endswith(IGNORED_SUFFIXES):
+            return ''
+        return self.trie.match(name)
+
+    def consume(self, buffer, start: int = 0, end: Optional[int] = None) -> None:
+        """Classify the query lines in buffer[start:end] (bytes or mmap)."""
+        end = len(buffer) if end is None else end
+        seen, cached, uncached, clients = self.seen, self.cached, self.uncached, self.clients
+        for m in QUERY_RE.finditer(buffer, start, end):
+            client, raw, qtype = m.groups()
+            self.queries += 1
+            key = raw + b' ' + qtype
+            group = seen.get(key, False)
+            if group is False:
+                group = seen[key] = self._classify(raw, qtype)
+            if group is None:
+                name = raw.decode(errors='replace').lower().rstrip('.')
+                uncached[name] += 1
+                clients.setdefault(name, set()).add(client)
+            elif group:
+                cached[group] += 1
+
+    def read_file(self, path: Path) -> None:
+        with open(path, 'rb') as f:
+            if f.seek(0, 2) == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                self.consume(mm)
+
+    def read_stream(self, stream) -> None:
+        """Classify a pipe in chunks, carrying partial lines over."""
+        tail = b''
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            data = tail + chunk
+            cut = data.rfind(b'\n') + 1
+            self.consume(data, 0, cut)
+            tail = data[cut:]
+        if tail:
+            self.consume(tail)
+
+
+class Candidate(NamedTuple):
+    pattern: str  # e.g. "*.cdn.example.com" or "dl.example.com"
+    queries: int
+    clients: int
+    hostnames: List[str]
+
+
+def base_domain(hostname: str) -> str:
+    """Registrable domain, e.g. dl3.cdn.example.com -> example.com."""
+    labels = hostname.split('.')
+    depth = 3 if '.'.join(labels[-2:]) in MULTI_LABEL_SUFFIXES else 2
+    return '.'.join(labels[-depth:])
+
+
+def suggest_candidates(classifier: Classifier, min_queries: int = 1, cdn_only: bool = False,
+                       wildcard_after: int = 3) -> List[Candidate]:
+    """
+    Group uncached hostnames into domain-list additions. Hostnames sharing
+    a parent become one '*.parent' pattern once wildcard_after of them
+    show up (CDNs usually number their edge hosts); others stay exact.
+    """
+    names = [
+        name for name, count in classifier.uncached.items()
+        if count >= min_queries and (not cdn_only or CDN_HINTS.search(name))
+    ]
+    by_parent: Dict[str, List[str]] = {}
+    for name in names:
+        parent = name.split('.', 1)[1]
+        if parent.count('.') >= base_domain(name).count('.'):
+            by_parent.setdefault(parent, []).append(name)
+        else:
+            by_parent.setdefault(name, []).append(name)  # already a registrable domain
+
+    candidates = []
+    for parent, members in by_parent.items():
+        # '*.parent' does not cover parent itself, which stays an exact entry
+        subdomains = [name for name in members if name != parent]
+        if len(subdomains) >= wildcard_after:
+            groups = [('*.' + parent, subdomains)] + [(parent, [parent])] * (parent in members)
+        else:
+            groups = [(name, [name]) for name in members]
+        for pattern, hosts in groups:
+            candidates.append(Candidate(
+                pattern,
+                sum(classifier.uncached[h] for h in hosts),
+                len(set().union(*(classifier.clients[h] for h in hosts))),
+                sorted(hosts, key=lambda h: -classifier.uncached[h]),
+            ))
+    candidates.sort(key=lambda c: (-c.queries, c.pattern))
+    return candidates
+
+
+def print_report(classifier: Classifier, candidates: List[Candidate], top: int) -> None:
+    cached_total = sum(classifier.cached.values())
+    uncached_total = sum(classifier.uncached.values())
+    print("Uncached Domain Discovery")
+    print("=" * 60)
+    print(f"{classifier.queries:,} queries, {len(classifier.seen):,} distinct names, "
+          f"{classifier.trie.size} cache patterns")
+    print(f"Cached:   {cached_total:,} queries")
+    print(f"Uncached: {uncached_total:,} queries to {len(classifier.uncached):,} hostnames")
+
+    if classifier.cached:
+        print("\nCached queries per group:")
+        for group, count in classifier.cached.most_common():
+            print(f"  {group:<16}{count:>10,}")
+
+    if not candidates:
+        print("\n✅ No uncached candidates found")
+        return
+
+    print(f"\nTop candidate additions:")
+    print(f"  {'Pattern':<48}{'Queries':>10}{'Clients':>9}")
+    for candidate in candidates[:top]:
+        hint = '' if CDN_HINTS.search(candidate.pattern) else '  (not CDN-like)'
+        print(f"  {candidate.pattern:<48}{candidate.queries:>10,}{candidate.clients:>9}{hint}")
+        if candidate.pattern.startswith('*.'):
+            shown = ', '.join(candidate.hostnames[:3])
+            more = len(candidate.hostnames) - 3
+            print(f"      {shown}" + (f" (+{more} more)" if more > 0 else ""))
+    print("\n⚠️  Review candidates before adding them: only hosts serving plain-HTTP "
+          "game/update content benefit from caching")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Find high-volume hostnames that bypass LANCache')
+    parser.add_argument('logs', nargs='+', help="lancache-dns query logs ('-' for stdin)")
+    parser.add_argument('--domains', default=str(CACHE_DOMAINS_FILE),
+                        help=f'cache_domains.json of a uklans/cache-domains checkout (default: {CACHE_DOMAINS_FILE}, '
+                             'cloned on first use)')
+    parser.add_argument('--update', action='store_true',
+                        help='Pull the latest cache-domains list into the default checkout first')
+    parser.add_argument('--top', type=int, default=25, help='Candidates to show (default: 25)')
+    parser.add_argument('--min-queries', type=int, default=10,
+                        help='Ignore hostnames with fewer queries (default: 10)')
+    parser.add_argument('--cdn-only', action='store_true', help='Only hostnames that look like download CDNs')
+    parser.add_argument('--wildcard-after', type=int, default=3,
+                        help='Sibling hostnames before suggesting *.parent (default: 3)')
+    parser.add_argument('--emit', metavar='FILE',
+                        help="Write candidates as a cache-domains group ('-' for stdout)")
+    parser.add_argument('--json', metavar='FILE', help="Write the full result as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    default_list = Path(args.domains) == CACHE_DOMAINS_FILE
+    if default_list and (args.update or not CACHE_DOMAINS_FILE.exists()):
+        print(f"Fetching {CACHE_DOMAINS_REPO} into {CACHE_DOMAINS_CHECKOUT}...", file=sys.stderr)
+        try:
+            update_checkout()
+        except OSError as e:
+            print(f"❌ Could not fetch cache domains: {e}", file=sys.stderr)
+            sys.exit(1)
+    try:
+        trie = load_cache_domains(args.domains)
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not load cache domains: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    classifier = Classifier(trie)
+    for log in args.logs:
+        try:
+            if log == '-':
+                classifier.read_stream(sys.stdin.buffer)
+            else:
+                classifier.read_file(Path(log))
+        except OSError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+
+    if not classifier.queries:
+        print("⚠️  No bind query lines found; is query logging enabled on lancache-dns?", file=sys.stderr)
+
+    candidates = suggest_candidates(classifier, args.min_queries, args.cdn_only, args.wildcard_after)
+
+    if args.emit:
+        group = {
+            'name': 'candidates',
+            'description': 'Uncached hostnames found by domain_discovery.py (review before merging)',
+            'domains': [c.pattern for c in candidates[:args.top]],
+        }
+        payload = json.dumps({'cache_domains': [group]}, indent=2)
+        if args.emit == '-':
+            print(payload)
+            return
+        Path(args.emit).write_text(payload + '\n')
+
+    if args.json:
+        payload = json.dumps({
+            'queries': classifier.queries,
+            'cached': dict(classifier.cached),
+            'uncached_hostnames': len(classifier.uncached),
+            'candidates': [c._asdict() for c in candidates],
+        }, indent=2)
+        if args.json == '-':
+            print(payload)
+            return
+        Path(args.json).write_text(payload + '\n')
+
+    print_report(classifier, candidates, args.top)
+
+
+if __name__ == '__main__':
+    main()
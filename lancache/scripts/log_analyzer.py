@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+LANCache Access Log Analyzer
+High School Esports LAN Infrastructure
+
+Reads the LANCache (lancachenet/monolithic) nginx access log and reports
+how well the cache is working:
+
+- Hit/miss ratio per CDN (steam, epicgames, riot, blizzard, ...)
+- Bytes served from cache versus fetched upstream (WAN)
+- Per-client bytes and throughput
+- Top uncached objects (approximate top-N, bounded memory; in reports
+  only, since per-object metric labels would be unbounded)
+
+Logs are read through mmap and parsed with one regex pass in C, so
+multi-GB logs take seconds rather than minutes. Live mode follows the log
+and remembers a byte-offset checkpoint (with the running totals), so a
+restart continues where it stopped instead of re-reading the whole file;
+log rotation is detected by inode.
+
+Live mode publishes Prometheus metrics as a textfile (for node_exporter's
+textfile collector) and/or an HTTP /metrics endpoint. Report mode analyzes
+whole log files once, e.g. after an event.
+
+Usage:
+    python3 log_analyzer.py --follow --port 9112
+    python3 log_analyzer.py --follow --textfile /var/lib/node_exporter/textfile_collector/lancache.prom
+    python3 log_analyzer.py --report /srv/lancache/logs/access.log*
+    python3 log_analyzer.py --report access.log --json report.json
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+DEFAULT_LOG = Path('/srv/lancache/logs/access.log')
+DEFAULT_CHECKPOINT = Path('/var/lib/esports/lancache-log-checkpoint.json')
+
+# lancachenet/monolithic "cachelog" format:
+# [cdn] client / forwarded - user [time] "request" status bytes "referer" "agent" "cache" "host" "range"
+LINE_RE = re.compile(
+    rb'^\[([^\]]*)\] (\S+) / \S+ - \S+ \[([^\]]+)\] "\S+ (\S+)[^"]*" (\d{3}) (\d+|-) '
+    rb'"[^"]*" "[^"]*" "([^"]*)" "([^"]*)".*',
+    re.MULTILINE
+)
+
+# $upstream_cache_status values that mean the bytes came from disk
+FROM_CACHE = {b'HIT', b'STALE', b'UPDATING', b'REVALIDATED'}
+
+TOP_OBJECTS_TRACKED = 10000
+TOP_OBJECTS_REPORTED = 20
+TOP_CLIENTS_REPORTED = 20
+
+
+class LogStats:
+    """Running totals from parsed log lines."""
+
+    def __init__(self, per_minute: bool = False):
+        """per_minute keeps per-client bytes per minute, for peak throughput in reports."""
+        self.requests: Dict[Tuple[str, str], int] = {}  # (cdn, cache status)
+        self.bytes: Dict[Tuple[str, str], int] = {}  # (cdn, 'cache' or 'upstream')
+        self.client_bytes: Dict[str, int] = {}
+        self.client_span: Dict[str, List[float]] = {}  # first and last request time
+        self.client_minutes: Dict[str, Dict[int, int]] = {}
+        self.uncached: Dict[Tuple[str, str], List[int]] = {}  # (host, path) -> [requests, bytes]
+        self.lines = 0
+        self.unparsed = 0
+        self.per_minute = per_minute
+        self._minute_cache: Dict[bytes, float] = {}
+
+    def _minute(self, stamp: bytes) -> float:
+        """Epoch seconds for a log timestamp, truncated to the minute (cached)."""
+        key = stamp[:17] + stamp[20:]  # drop seconds: "17/Oct/2026:14:03" + " +0000"
+        value = self._minute_cache.get(key)
+        if value is None:
+            try:
+                value = datetime.strptime(key.decode(), '%d/%b/%Y:%H:%M %z').timestamp()
+            except ValueError:
+                value = 0.0
+            self._minute_cache[key] = value
+        return value
+
+    def consume(self, buffer, start: int, end: int) -> None:
+        """Parse complete lines in buffer[start:end] (bytes or mmap)."""
+        requests, totals = self.requests, self.bytes
+        client_bytes, spans, uncached = self.client_bytes, self.client_span, self.uncached
+        matched = unparsed = 0
+        line_start = start
+        for m in LINE_RE.finditer(buffer, start, end):
+            if m.start() != line_start:
+                unparsed += buffer[line_start:m.start()].count(b'\n')
+            line_start = m.end() + 1
+            cdn, client, stamp, path, status, size, cache, host = m.groups()
+            matched += 1
+            size = int(size) if size != b'-' else 0
+            cdn = cdn.decode() or '-'
+            status_key = (cdn, cache.decode() or '-')
+            requests[status_key] = requests.get(status_key, 0) + 1
+
+            source = 'cache' if cache in FROM_CACHE else 'upstream'
+            totals[(cdn, source)] = totals.get((cdn, source), 0) + size
+
+            client = client.decode()
+            client_bytes[client] = client_bytes.get(client, 0) + size
+            minute = self._minute(stamp)
+            span = spans.get(client)
+            if span is None:
+                spans[client] = [minute, minute]
+            else:
+                span[0] = min(span[0], minute)
+                span[1] = max(span[1], minute)
+            if self.per_minute:
+                minutes = self.client_minutes.setdefault(client, {})
+                minutes[int(minute)] = minutes.get(int(minute), 0) + size
+
+            if source == 'upstream' and status != b'304':
+                key = (host.decode(), path.decode(errors='replace'))
+                entry = uncached.get(key)
+                if entry is None:
+                    uncached[key] = [1, size]
+                    if len(uncached) > 2 * TOP_OBJECTS_TRACKED:
+                        self._prune_uncached()
+                        uncached = self.uncached
+                else:
+                    entry[0] += 1
+                    entry[1] += size
+
+        if line_start < end:
+            unparsed += buffer[line_start:end].count(b'\n')
+        self.lines += matched + unparsed
+        self.unparsed += unparsed
+
+    def merge(self, other: 'LogStats') -> None:
+        """Add another LogStats' totals (e.g. lines parsed without the lock held) to these."""
+        for mine, theirs in ((self.requests, other.requests), (self.bytes, other.bytes),
+                             (self.client_bytes, other.client_bytes)):
+            for key, value in theirs.items():
+                mine[key] = mine.get(key, 0) + value
+        for client, (first, last) in other.client_span.items():
+            span = self.client_span.get(client)
+            if span is None:
+                self.client_span[client] = [first, last]
+            else:
+                span[0] = min(span[0], first)
+                span[1] = max(span[1], last)
+        for client, minutes in other.client_minutes.items():
+            mine = self.client_minutes.setdefault(client, {})
+            for minute, size in minutes.items():
+                mine[minute] = mine.get(minute, 0) + size
+        for key, (count, size) in other.uncached.items():
+            entry = self.uncached.get(key)
+            if entry is None:
+                self.uncached[key] = [count, size]
+            else:
+                entry[0] += count
+                entry[1] += size
+        if len(self.uncached) > 2 * TOP_OBJECTS_TRACKED:
+            self._prune_uncached()
+        self.lines += other.lines
+        self.unparsed += other.unparsed
+
+    def _prune_uncached(self) -> None:
+        # Keep the heaviest objects. A dropped object that is missed again
+        # starts over from zero, so the top N and their totals are approximate
+        top = sorted(self.uncached.items(), key=lambda item: -item[1][1])[:TOP_OBJECTS_TRACKED]
+        self.uncached = dict(top)
+
+    def top_uncached(self, limit: int = TOP_OBJECTS_REPORTED):
+        return sorted(self.uncached.items(), key=lambda item: -item[1][1])[:limit]
+
+    def cdn_summary(self) -> Dict[str, Dict[str, float]]:
+        """Requests, bytes and hit ratios per CDN."""
+        summary: Dict[str, Dict[str, float]] = {}
+        for (cdn, status), count in self.requests.items():
+            row = summary.setdefault(cdn, {'requests': 0, 'hits': 0, 'cache_bytes': 0, 'upstream_bytes': 0})
+            row['requests'] += count
+            if status.encode() in FROM_CACHE:
+                row['hits'] += count
+        for (cdn, source), size in self.bytes.items():
+            summary.setdefault(cdn, {'requests': 0, 'hits': 0, 'cache_bytes': 0, 'upstream_bytes': 0})
+            summary[cdn][f'{source}_bytes'] += size
+        for row in summary.values():
+            total = row['cache_bytes'] + row['upstream_bytes']
+            row['hit_ratio'] = row['hits'] / row['requests'] if row['requests'] else 0.0
+            row['byte_hit_ratio'] = row['cache_bytes'] / total if total else 0.0
+        return summary
+
+    def client_summary(self, limit: int = TOP_CLIENTS_REPORTED) -> List[Dict]:
+        rows = []
+        for client, total in sorted(self.client_bytes.items(), key=lambda item: -item[1])[:limit]:
+            first, last = self.client_span.get(client, (0, 0))
+            seconds = max(60.0, last - first + 60)  # spans are minute-aligned
+            row = {'client': client, 'bytes': total, 'avg_mbps': total * 8 / seconds / 1e6}
+            minutes = self.client_minutes.get(client)
+            if minutes:
+                row['peak_mbps'] = max(minutes.values()) * 8 / 60 / 1e6
+            rows.append(row)
+        return rows
+
+    def to_dict(self) -> Dict:
+        """Serializable totals for the checkpoint."""
+        return {
+            'requests': [[cdn, status, n] for (cdn, status), n in self.requests.items()],
+            'bytes': [[cdn, source, n] for (cdn, source), n in self.bytes.items()],
+            'client_bytes': self.client_bytes,
+            'client_span': self.client_span,
+            'uncached': [[host, path, n, size] for (host, path), (n, size) in self.top_uncached(1000)],
+            'lines': self.lines,
+            'unparsed': self.unparsed,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'LogStats':
+        stats = cls()
+        stats.requests = {(cdn, status): n for cdn, status, n in data.get('requests', [])}
+        stats.bytes = {(cdn, source): n for cdn, source, n in data.get('bytes', [])}
+        stats.client_bytes = dict(data.get('client_bytes', {}))
+        stats.client_span = {k: list(v) for k, v in data.get('client_span', {}).items()}
+        stats.uncached = {(host, path): [n, size] for host, path, n, size in data.get('uncached', [])}
+        stats.lines = data.get('lines', 0)
+        stats.unparsed = data.get('unparsed', 0)
+        return stats
+
+
+def read_complete_lines(path: Path, stats: LogStats, offset: int = 0) -> int:
+    """
+    Parse whole lines of a file from offset via mmap; returns the offset
+    after the last complete line (a partly written line is left for later).
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= offset:
+            return offset
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = mm.rfind(b'\n', offset, size) + 1
+            if end <= offset:
+                return offset
+            stats.consume(mm, offset, end)
+            return end
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def render_metrics(stats: LogStats, offset: int) -> str:
+    """Prometheus text exposition format."""
+    lines = [
+        '# HELP lancache_requests_total Requests by CDN and cache status.',
+        '# TYPE lancache_requests_total counter',
+    ]
+    for (cdn, status), n in sorted(stats.requests.items()):
+        lines.append(f'lancache_requests_total{{cdn="{_escape(cdn)}",cache_status="{_escape(status)}"}} {n}')
+
+    lines += [
+        '# HELP lancache_bytes_total Bytes sent to clients by CDN and source (cache or upstream).',
+        '# TYPE lancache_bytes_total counter',
+    ]
+    for (cdn, source), n in sorted(stats.bytes.items()):
+        lines.append(f'lancache_bytes_total{{cdn="{_escape(cdn)}",source="{source}"}} {n}')
+
+    lines += [
+        '# HELP lancache_byte_hit_ratio Share of bytes served from cache, per CDN.',
+        '# TYPE lancache_byte_hit_ratio gauge',
+    ]
+    for cdn, row in sorted(stats.cdn_summary().items()):
+        lines.append(f'lancache_byte_hit_ratio{{cdn="{_escape(cdn)}"}} {row["byte_hit_ratio"]:.6f}')
+
+    lines += [
+        '# HELP lancache_client_bytes_total Bytes sent to each client.',
+        '# TYPE lancache_client_bytes_total counter',
+    ]
+    for client, n in sorted(stats.client_bytes.items()):
+        lines.append(f'lancache_client_bytes_total{{client="{_escape(client)}"}} {n}')
+
+    # Uncached objects stay in --report output: a series per host and path
+    # would grow without bound, and lancache_bytes_total has the upstream totals
+    lines += [
+        '# HELP lancache_log_lines_total Access log lines read.',
+        '# TYPE lancache_log_lines_total counter',
+        f'lancache_log_lines_total {stats.lines}',
+        '# HELP lancache_log_unparsed_lines_total Access log lines not in the expected format.',
+        '# TYPE lancache_log_unparsed_lines_total counter',
+        f'lancache_log_unparsed_lines_total {stats.unparsed}',
+        '# HELP lancache_log_offset_bytes Checkpointed position in the access log.',
+        '# TYPE lancache_log_offset_bytes gauge',
+        f'lancache_log_offset_bytes {offset}',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'.{path.name}.tmp')
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+class Follower:
+    """Follows a growing (and rotating) access log with a persisted checkpoint."""
+
+    def __init__(self, log_path: Path, checkpoint: Path):
+        self.log_path = log_path
+        self.checkpoint = checkpoint
+        self.stats = LogStats()
+        self.inode = None
+        self.offset = 0
+        self.lock = threading.Lock()
+        self._load_checkpoint()
+
+    def _load_checkpoint(self) -> None:
+        try:
+            data = json.loads(self.checkpoint.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get('path') != str(self.log_path):
+            return
+        self.inode = data.get('inode')
+        self.offset = data.get('offset', 0)
+        self.stats = LogStats.from_dict(data.get('stats', {}))
+        print(f"Resuming {self.log_path} at byte {self.offset:,}")
+
+    def save_checkpoint(self) -> None:
+        with self.lock:
+            data = {'path': str(self.log_path), 'inode': self.inode, 'offset': self.offset,
+                    'stats': self.stats.to_dict(), 'saved': time.time()}
+        write_atomic(self.checkpoint, json.dumps(data))
+
+    def poll(self) -> bool:
+        """Read new lines; returns True if anything was read."""
+        try:
+            stat = self.log_path.stat()
+        except OSError:
+            return False
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            # New or rotated (or truncated) log: start from its beginning
+            if self.inode is not None:
+                print(f"{self.log_path} was rotated; reading the new file")
+            self.inode = stat.st_ino
+            self.offset = 0
+        if stat.st_size == self.offset:
+            return False
+        # Parse without the lock (the first read can be a whole day's log),
+        # so /metrics only waits for the merge
+        new_lines = LogStats()
+        new_lines._minute_cache = self.stats._minute_cache
+        new_offset = read_complete_lines(self.log_path, new_lines, self.offset)
+        if new_offset == self.offset:
+            return False
+        with self.lock:
+            self.stats.merge(new_lines)
+            self.offset = new_offset
+        return True
+
+    def metrics(self) -> str:
+        with self.lock:
+            return render_metrics(self.stats, self.offset)
+
+
+def serve_metrics(follower: Follower, port: int) -> None:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = follower.metrics().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('0.0.0.0', port), Handler)
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    print(f"Serving metrics on http://0.0.0.0:{port}/metrics")
+
+
+def follow(args) -> None:
+    follower = Follower(Path(args.log), Path(args.checkpoint))
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))  # save the checkpoint on stop
+    if args.port:
+        serve_metrics(follower, args.port)
+
+    last_checkpoint = time.monotonic()
+    try:
+        while True:
+            started = time.perf_counter()
+            if follower.poll() and args.verbose:
+                print(f"Read up to byte {follower.offset:,} in {time.perf_counter() - started:.2f}s")
+            if args.textfile:
+                write_atomic(Path(args.textfile), follower.metrics())
+            if time.monotonic() - last_checkpoint >= args.checkpoint_interval:
+                follower.save_checkpoint()
+                last_checkpoint = time.monotonic()
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.save_checkpoint()
+
+
+def format_bytes(n: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB', 'TB'):
+        if abs(n) < 1000 or unit == 'TB':
+            return f"{n:.1f}{unit}" if unit != 'B' else f"{int(n)}B"
+        n /= 1000
+    return f"{n:.1f}TB"
+
+
+def report(args) -> None:
+    stats = LogStats(per_minute=True)
+    started = time.perf_counter()
+    total_size = 0
+    for name in args.report:
+        path = Path(name)
+        if path.suffix == '.gz':
+            print(f"⚠️  Skipping {path}: decompress rotated logs first (gunzip -k)", file=sys.stderr)
+            continue
+        total_size += path.stat().st_size
+        read_complete_lines(path, stats)
+    elapsed = time.perf_counter() - started
+
+    cdns = stats.cdn_summary()
+    clients = stats.client_summary()
+    top = stats.top_uncached()
+
+    if args.json:
+        payload = json.dumps({
+            'lines': stats.lines,
+            'unparsed_lines': stats.unparsed,
+            'cdns': cdns,
+            'clients': clients,
+            'top_uncached': [{'host': h, 'path': p, 'requests': n, 'bytes': b} for (h, p), (n, b) in top],
+        }, indent=2)
+        if args.json == '-':
+            print(payload)
+            return
+        Path(args.json).write_text(payload + '\n')
+
+    print("LANCache Report")
+    print("=" * 60)
+    print(f"{stats.lines:,} lines ({format_bytes(total_size)}) in {elapsed:.1f}s"
+          + (f", {stats.unparsed:,} unparsed" if stats.unparsed else ""))
+
+    cache_total = sum(r['cache_bytes'] for r in cdns.values())
+    upstream_total = sum(r['upstream_bytes'] for r in cdns.values())
+    served = cache_total + upstream_total
+    print(f"\nServed {format_bytes(served)}: {format_bytes(cache_total)} from cache, "
+          f"{format_bytes(upstream_total)} from upstream"
+          + (f" ({cache_total / served:.0%} WAN saved)" if served else ""))
+
+    print(f"\n  {'CDN':<16}{'Requests':>12}{'Hit ratio':>11}{'From cache':>12}{'Upstream':>12}{'Byte hit':>10}")
+    for cdn, row in sorted(cdns.items(), key=lambda item: -(item[1]['cache_bytes'] + item[1]['upstream_bytes'])):
+        print(f"  {cdn:<16}{row['requests']:>12,}{row['hit_ratio']:>11.1%}"
+              f"{format_bytes(row['cache_bytes']):>12}{format_bytes(row['upstream_bytes']):>12}"
+              f"{row['byte_hit_ratio']:>10.1%}")
+
+    print(f"\nTop clients:")
+    print(f"  {'Client':<18}{'Bytes':>10}{'Avg Mbps':>10}{'Peak Mbps':>11}")
+    for row in clients:
+        print(f"  {row['client']:<18}{format_bytes(row['bytes']):>10}{row['avg_mbps']:>10.1f}"
+              f"{row.get('peak_mbps', 0):>11.1f}")
+
+    if top:
+        print(f"\nTop uncached objects (approximate):")
+        for (host, path), (n, size) in top:
+            print(f"  {format_bytes(size):>9} {n:>6}x  {host}{path[:80]}")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Analyze LANCache access logs')
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--follow', action='store_true', help='Follow the live log and publish metrics')
+    mode.add_argument('--report', nargs='+', metavar='LOG', help='Analyze log files once and print a report')
+    parser.add_argument('--log', default=str(DEFAULT_LOG), help=f'Access log to follow (default: {DEFAULT_LOG})')
+    parser.add_argument('--checkpoint', default=str(DEFAULT_CHECKPOINT),
+                        help=f'Checkpoint file (default: {DEFAULT_CHECKPOINT})')
+    parser.add_argument('--checkpoint-interval', type=float, default=30,
+                        help='Seconds between checkpoint saves (default: 30)')
+    parser.add_argument('--interval', type=float, default=5, help='Seconds between log polls (default: 5)')
+    parser.add_argument('--port', type=int, help='Serve /metrics on this port')
+    parser.add_argument('--textfile', help='Write metrics to this file (node_exporter textfile collector)')
+    parser.add_argument('--json', metavar='FILE', help="Report mode: write JSON ('-' for stdout)")
+    parser.add_argument('--verbose', action='store_true', help='Log each read')
+    args = parser.parse_args()
+
+    if args.follow:
+        if not args.port and not args.textfile:
+            parser.error('--follow needs --port and/or --textfile')
+        follow(args)
+    else:
+        report(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/bin/bash
+#
+# LANCache Monitor
+# Publishes cache hit/miss, WAN savings and per-client throughput from the
+# LANCache access log (via log_analyzer.py)
+#
+# Usage:
+#   ./monitor.sh --start            Follow the log, serve metrics on :9112
+#   ./monitor.sh --report [LOGS]    Post-event report (default: all access logs)
+#   ./monitor.sh --status           Show the current metrics summary
+#
+
+set -euo pipefail
+
+# Colors
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m'
+
+# Logging
+log_info() { echo -e "${BLUE}[INFO]${NC} $1"; }
+log_success() { echo -e "${GREEN}[SUCCESS]${NC} $1"; }
+log_warning() { echo -e "${YELLOW}[WARNING]${NC} $1"; }
+log_error() { echo -e "${RED}[ERROR]${NC} $1"; }
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+ANALYZER="$SCRIPT_DIR/log_analyzer.py"
+LOG_DIR="${LANCACHE_LOG_DIR:-/srv/lancache/logs}"
+METRICS_PORT="${LANCACHE_METRICS_PORT:-9112}"
+
+show_help() {
+    cat << EOF
+LANCache Monitor
+
+Usage:
+  $0 --start [options]     Follow $LOG_DIR/access.log and serve
+                           Prometheus metrics on port $METRICS_PORT
+  $0 --report [LOGS]       One-shot report (default: $LOG_DIR/access.log*)
+  $0 --status              Show hit ratios from the running monitor
+  $0 --help                Show this help
+
+Extra options are passed to log_analyzer.py (see: python3 $ANALYZER --help).
+Set LANCACHE_LOG_DIR or LANCACHE_METRICS_PORT to override the defaults.
+EOF
+}
+
+start_monitor() {
+    if [ ! -f "$LOG_DIR/access.log" ]; then
+        log_warning "$LOG_DIR/access.log does not exist yet; waiting for LANCache to write it"
+    fi
+    log_info "Serving metrics on port $METRICS_PORT (Ctrl+C to stop)"
+    exec python3 "$ANALYZER" --follow --log "$LOG_DIR/access.log" --port "$METRICS_PORT" "$@"
+}
+
+show_report() {
+    if [ $# -eq 0 ]; then
+        shopt -s nullglob
+        set -- "$LOG_DIR"/access.log*
+        if [ $# -eq 0 ]; then
+            log_error "No access logs found in $LOG_DIR"
+            exit 1
+        fi
+    fi
+    exec python3 "$ANALYZER" --report "$@"
+}
+
+show_status() {
+    local metrics
+    if ! metrics=$(curl -sf "http://localhost:$METRICS_PORT/metrics"); then
+        log_error "Monitor is not running (start it with: $0 --start)"
+        exit 1
+    fi
+    echo "LANCache Status"
+    echo "==============="
+    echo ""
+    echo "Byte hit ratio per CDN:"
+    echo "$metrics" | awk -F'[\"} ]' '/^lancache_byte_hit_ratio/ { printf "  %-16s %5.1f%%\n", $2, $(NF) * 100 }'
+    echo ""
+    echo "Log lines read:"
+    echo "$metrics" | awk '/^lancache_log_lines_total/ { print "  " $2 }'
+    log_success "Full metrics: http://localhost:$METRICS_PORT/metrics"
+}
+
+case "${1:-}" in
+    --start|-s)
+        shift
+        start_monitor "$@"
+        ;;
+    --report|-r)
+        shift
+        show_report "$@"
+        ;;
+    --status)
+        show_status
+        ;;
+    --help|-h|"")
+        show_help
+        ;;
+    *)
+        log_error "Unknown option: $1"
+        show_help
+        exit 1
+        ;;
+esac
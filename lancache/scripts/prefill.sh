@@ -7,6 +7,7 @@
 #   ./prefill.sh --game fortnite
 #   ./prefill.sh --all
 #   ./prefill.sh --list
+#   ./prefill.sh --auto [scheduler options]
 #
 
 set -euo pipefail
@@ -24,17 +25,18 @@ log_success() { echo -e "${GREEN}[SUCCESS]${NC} $1"; }
 log_warning() { echo -e "${YELLOW}[WARNING]${NC} $1"; }
 log_error() { echo -e "${RED}[ERROR]${NC} $1"; }
 
-# Game definitions with approximate sizes
+# Game definitions: approximate size|platform|prefill ID
+# (Steam app ID or Battle.net product code, used by prefill_scheduler.py)
 declare -A GAMES=(
-    ["fortnite"]="50GB|Epic Games"
-    ["rocket-league"]="20GB|Epic Games"
-    ["valorant"]="25GB|Riot Games"
-    ["league-of-legends"]="12GB|Riot Games"
-    ["overwatch2"]="30GB|Battle.net"
-    ["marvel-rivals"]="35GB|Steam"
-    ["csgo"]="25GB|Steam"
-    ["dota2"]="40GB|Steam"
-    ["apex-legends"]="70GB|Origin"
+    ["fortnite"]="50GB|Epic Games|"
+    ["rocket-league"]="20GB|Epic Games|"
+    ["valorant"]="25GB|Riot Games|"
+    ["league-of-legends"]="12GB|Riot Games|"
+    ["overwatch2"]="30GB|Battle.net|pro"
+    ["marvel-rivals"]="35GB|Steam|2767030"
+    ["csgo"]="25GB|Steam|730"
+    ["dota2"]="40GB|Steam|570"
+    ["apex-legends"]="70GB|Origin|"
 )
 
 show_help() {
@@ -45,6 +47,8 @@ Usage:
   $0 --game <game-name>    Pre-fill a specific game
   $0 --all                 Pre-fill all configured games
   $0 --list                List available games
+  $0 --auto [options]      Prefill games.enabled concurrently and resumably
+                           (runs prefill_scheduler.py; --auto --help for options)
   $0 --help                Show this help
 
 Examples:
@@ -55,7 +59,7 @@ Available games:
 EOF
     
     for game in "${!GAMES[@]}"; do
-        IFS='|' read -r size platform <<< "${GAMES[$game]}"
+        IFS='|' read -r size platform _ <<< "${GAMES[$game]}"
         printf "  %-20s %10s  (%s)\n" "$game" "$size" "$platform"
     done | sort
     
@@ -73,7 +77,7 @@ list_games() {
     echo ""
     
     for game in "${!GAMES[@]}"; do
-        IFS='|' read -r size platform <<< "${GAMES[$game]}"
+        IFS='|' read -r size platform _ <<< "${GAMES[$game]}"
         printf "%-20s %10s  Platform: %s\n" "$game" "$size" "$platform"
     done | sort
     
@@ -139,7 +143,7 @@ prefill_game() {
         return 1
     fi
     
-    IFS='|' read -r size platform <<< "${GAMES[$game]}"
+    IFS='|' read -r size platform _ <<< "${GAMES[$game]}"
     
     log_info "Pre-filling: $game"
     log_info "Platform: $platform"
@@ -271,6 +275,10 @@ case "${1:-}" in
     --monitor|-m)
         monitor_prefill
         ;;
+    --auto)
+        shift
+        exec python3 "$(dirname "${BASH_SOURCE[0]}")/prefill_scheduler.py" "$@"
+        ;;
     *)
         log_error "Unknown option: $1"
         show_help
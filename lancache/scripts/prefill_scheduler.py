@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+LANCache Prefill Scheduler
+High School Esports LAN Infrastructure
+
+Prefills every game in games.enabled (config.yaml) through LANCache,
+instead of one game at a time like prefill.sh --all:
+
+- Several downloads run at once, at most one per platform (steamcmd and
+  BattleNetPrefill don't share well with themselves), so --parallel is
+  capped at the number of platforms with games queued
+- Games with the most expected players go first, so a window that runs
+  out still caches what matters most (games.expected_players, otherwise
+  the order of games.enabled)
+- An optional global bandwidth budget is enforced by holding back new
+  downloads while the measured interface throughput is over it. Running
+  downloads are never paused: a stopped process stalls its TCP sessions
+  until the CDN drops them
+- Progress is saved to a state file: an interrupted run resumes with the
+  games it didn't finish, and the prefill tools skip content already cached
+- The run stops cleanly at the end of the prefill window, leaving the
+  remaining games for the next night (advanced.lancache.prefill_schedule)
+
+Games are downloaded with the command configured for their platform
+(advanced.lancache.prefill_commands overrides the defaults below). Platforms
+without a command (Epic, Riot, Origin) are listed for manual prefill with
+prefill.sh --game.
+
+Usage:
+    python3 prefill_scheduler.py
+    python3 prefill_scheduler.py --bandwidth-mbps 800 --parallel 3 --window-hours 5
+    python3 prefill_scheduler.py --dry-run
+    python3 prefill_scheduler.py --status
+    python3 prefill_scheduler.py --install-cron
+"""
+
+import argparse
+import json
+import os
+import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+from config_loader import load_config
+from game_catalog import game_key, load_game_catalog
+
+DEFAULT_STATE_FILE = Path('/var/lib/esports/prefill-state.json')
+CRON_FILE = Path('/etc/cron.d/lancache-prefill')
+
+# Command templates per platform; {id} is the prefill ID from prefill.sh
+PLATFORM_COMMANDS = {
+    'Steam': 'steamcmd +login anonymous +app_update {id} validate +quit',
+    'Battle.net': 'BattleNetPrefill prefill --products {id} --no-ansi',
+}
+
+DONE, FAILED, PENDING = 'done', 'failed', 'pending'
+
+# Bandwidth governor thresholds, relative to the budget
+HOLD_ABOVE = 1.05
+START_BELOW = 0.85
+# Seconds a new download gets to reach full speed before another may start
+RAMP_UP = 30
+
+
+class Job(NamedTuple):
+    game: str
+    platform: str
+    size_gb: float
+    players: int
+    command: Optional[List[str]]  # None when it has to be prefilled by hand
+
+
+def default_interface() -> Optional[str]:
+    """Interface of the default route (the path to the internet)."""
+    try:
+        with open('/proc/net/route') as f:
+            next(f)
+            for line in f:
+                fields = line.split()
+                if fields[1] == '00000000':
+                    return fields[0]
+    except (OSError, StopIteration, IndexError):
+        pass
+    return None
+
+
+def rx_bytes(interface: str) -> Optional[int]:
+    """Bytes received on an interface so far, from /proc/net/dev."""
+    try:
+        with open('/proc/net/dev') as f:
+            for line in f:
+                name, _, counters = line.partition(':')
+                if name.strip() == interface:
+                    return int(counters.split()[0])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def format_gb(num_bytes: float) -> str:
+    return f"{num_bytes / 1e9:.1f}GB"
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m{seconds % 60:02d}s"
+
+
+class PrefillState:
+    """Per-game progress persisted as JSON, so interrupted runs resume."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.games: Dict[str, Dict[str, Any]] = {}
+        try:
+            self.games = json.loads(path.read_text()).get('games', {})
+        except (OSError, ValueError):
+            pass
+
+    def get(self, game: str) -> Dict[str, Any]:
+        return self.games.setdefault(game, {'status': PENDING, 'attempts': 0, 'seconds': 0.0})
+
+    def update(self, game: str, **fields) -> None:
+        entry = self.get(game)
+        entry.update(fields)
+        entry['updated'] = datetime.now().isoformat(timespec='seconds')
+        self.save()
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({'games': self.games}, indent=2) + '\n')
+        os.replace(tmp, self.path)
+
+
+class Download:
+    """A running prefill command in its own process group."""
+
+    def __init__(self, job: Job, log_dir: Path):
+        self.job = job
+        self.started = time.monotonic()
+        self.bytes = 0.0  # share of measured throughput attributed to this job
+        log_dir.mkdir(parents=True, exist_ok=True)
+        self.log_path = log_dir / f"{job.game}.log"
+        self._log = open(self.log_path, 'ab')
+        self.process = subprocess.Popen(
+            job.command, stdout=self._log, stderr=subprocess.STDOUT,
+            stdin=subprocess.DEVNULL, start_new_session=True
+        )
+
+    def signal(self, sig) -> None:
+        try:
+            os.killpg(self.process.pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def stop(self, timeout: float = 30) -> None:
+        self.signal(signal.SIGTERM)
+        try:
+            self.process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            self.signal(signal.SIGKILL)
+            self.process.wait()
+        self._log.close()
+
+    def poll(self) -> Optional[int]:
+        code = self.process.poll()
+        if code is not None:
+            self._log.close()
+        return code
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+
+def build_jobs(config, catalog, commands: Dict[str, Optional[str]]) -> List[Job]:
+    """Jobs for games.enabled, highest expected demand first."""
+    enabled = config.games.enabled or []
+    expected = config.get('games.expected_players') or {}
+    jobs = []
+    for index, name in enumerate(enabled):
+        key = game_key(name)
+        game = catalog.get(key)
+        if game is None:
+            print(f"⚠️  Unknown game '{name}' (not in prefill.sh), skipping")
+            continue
+        # Without explicit numbers, earlier in games.enabled means more players
+        players = expected.get(name, expected.get(key, len(enabled) - index))
+        template = commands.get(game.platform)
+        command = None
+        if template and game.prefill_id:
+            command = shlex.split(template.format(id=game.prefill_id, game=game.name))
+        jobs.append(Job(key, game.platform, game.size_gb, int(players), command))
+    # Each prefilled game saves WAN traffic in proportion to its players, so
+    # demand alone orders the queue; smaller games break ties (done sooner)
+    jobs.sort(key=lambda j: (-j.players, j.size_gb))
+    return jobs
+
+
+class Scheduler:
+    """Runs prefill jobs concurrently within a bandwidth budget and deadline."""
+
+    def __init__(self, jobs: List[Job], state: PrefillState, parallel: int,
+                 budget_bps: Optional[float], interface: Optional[str],
+                 deadline: Optional[datetime], retries: int, log_dir: Path,
+                 progress_interval: float = 10):
+        self.queue = list(jobs)
+        self.state = state
+        self.parallel = parallel
+        self.budget = budget_bps
+        self.interface = interface
+        self.deadline = deadline
+        self.retries = retries
+        self.log_dir = log_dir
+        self.progress_interval = progress_interval
+        self.running: List[Download] = []
+        self.holding = False  # over budget: don't start more downloads
+        self.last_start = float('-inf')
+        self.stopping = False
+        self.rate = 0.0  # smoothed bytes per second
+        self.total_bytes = 0.0
+        self.attempts: Dict[str, int] = {}  # this run only
+
+    def _next_job(self) -> Optional[Job]:
+        busy = {d.job.platform for d in self.running}
+        for job in self.queue:
+            if job.platform not in busy:
+                self.queue.remove(job)
+                return job
+        return None
+
+    def _can_start(self, now: float) -> bool:
+        """Whether another download may start now."""
+        if len(self.running) >= self.parallel:
+            return False
+        if not self.budget or not self.running:
+            return True  # with nothing running, other traffic can't hold the run up
+        # Each start waits for the previous one to show up in the measured rate
+        return not self.holding and now - self.last_start >= RAMP_UP
+
+    def _start_jobs(self) -> None:
+        while self._can_start(time.monotonic()):
+            job = self._next_job()
+            if job is None:
+                return
+            entry = self.state.get(job.game)
+            self.attempts[job.game] = self.attempts.get(job.game, 0) + 1
+            print(f"▶️  Starting {job.game} ({job.platform}, ~{job.size_gb:g}GB, "
+                  f"{job.players} expected players)")
+            try:
+                download = Download(job, self.log_dir)
+            except OSError as e:
+                print(f"❌ {job.game}: could not start {job.command[0]}: {e}")
+                self.state.update(job.game, status=FAILED, last_error=str(e))
+                continue
+            self.state.update(job.game, status='running', attempts=entry['attempts'] + 1)
+            self.running.append(download)
+            self.last_start = download.started
+
+    def _reap(self) -> None:
+        for download in list(self.running):
+            code = download.poll()
+            if code is None:
+                continue
+            self.running.remove(download)
+            job = download.job
+            entry = self.state.get(job.game)
+            seconds = entry['seconds'] + download.elapsed
+            if code == 0:
+                print(f"✅ {job.game} done in {format_duration(download.elapsed)}")
+                self.state.update(job.game, status=DONE, seconds=seconds, last_error=None,
+                                  completed=datetime.now().isoformat(timespec='seconds'))
+            elif self.attempts[job.game] <= self.retries:
+                print(f"⚠️  {job.game} exited with {code}, retrying (log: {download.log_path})")
+                self.state.update(job.game, status=PENDING, seconds=seconds,
+                                  last_error=f"exit code {code}")
+                self.queue.insert(0, job)
+            else:
+                print(f"❌ {job.game} failed with exit code {code} (log: {download.log_path})")
+                self.state.update(job.game, status=FAILED, seconds=seconds,
+                                  last_error=f"exit code {code}")
+
+    def _govern(self) -> None:
+        """Hold back new downloads when over budget, allow them again when under."""
+        if not self.budget:
+            return
+        if self.rate > self.budget * HOLD_ABOVE:
+            self.holding = True
+        elif self.rate < self.budget * START_BELOW:
+            self.holding = False
+
+    def _measure(self, previous: Optional[int], interval: float) -> Optional[int]:
+        current = rx_bytes(self.interface) if self.interface else None
+        if current is None or previous is None:
+            return current
+        delta = max(0, current - previous)
+        self.rate = 0.7 * self.rate + 0.3 * delta / interval
+        self.total_bytes += delta
+        for download in self.running:
+            download.bytes += delta / len(self.running)
+        return current
+
+    def _print_progress(self, started: float) -> None:
+        elapsed = time.monotonic() - started
+        average = self.total_bytes / elapsed if elapsed else 0
+        line = (f"[{datetime.now():%H:%M:%S}] {format_gb(self.total_bytes)} downloaded, "
+                f"{self.rate * 8 / 1e6:.0f} Mbps now, {average * 8 / 1e6:.0f} Mbps average")
+        if self.budget:
+            line += f" (budget {self.budget * 8 / 1e6:.0f} Mbps{', holding new downloads' if self.holding else ''})"
+        print(line)
+        for d in self.running:
+            percent = min(99, 100 * d.bytes / (d.job.size_gb * 1e9)) if d.job.size_gb else 0
+            print(f"    {d.job.game:<20} {format_duration(d.elapsed)}  ~{percent:.0f}%")
+        if self.queue:
+            print(f"    queued: {', '.join(j.game for j in self.queue)}")
+
+    def _stop_all(self, reason: str) -> None:
+        for download in self.running:
+            print(f"⏹️  Stopping {download.job.game} ({reason}); it will resume next run")
+            download.stop()
+            entry = self.state.get(download.job.game)
+            self.state.update(download.job.game, status=PENDING,
+                              seconds=entry['seconds'] + download.elapsed, last_error=reason)
+        self.running.clear()
+
+    def request_stop(self, *_):
+        self.stopping = True
+
+    def run(self) -> None:
+        started = time.monotonic()
+        last_progress = started
+        previous = rx_bytes(self.interface) if self.interface else None
+        tick = 1.0
+
+        while self.queue or self.running:
+            if self.stopping:
+                self._stop_all('interrupted')
+                break
+            if self.deadline and datetime.now() >= self.deadline:
+                self._stop_all('prefill window ended')
+                break
+
+            self._reap()
+            self._start_jobs()
+            time.sleep(tick)
+            previous = self._measure(previous, tick)
+            self._govern()
+
+            if time.monotonic() - last_progress >= self.progress_interval:
+                self._print_progress(started)
+                last_progress = time.monotonic()
+
+        print(f"\nPrefill run finished after {format_duration(time.monotonic() - started)}, "
+              f"{format_gb(self.total_bytes)} downloaded")
+
+
+def print_status(state: PrefillState, jobs: List[Job]) -> None:
+    print("LANCache Prefill Status")
+    print("=" * 60)
+    for job in jobs:
+        entry = state.games.get(job.game, {'status': PENDING})
+        status = entry['status'] if job.command else 'manual'
+        detail = entry.get('completed') or entry.get('last_error') or ''
+        print(f"  {job.game:<20} {job.platform:<12} {job.size_gb:>5g}GB  {status:<8} {detail}")
+
+
+def install_cron(config, script: Path) -> None:
+    """Run the scheduler on advanced.lancache.prefill_schedule via cron."""
+    schedule = config.get('advanced.lancache.prefill_schedule')
+    if not config.get('advanced.lancache.prefill_enabled'):
+        print("advanced.lancache.prefill_enabled is false; not installing a cron job")
+        return
+    if not schedule:
+        print("advanced.lancache.prefill_schedule is not set")
+        sys.exit(1)
+    CRON_FILE.write_text(
+        "# Installed by prefill_scheduler.py --install-cron\n"
+        f"{schedule} root {sys.executable} {script} --config {config.path.resolve()} "
+        ">> /var/log/lancache-prefill.log 2>&1\n"
+    )
+    print(f"✅ Installed {CRON_FILE}: {schedule}")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Prefill enabled games into LANCache')
+    parser.add_argument('--config', default=os.environ.get('ESPORTS_CONFIG', PROJECT_ROOT / 'config.yaml'),
+                        help='Path to config.yaml')
+    parser.add_argument('--state', type=Path, default=DEFAULT_STATE_FILE,
+                        help=f'Resumable state file (default: {DEFAULT_STATE_FILE})')
+    parser.add_argument('--parallel', type=int,
+                        help='Concurrent downloads, at most one per platform '
+                             '(default: prefill_parallel, else one per platform)')
+    parser.add_argument('--bandwidth-mbps', type=float,
+                        help='Total download budget in Mbps (default: prefill_bandwidth_mbps, unlimited)')
+    parser.add_argument('--interface', help='Interface to measure throughput on (default: default route)')
+    parser.add_argument('--window-hours', type=float,
+                        help='Stop after this many hours (default: prefill_window_hours, no limit)')
+    parser.add_argument('--retries', type=int, default=1, help='Retries per game per run (default: 1)')
+    parser.add_argument('--force', action='store_true', help='Prefill games already marked done')
+    parser.add_argument('--dry-run', action='store_true', help='Show the plan without downloading')
+    parser.add_argument('--status', action='store_true', help='Show prefill state and exit')
+    parser.add_argument('--install-cron', action='store_true',
+                        help='Schedule runs with advanced.lancache.prefill_schedule')
+    args = parser.parse_args()
+
+    try:
+        config = load_config(args.config)
+    except (OSError, yaml.YAMLError) as e:
+        print(f"❌ Could not load {args.config}: {e}")
+        sys.exit(1)
+    settings = config.get('advanced.lancache') or {}
+    commands = dict(PLATFORM_COMMANDS)
+    commands.update(settings.get('prefill_commands') or {})
+
+    if args.install_cron:
+        install_cron(config, Path(__file__).resolve())
+        return
+
+    jobs = build_jobs(config, load_game_catalog(), commands)
+    state = PrefillState(args.state)
+    if args.status:
+        print_status(state, jobs)
+        return
+
+    manual = [j for j in jobs if j.command is None]
+    todo = [j for j in jobs if j.command and (args.force or state.get(j.game)['status'] != DONE)]
+    skipped = [j for j in jobs if j.command and j not in todo]
+
+    # One download per platform, so more than that can never run
+    platforms = len({j.platform for j in todo})
+    parallel = args.parallel or settings.get('prefill_parallel') or max(platforms, 1)
+    if parallel > platforms and todo:
+        print(f"⚠️  {platforms} platform(s) queued, so at most {platforms} download(s) at once")
+        parallel = platforms
+    mbps = args.bandwidth_mbps or settings.get('prefill_bandwidth_mbps')
+    window = args.window_hours or settings.get('prefill_window_hours')
+    deadline = datetime.now() + timedelta(hours=window) if window else None
+
+    print("LANCache Prefill Plan")
+    print("=" * 60)
+    for job in todo:
+        print(f"  {job.game:<20} {job.platform:<12} {job.size_gb:>5g}GB  {job.players} players")
+    if skipped:
+        print(f"Already prefilled: {', '.join(j.game for j in skipped)} (use --force to redo)")
+    if manual:
+        print(f"Manual prefill needed (prefill.sh --game): {', '.join(j.game for j in manual)}")
+    total_gb = sum(j.size_gb for j in todo)
+    print(f"\n{len(todo)} game(s), ~{total_gb:g}GB, up to {parallel} at once"
+          + (f", {mbps:g} Mbps budget" if mbps else "")
+          + (f", window ends {deadline:%H:%M}" if deadline else ""))
+    if mbps:
+        hours = total_gb * 8000 / mbps / 3600
+        print(f"Estimated time at full budget: {hours:.1f}h")
+        if window and hours > window:
+            print("⚠️  Not everything fits in the window; the rest resumes next run")
+
+    if args.dry_run or not todo:
+        return
+
+    # Missing tools: fail those games now rather than per attempt
+    for job in list(todo):
+        if not shutil.which(job.command[0]):
+            print(f"⚠️  {job.command[0]} not installed; skipping {job.game}")
+            state.update(job.game, status=FAILED, last_error=f"{job.command[0]} not installed")
+            todo.remove(job)
+
+    interface = args.interface or default_interface()
+    if mbps and not interface:
+        print("⚠️  Could not find the network interface; bandwidth budget disabled")
+    scheduler = Scheduler(
+        todo, state, parallel, mbps * 1e6 / 8 if mbps and interface else None, interface,
+        deadline, args.retries, args.state.parent / 'prefill-logs'
+    )
+    signal.signal(signal.SIGINT, scheduler.request_stop)
+    signal.signal(signal.SIGTERM, scheduler.request_stop)
+    scheduler.run()
+
+    failed = [j.game for j in jobs if state.games.get(j.game, {}).get('status') == FAILED]
+    if failed:
+        print(f"❌ Failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+In-Process Caches for the Registration App
+High School Esports LAN Infrastructure
+
+Keeps file server state the registration pages need in memory, so page
+renders, health checks and duplicate checks never wait on an SSH round
+trip. Values are resynced from the file server by a background thread.
+"""
+
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class BackgroundRefreshCache:
+    """Base class for caches resynced from the file server on an interval."""
+
+    name = 'cache'
+
+    def __init__(self, fetch, interval):
+        """
+        Initialize the cache.
+
+        fetch is a callable returning the authoritative value from the file
+        server. interval is how often (seconds) the background thread resyncs.
+        """
+        self._fetch = fetch
+        self.interval = interval
+        self._refreshed_at = None
+        self._fetched_at = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Start the background refresh thread (idempotent)."""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._refresh_loop,
+                    name=f'{self.name}-refresh',
+                    daemon=True
+                )
+                self._thread.start()
+
+    def seed(self):
+        """Resync now (blocking), then keep resyncing in the background. Returns True on success."""
+        ok = self.refresh()
+        self.start()
+        return ok
+
+    def _refresh_loop(self):
+        while True:
+            # Skip the first resync if seed() just did one
+            if self.age is None or self.age >= self.interval:
+                self.refresh()
+            time.sleep(self.interval)
+
+    def refresh(self):
+        """Resync from the file server (blocking). Returns True on success."""
+        started = time.time()
+        with self._lock:
+            self._begin_fetch()
+        try:
+            value = self._fetch()
+        except Exception as e:
+            log.warning("%s refresh failed: %s", self.name, e)
+            return False
+        with self._lock:
+            self._apply(value)
+            self._refreshed_at = time.monotonic()
+            self._fetched_at = started
+        return True
+
+    def _begin_fetch(self):
+        """
+        Note that a fetch is starting. Called with the lock held; local
+        updates made from here on may be missing from the fetched value.
+        """
+
+    def _apply(self, value):
+        """Store a freshly fetched value. Called with the lock held."""
+        raise NotImplementedError
+
+    @property
+    def age(self):
+        """Seconds since the last successful resync, or None if never synced."""
+        if self._refreshed_at is None:
+            return None
+        return time.monotonic() - self._refreshed_at
+
+
+class RegisteredCountCache(BackgroundRefreshCache):
+    """Registered-player count: the last resync plus registrations recorded since."""
+
+    name = 'registered-count'
+
+    def __init__(self, fetch, created_since, ttl=30):
+        """
+        created_since(timestamp) returns how many accounts were created since
+        a resync started (all of them for None). Pointing it at a store shared
+        by every worker process keeps the count coherent between resyncs.
+        """
+        super().__init__(fetch, ttl)
+        self._created_since = created_since
+        self._count = 0
+
+    def _apply(self, value):
+        self._count = value
+
+    def get(self):
+        """Return the cached count without blocking on the file server."""
+        self.start()
+        return self._count + self._created_since(self._fetched_at)
+
+
+class UsernameIndex(BackgroundRefreshCache):
+    """Set of existing usernames for constant-time availability checks."""
+
+    name = 'username-index'
+
+    def __init__(self, fetch, resync_interval=60):
+        """fetch returns an iterable of every username on the file server."""
+        super().__init__(fetch, resync_interval)
+        self._usernames = set()
+        # Names add()ed since the last fetch started, which its listing may miss
+        self._added = set()
+
+    def _begin_fetch(self):
+        self._added = set()
+
+    def _apply(self, value):
+        current = {name.lower() for name in value} | self._added
+        added = current - self._usernames
+        removed = self._usernames - current
+        if self._refreshed_at is not None and (added or removed):
+            log.info("Username index resync: %d added, %d removed",
+                     len(added), len(removed))
+        self._usernames = current
+
+    def __contains__(self, username):
+        self.start()
+        return username.lower() in self._usernames
+
+    def __len__(self):
+        return len(self._usernames)
+
+    def add(self, username):
+        """Record an account created by this process."""
+        with self._lock:
+            self._usernames.add(username.lower())
+            self._added.add(username.lower())
+
+    @property
+    def ready(self):
+        """True once the index has been seeded from the file server."""
+        return self._refreshed_at is not None
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+File Server Connection Pool
+High School Esports LAN Infrastructure
+
+Keeps a small number of authenticated SSH sessions to the file server open
+and multiplexes remote commands over them, so registrations don't pay for a
+full TCP + SSH handshake on every call.
+
+Each pool slot is an OpenSSH ControlMaster connection. Commands run through
+the slot's control socket, which reuses the already-authenticated session.
+A slot whose master has died is restarted and the command retried once.
+"""
+
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# ssh exits with 255 when the connection itself failed (as opposed to the
+# remote command failing), which is our signal to rebuild the session.
+SSH_CONNECTION_ERROR = 255
+
+
+class FileServerError(Exception):
+    """Raised when the file server cannot be reached."""
+
+
+class FileServerPool:
+    """Pool of persistent, multiplexed SSH sessions to the file server."""
+
+    def __init__(self, host, user='ansible', size=4, connect_timeout=5,
+                 command_timeout=10, keepalive_interval=15):
+        """Initialize the pool. Sessions are opened lazily on first use."""
+        self.host = host
+        self.user = user
+        self.size = max(1, int(size))
+        self.connect_timeout = connect_timeout
+        self.command_timeout = command_timeout
+        self.keepalive_interval = keepalive_interval
+
+        # Keep socket paths short - unix sockets are limited to ~104 chars
+        self._control_dir = tempfile.mkdtemp(prefix='esports-ssh-')
+        self._slots = queue.Queue()
+        self._connected = [False] * self.size
+        self._lock = threading.Lock()
+        for slot in range(self.size):
+            self._slots.put(slot)
+
+    @property
+    def target(self):
+        return f'{self.user}@{self.host}'
+
+    def _control_path(self, slot):
+        return os.path.join(self._control_dir, f'fs-{slot}.sock')
+
+    def _base_options(self, slot):
+        return [
+            '-o', 'BatchMode=yes',
+            '-o', f'ConnectTimeout={self.connect_timeout}',
+            '-o', f'ControlPath={self._control_path(slot)}',
+        ]
+
+    def _connect(self, slot):
+        """Start a background master connection for a slot."""
+        self._kill(slot)
+        try:
+            result = subprocess.run(
+                ['ssh', *self._base_options(slot),
+                 '-o', 'ControlMaster=yes',
+                 '-o', 'ControlPersist=yes',
+                 '-o', f'ServerAliveInterval={self.keepalive_interval}',
+                 '-o', 'ServerAliveCountMax=3',
+                 '-f', '-N', self.target],
+                capture_output=True,
+                timeout=self.connect_timeout + 5,
+                text=True
+            )
+        except subprocess.TimeoutExpired:
+            self._kill(slot)
+            raise FileServerError(f"Timed out connecting to file server {self.host}")
+        if result.returncode != 0:
+            raise FileServerError(
+                f"Cannot connect to file server {self.host}: {result.stderr.strip()}"
+            )
+        self._connected[slot] = True
+
+    def _disconnect(self, slot):
+        """Stop the master connection for a slot, if any."""
+        self._connected[slot] = False
+        if not os.path.exists(self._control_path(slot)):
+            return
+        subprocess.run(
+            ['ssh', *self._base_options(slot), '-O', 'exit', self.target],
+            capture_output=True,
+            timeout=self.connect_timeout
+        )
+
+    def _kill(self, slot):
+        """
+        Tear down a slot whose master may be wedged (a command or connect
+        timed out). The next use of the slot starts a fresh master.
+        """
+        try:
+            self._disconnect(slot)
+        except (OSError, subprocess.SubprocessError):
+            pass
+        self._connected[slot] = False
+        # If the master didn't answer -O exit, don't let the next connect find its socket
+        try:
+            os.unlink(self._control_path(slot))
+        except OSError:
+            pass
+
+    @contextmanager
+    def _acquire(self):
+        """Borrow a connected slot, blocking while all slots are busy."""
+        try:
+            slot = self._slots.get(timeout=self.command_timeout)
+        except queue.Empty:
+            raise FileServerError("Timed out waiting for a file server connection")
+        try:
+            if not self._connected[slot]:
+                self._connect(slot)
+            yield slot
+        finally:
+            self._slots.put(slot)
+
+    def run(self, command, timeout=None, input=None):
+        """
+        Run a command on the file server over a pooled session.
+
+        Returns the CompletedProcess (text mode). If the session dropped,
+        it is reconnected and the command retried once. A command that
+        times out is not retried (it may have run): the slot's session is
+        torn down and FileServerError raised.
+        """
+        timeout = timeout or self.command_timeout
+
+        for _ in range(2):
+            with self._acquire() as slot:
+                try:
+                    result = subprocess.run(
+                        ['ssh', *self._base_options(slot), '-o', 'ControlMaster=no',
+                         self.target, command],
+                        capture_output=True,
+                        timeout=timeout,
+                        text=True,
+                        input=input
+                    )
+                except subprocess.TimeoutExpired:
+                    self._kill(slot)
+                    raise FileServerError(
+                        f"File server {self.host} did not respond within {timeout}s"
+                    )
+                if result.returncode != SSH_CONNECTION_ERROR:
+                    return result
+                self._connected[slot] = False
+
+        raise FileServerError(
+            f"Lost connection to file server {self.host}: {result.stderr.strip()}"
+        )
+
+    def set_host(self, host):
+        """Point the pool at another file server; slots reconnect on next use."""
+        with self._lock:
+            self.host = host
+            self._connected = [False] * self.size
+
+    def close(self):
+        """Close every session and remove the control socket directory."""
+        with self._lock:
+            for slot in range(self.size):
+                try:
+                    self._disconnect(slot)
+                except (OSError, subprocess.SubprocessError):
+                    pass
+            shutil.rmtree(self._control_dir, ignore_errors=True)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Account Provisioning Job Queue
+High School Esports LAN Infrastructure
+
+Moves slow file server work out of the request path. Requests enqueue a job
+and return immediately; a fixed pool of worker threads drains the bounded
+queue, so the number of concurrent file server operations stays capped no
+matter how many players hit the form at once.
+
+When given a RegistrationStore, job state is also written to the shared
+database so status polls and duplicate checks work across worker processes.
+"""
+
+import logging
+import queue
+import secrets
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+# A job still "queued" or "running" after this long belonged to a worker
+# process that died; don't let it block its key forever.
+STALE_JOB_AGE = 600
+
+
+class QueueFull(Exception):
+    """Raised when the job queue is at capacity."""
+
+
+class DuplicateJob(Exception):
+    """Raised when a job with the same key is already queued or running."""
+
+
+def public_fields(job):
+    """A job's fields minus anything secret (the password)."""
+    return {
+        'id': job['id'],
+        'key': job['key'],
+        'state': job['state'],
+        'message': job['message'],
+        'params': {k: v for k, v in job['params'].items() if k != 'password'},
+        'created': job['created'],
+        'finished': job.get('finished'),
+    }
+
+
+class JobQueue:
+    """Bounded queue of jobs processed by a fixed pool of worker threads."""
+
+    def __init__(self, handler, workers=4, max_pending=200, retention=3600, store=None):
+        """
+        Initialize the queue. Workers start lazily on first submit.
+
+        handler is called with a job's params and returns (success, message).
+        Finished jobs are kept for retention seconds so clients can poll them.
+        store, if given, shares job state with other worker processes.
+        """
+        self._handler = handler
+        self.workers = max(1, int(workers))
+        self.retention = retention
+        self._store = store
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._jobs = {}
+        self._pending_keys = set()
+        self._reserved = 0  # queue slots held by submit() calls still saving their job
+        self._in_flight = 0
+        self._accepting = True
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'provision-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _save(self, job):
+        """Write a job snapshot to the shared store, if there is one."""
+        if self._store is None:
+            return
+        try:
+            self._store.save_job(public_fields(job))
+        except Exception as e:
+            log.warning("Could not save job %s: %s", job['id'], e)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                job['state'] = RUNNING
+                job['started'] = time.time()
+                self._in_flight += 1
+            self._save(job)
+            try:
+                success, message = self._handler(**job['params'])
+            except Exception as e:
+                log.exception("Job %s crashed", job['id'])
+                success, message = False, f"Error: {str(e)}"
+            with self._lock:
+                job['state'] = SUCCEEDED if success else FAILED
+                job['message'] = message
+                job['finished'] = time.time()
+                # Secrets are only needed while the job runs
+                job['params'] = {k: v for k, v in job['params'].items() if k != 'password'}
+                self._pending_keys.discard(job['key'])
+                self._in_flight -= 1
+            self._save(job)
+            self._queue.task_done()
+
+    def _prune(self):
+        """
+        Forget finished jobs older than the retention window. Called with
+        the lock held; returns the cutoff if the store needs pruning too.
+        """
+        cutoff = time.time() - self.retention
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.get('finished') and job['finished'] < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        if self._store is not None and expired:
+            return cutoff
+        return None
+
+    def _full(self):
+        maxsize = self._queue.maxsize
+        return maxsize > 0 and self._queue.qsize() + self._reserved >= maxsize
+
+    def submit(self, key=None, **params):
+        """
+        Enqueue a job and return its id.
+
+        key identifies the resource the job works on (e.g. the username); a
+        second job for a key that is still pending raises DuplicateJob.
+        """
+        self._ensure_started()
+        job = {
+            'id': secrets.token_urlsafe(12),
+            'key': key,
+            'state': QUEUED,
+            'message': '',
+            'params': params,
+            'created': time.time(),
+        }
+        # Reserve a queue slot and the key under the lock, then talk to the
+        # store without it, so status polls never wait on SQLite
+        with self._lock:
+            prune_before = self._prune()
+            if not self._accepting or self._full():
+                raise QueueFull()
+            if key is not None and key in self._pending_keys:
+                raise DuplicateJob(key)
+            if key is not None:
+                self._pending_keys.add(key)
+            self._reserved += 1
+        try:
+            if prune_before is not None:
+                self._store.prune_jobs(prune_before)
+            if key is not None and self._store is not None \
+                    and self._store.job_pending(key, max_age=STALE_JOB_AGE):
+                raise DuplicateJob(key)
+            # Saved before a worker can pick it up, so "queued" never
+            # overwrites "running"
+            self._save(job)
+        except Exception:
+            with self._lock:
+                self._reserved -= 1
+                self._pending_keys.discard(key)
+            raise
+        with self._lock:
+            self._reserved -= 1
+            # Only submit() puts, within its reservation, so the queue can't be full here
+            self._queue.put_nowait(job)
+            self._jobs[job['id']] = job
+        return job['id']
+
+    def is_pending(self, key):
+        """True if a job for key is queued or running in any worker process."""
+        if key in self._pending_keys:
+            return True
+        if self._store is None:
+            return False
+        return self._store.job_pending(key, max_age=STALE_JOB_AGE)
+
+    def status(self, job_id):
+        """Return a snapshot of a job's public fields, or None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                snapshot = public_fields(job)
+                if job['state'] == QUEUED:
+                    # Approximate position: jobs created earlier and still queued
+                    snapshot['position'] = sum(
+                        1 for other in self._jobs.values()
+                        if other['state'] == QUEUED and other['created'] <= job['created']
+                    )
+                return snapshot
+        # Submitted to another worker process
+        if self._store is None:
+            return None
+        return self._store.load_job(job_id)
+
+    def shutdown(self, timeout=30):
+        """Stop accepting jobs and wait up to timeout seconds for the rest to finish."""
+        self._accepting = False
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.1)
+        if self._queue.unfinished_tasks:
+            log.warning("Shutting down with %d provisioning job(s) unfinished",
+                        self._queue.unfinished_tasks)
+
+    @property
+    def depth(self):
+        """Number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    @property
+    def in_flight(self):
+        """Number of jobs currently being processed."""
+        return self._in_flight
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Prometheus Metrics for the Registration App
+High School Esports LAN Infrastructure
+
+Minimal counters, gauges and histograms rendered in the Prometheus text
+exposition format, so the registration laptop can be scraped alongside the
+rest of the infrastructure without extra dependencies.
+
+When the app runs with several worker processes (serve.py), each process
+periodically writes a snapshot of its metrics to a shared directory and
+/metrics sums the snapshots, so every scrape sees the whole server no
+matter which worker answers it.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+# Prometheus client library defaults, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+
+def _label_key(labels):
+    return json.dumps(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base class for a named metric family with labelled series."""
+
+    kind = None
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self):
+        """JSON-serializable copy of every series, keyed by label set."""
+        with self._lock:
+            return {key: self._copy(value) for key, value in self._series.items()}
+
+    def _copy(self, value):
+        return value
+
+    @staticmethod
+    def merge(values):
+        return sum(values)
+
+
+class Counter(Metric):
+    """Monotonically increasing count."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self, series):
+        for key, value in sorted(series.items()):
+            yield f'{self.name}{_format_labels(json.loads(key))} {_format_value(value)}'
+
+
+class Gauge(Metric):
+    """Point-in-time value read from a callback at scrape time."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, callback, aggregate='sum'):
+        """
+        aggregate says how values from several processes combine: 'sum' for
+        per-process quantities (queue depth), 'max' for shared ones (counts).
+        """
+        super().__init__(name, help_text)
+        self._callback = callback
+        self.merge = max if aggregate == 'max' else sum
+
+    def snapshot(self):
+        try:
+            return {_label_key({}): self._callback()}
+        except Exception:
+            return {}
+
+    def render(self, series):
+        for key, value in sorted(series.items()):
+            yield f'{self.name}{_format_labels(json.loads(key))} {_format_value(value)}'
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    'buckets': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0
+                }
+            series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the with-block takes."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _copy(self, value):
+        return {'buckets': list(value['buckets']), 'sum': value['sum'], 'count': value['count']}
+
+    @staticmethod
+    def merge(values):
+        values = list(values)
+        return {
+            'buckets': [sum(column) for column in zip(*(v['buckets'] for v in values))],
+            'sum': sum(v['sum'] for v in values),
+            'count': sum(v['count'] for v in values),
+        }
+
+    def render(self, series):
+        bounds = self.buckets + (float('inf'),)
+        for key, value in sorted(series.items()):
+            labels = json.loads(key)
+            cumulative = 0
+            for bound, count in zip(bounds, value['buckets']):
+                cumulative += count
+                pairs = labels + [['le', _format_value(bound)]]
+                yield f'{self.name}_bucket{_format_labels(pairs)} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(labels)} {_format_value(value["sum"])}'
+            yield f'{self.name}_count{_format_labels(labels)} {value["count"]}'
+
+
+class MetricsRegistry:
+    """Collection of metrics, optionally aggregated across worker processes."""
+
+    def __init__(self, shared_dir=None, write_interval=1):
+        """
+        shared_dir enables multi-process mode: every process writes its
+        snapshot there every write_interval seconds and at scrape time.
+        """
+        self._metrics = []
+        self.shared_dir = Path(shared_dir) if shared_dir else None
+        self.write_interval = write_interval
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text):
+        return self._register(Counter(name, help_text))
+
+    def gauge(self, name, help_text, callback, aggregate='sum'):
+        return self._register(Gauge(name, help_text, callback, aggregate))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, buckets))
+
+    def _snapshot(self):
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+    def _write_snapshot(self):
+        path = self.shared_dir / f'{os.getpid()}.json'
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self._snapshot()))
+        os.replace(tmp, path)
+
+    def _write_loop(self):
+        while True:
+            try:
+                self._write_snapshot()
+            except OSError:
+                pass
+            time.sleep(self.write_interval)
+
+    def start(self):
+        """Start publishing snapshots to the shared directory (if any)."""
+        if self.shared_dir is None or self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self.shared_dir.mkdir(parents=True, exist_ok=True)
+                self._writer = threading.Thread(
+                    target=self._write_loop, name='metrics-writer', daemon=True
+                )
+                self._writer.start()
+
+    def _collect(self):
+        """Snapshots from every process: {pid: snapshot}."""
+        if self.shared_dir is None:
+            return {os.getpid(): self._snapshot()}
+
+        self.start()
+        self._write_snapshot()
+        snapshots = {}
+        for path in self.shared_dir.glob('*.json'):
+            try:
+                pid = int(path.stem)
+                snapshots[pid] = json.loads(path.read_text())
+            except (ValueError, OSError):
+                continue
+        return snapshots
+
+    @staticmethod
+    def _alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format."""
+        snapshots = self._collect()
+        live = {pid for pid in snapshots if self._alive(pid)}
+        lines = []
+        for metric in self._metrics:
+            merged = {}
+            for pid, snapshot in snapshots.items():
+                # Counters and histograms from exited workers still count;
+                # their gauges no longer describe anything
+                if metric.kind == 'gauge' and pid not in live:
+                    continue
+                for key, value in snapshot.get(metric.name, {}).items():
+                    merged.setdefault(key, []).append(value)
+            series = {key: metric.merge(values) for key, values in merged.items()}
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.render(series))
+        return '\n'.join(lines) + '\n'
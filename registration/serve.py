@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Production Server for the Registration Web Application
+High School Esports LAN Infrastructure
+
+Runs registration/webapp.py under gunicorn with several worker processes,
+each serving requests on a pool of threads, instead of Flask's single
+development server. SIGTERM (or Ctrl+C) shuts down gracefully: workers stop
+accepting connections, finish in-flight requests and provisioning jobs,
+and commit queued registrations before exiting.
+
+Worker processes share state through the registration database
+(registration.database): provisioning jobs, newly created accounts and the
+registered-player count are visible to every worker. /metrics aggregates
+every worker's metrics through a shared snapshot directory. Note that the SSH pool
+and provisioning workers are per process, so the file server sees up to
+workers x ssh_pool_size sessions.
+
+Settings come from the registration.server section of config.yaml; CLI
+flags override them.
+
+Usage:
+    pip3 install gunicorn
+    python3 serve.py
+    python3 serve.py --workers 4 --threads 16 --bind 0.0.0.0:8080
+"""
+
+import argparse
+import atexit
+import multiprocessing
+import os
+import secrets
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from config_loader import load_config
+
+CONFIG_FILE = Path(os.environ.get('ESPORTS_CONFIG', Path(__file__).parent.parent / "config.yaml"))
+
+DEFAULTS = {
+    'bind': '0.0.0.0:5000',
+    'workers': min(4, multiprocessing.cpu_count()),
+    'threads': 8,
+    'graceful_timeout': 30,
+    'backlog': 2048,
+}
+
+
+def load_server_settings():
+    """Read registration.server from config.yaml, falling back to defaults."""
+    settings = dict(DEFAULTS)
+    try:
+        config = load_config(CONFIG_FILE)
+    except Exception as e:
+        print(f"Using default server settings, could not load {CONFIG_FILE}: {e}")
+        return settings
+    settings.update(config.get('registration.server') or {})
+    return settings
+
+
+def parse_args(settings):
+    parser = argparse.ArgumentParser(description='Run the registration app in production mode')
+    parser.add_argument('--bind', default=settings['bind'],
+                        help=f"Address to listen on (default: {settings['bind']})")
+    parser.add_argument('--workers', type=int, default=settings['workers'],
+                        help=f"Worker processes (default: {settings['workers']})")
+    parser.add_argument('--threads', type=int, default=settings['threads'],
+                        help=f"Threads per worker (default: {settings['threads']})")
+    parser.add_argument('--graceful-timeout', type=int, default=settings['graceful_timeout'],
+                        help="Seconds to let workers finish on shutdown "
+                             f"(default: {settings['graceful_timeout']})")
+    parser.add_argument('--backlog', type=int, default=settings['backlog'],
+                        help=f"Pending connection queue size (default: {settings['backlog']})")
+    return parser.parse_args()
+
+
+def main():
+    """Main entry point."""
+    args = parse_args(load_server_settings())
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("gunicorn is not installed. Install it with: pip3 install gunicorn")
+        print("(For a quick test you can still run: python3 webapp.py)")
+        sys.exit(1)
+
+    class RegistrationServer(BaseApplication):
+        """gunicorn application that loads webapp inside each worker."""
+
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # Imported after fork so every worker gets its own SSH pool,
+            # database connections and background threads
+            sys.path.insert(0, str(Path(__file__).parent))
+            from webapp import app, seed_caches
+            # Before the worker accepts connections
+            seed_caches()
+            return app
+
+    # Every worker must sign session cookies with the same key
+    os.environ.setdefault('REGISTRATION_SECRET_KEY', secrets.token_hex(16))
+    # Workers size their shutdown drain to fit gunicorn's graceful timeout
+    os.environ['REGISTRATION_GRACEFUL_TIMEOUT'] = str(args.graceful_timeout)
+
+    # Workers publish metrics snapshots here so /metrics covers all of them
+    if 'REGISTRATION_METRICS_DIR' not in os.environ:
+        metrics_dir = tempfile.mkdtemp(prefix='registration-metrics-')
+        os.environ['REGISTRATION_METRICS_DIR'] = metrics_dir
+        master_pid = os.getpid()
+        # Workers inherit this handler when forked; only the master cleans up
+        atexit.register(
+            lambda: os.getpid() == master_pid and shutil.rmtree(metrics_dir, ignore_errors=True)
+        )
+
+    RegistrationServer({
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread',
+        'graceful_timeout': args.graceful_timeout,
+        # Restart a worker that stops responding for this long
+        'timeout': max(60, args.graceful_timeout * 2),
+        'backlog': args.backlog,
+        'keepalive': 5,
+        'preload_app': False,
+        'accesslog': '-',
+    }).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Registration Store
+High School Esports LAN Infrastructure
+
+Embedded SQLite database of player registrations (username, email, team),
+replacing the append-only /var/log/registration.log. The database runs in
+WAL mode so staff queries never block registrations, and writes are queued
+and committed in groups by a single writer thread.
+
+It also holds provisioning job state, so every web server worker process
+sees the same jobs no matter which one accepted the registration.
+
+Usage:
+    # Import an existing registration.log
+    python3 store.py --database registration.db --migrate /var/log/registration.log
+"""
+
+import argparse
+import csv
+import json
+import logging
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS registrations (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL UNIQUE COLLATE NOCASE,
+    email TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    team TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_registrations_email ON registrations (email);
+CREATE INDEX IF NOT EXISTS idx_registrations_team ON registrations (team);
+CREATE INDEX IF NOT EXISTS idx_registrations_created ON registrations (created_at);
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    key TEXT,
+    state TEXT NOT NULL,
+    message TEXT NOT NULL DEFAULT '',
+    params TEXT NOT NULL DEFAULT '{}',
+    created REAL NOT NULL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_key ON jobs (key, state);
+"""
+
+INSERT = """
+INSERT OR IGNORE INTO registrations (username, email, team, created_at)
+VALUES (?, ?, ?, ?)
+"""
+
+
+class RegistrationStore:
+    """SQLite-backed registration records with grouped commits."""
+
+    def __init__(self, path, batch_size=50, flush_interval=1.0):
+        """
+        Open (and create if needed) the database at path.
+
+        Records are committed when batch_size are waiting or flush_interval
+        seconds after the first one was queued, whichever comes first.
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = queue.Queue()
+        self._local = threading.local()
+        self._writer = None
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(SCHEMA)
+        conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _conn(self):
+        """Per-thread connection (sqlite3 connections are not shareable)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _ensure_writer(self):
+        if self._writer is not None:
+            return
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_loop, name='registration-store-writer', daemon=True
+                )
+                self._writer.start()
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            item = self._pending.get()
+            if item is None:
+                self._pending.task_done()
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._pending.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    # Commit what we have, then stop
+                    self._pending.put(None)
+                    self._pending.task_done()
+                    break
+                batch.append(item)
+            try:
+                with conn:
+                    conn.executemany(INSERT, batch)
+            except sqlite3.Error as e:
+                log.error("Failed to write %d registration(s): %s", len(batch), e)
+            for _ in batch:
+                self._pending.task_done()
+        conn.close()
+
+    def record(self, username, email='', team=''):
+        """Queue a registration for the next grouped commit."""
+        self._ensure_writer()
+        # Microseconds, so count_since() can compare against a resync's start
+        created_at = datetime.now(timezone.utc).isoformat(timespec='microseconds')
+        self._pending.put((username, email or '', team or '', created_at))
+
+    def flush(self):
+        """Block until every queued registration has been committed."""
+        if self._writer is not None:
+            self._pending.join()
+
+    def close(self):
+        """Commit queued registrations and stop the writer thread."""
+        if self._writer is not None:
+            self._pending.put(None)
+            self._writer.join()
+            self._writer = None
+
+    def _rows(self, sql, params=()):
+        return [dict(row) for row in self._conn().execute(sql, params)]
+
+    def get(self, username):
+        """Return the registration for a username, or None."""
+        rows = self._rows(
+            'SELECT username, email, team, created_at FROM registrations WHERE username = ?',
+            (username,)
+        )
+        return rows[0] if rows else None
+
+    def search(self, query='', email=None, team=None, limit=100):
+        """
+        Find registrations.
+
+        query matches the start of a username or email; email and team are
+        exact (case-insensitive) filters. All lookups use the table's indexes.
+        """
+        clauses = []
+        params = []
+        if query:
+            prefix = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            clauses.append("(username LIKE ? ESCAPE '\\' OR email LIKE ? ESCAPE '\\')")
+            params += [prefix, prefix]
+        if email is not None:
+            clauses.append('email = ?')
+            params.append(email)
+        if team is not None:
+            clauses.append('team = ?')
+            params.append(team)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        return self._rows(
+            f'SELECT username, email, team, created_at FROM registrations {where} '
+            'ORDER BY created_at DESC LIMIT ?',
+            (*params, limit)
+        )
+
+    def team_counts(self):
+        """Return [{'team': ..., 'players': n}] ordered by team size."""
+        return self._rows(
+            'SELECT team, COUNT(*) AS players FROM registrations '
+            'GROUP BY team ORDER BY players DESC, team'
+        )
+
+    def count(self):
+        """Total number of stored registrations."""
+        return self._conn().execute('SELECT COUNT(*) FROM registrations').fetchone()[0]
+
+    def count_since(self, timestamp):
+        """Registrations recorded at or after a Unix timestamp (all if None)."""
+        if timestamp is None:
+            return self.count()
+        since = datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec='microseconds')
+        return self._conn().execute(
+            'SELECT COUNT(*) FROM registrations WHERE created_at >= ?', (since,)
+        ).fetchone()[0]
+
+    def exists(self, username):
+        """True if a registration for username has been committed."""
+        row = self._conn().execute(
+            'SELECT 1 FROM registrations WHERE username = ?', (username,)
+        ).fetchone()
+        return row is not None
+
+    def save_job(self, job):
+        """Insert or update a provisioning job (committed immediately)."""
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO jobs (id, key, state, message, params, created, finished) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (job['id'], job['key'], job['state'], job['message'],
+                 json.dumps(job['params']), job['created'], job.get('finished'))
+            )
+
+    def load_job(self, job_id):
+        """Return a saved job as a dict, or None."""
+        row = self._conn().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        return job
+
+    def job_pending(self, key, max_age):
+        """True if a job for key was queued or started in the last max_age seconds."""
+        row = self._conn().execute(
+            "SELECT 1 FROM jobs WHERE key = ? AND state IN ('queued', 'running') AND created > ?",
+            (key, time.time() - max_age)
+        ).fetchone()
+        return row is not None
+
+    def prune_jobs(self, before):
+        """Delete finished jobs that completed before the given timestamp."""
+        conn = self._conn()
+        with conn:
+            conn.execute('DELETE FROM jobs WHERE finished IS NOT NULL AND finished < ?', (before,))
+
+    def migrate_log(self, log_path):
+        """
+        Import a legacy registration.log (username,email,team per line).
+
+        Returns the number of new registrations imported. Entries already in
+        the store are skipped, so re-running a migration is harmless.
+        """
+        log_path = Path(log_path)
+        created_at = datetime.fromtimestamp(
+            log_path.stat().st_mtime, timezone.utc
+        ).isoformat(timespec='seconds')
+
+        rows = []
+        with open(log_path, newline='') as f:
+            for fields in csv.reader(f):
+                if not fields or not fields[0].strip():
+                    continue
+                fields += [''] * (3 - len(fields))
+                rows.append((fields[0].strip(), fields[1].strip(),
+                             ','.join(fields[2:]).strip(), created_at))
+
+        conn = self._connect()
+        try:
+            before = conn.execute('SELECT COUNT(*) FROM registrations').fetchone()[0]
+            with conn:
+                conn.executemany(INSERT, rows)
+            after = conn.execute('SELECT COUNT(*) FROM registrations').fetchone()[0]
+        finally:
+            conn.close()
+        return after - before
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Registration store maintenance')
+    parser.add_argument('--database', required=True, help='Path to the SQLite database')
+    parser.add_argument('--migrate', metavar='LOG', help='Import a legacy registration.log')
+    args = parser.parse_args()
+
+    store = RegistrationStore(args.database)
+
+    if args.migrate:
+        try:
+            imported = store.migrate_log(args.migrate)
+        except FileNotFoundError:
+            print(f"Log file not found: {args.migrate}")
+            sys.exit(1)
+        print(f"Imported {imported} registration(s) from {args.migrate}")
+
+    print(f"{store.count()} registration(s) in {args.database}")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,32 +11,90 @@ Can run on:
 - Registration kiosk
 
 Usage:
-    python3 webapp.py
+    python3 webapp.py        # development server
+    python3 serve.py         # production server (see serve.py)
     Access at: http://laptop-ip:5000
 """
 
-from flask import Flask, render_template_string, request, redirect, flash, session
-import subprocess
+from flask import Flask, Response, abort, g, request, redirect, flash, session
+from functools import wraps
+import atexit
+import csv
+import gzip
+import hashlib
+import io
+import mimetypes
+import os
 import re
 import secrets
-import yaml
+import shlex
+import sys
+import time
 from pathlib import Path
 
-app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)
+from cache import RegisteredCountCache, UsernameIndex
+from fileserver import FileServerPool, FileServerError
+from jobs import JobQueue, QueueFull, DuplicateJob
+from metrics import MetricsRegistry
+from store import RegistrationStore
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from config_loader import ConfigWatcher
+
+# Static assets are served from memory by static_asset() below
+app = Flask(__name__, static_folder=None)
+# serve.py shares one key between worker processes so flash messages survive
+app.secret_key = os.environ.get('REGISTRATION_SECRET_KEY') or secrets.token_hex(16)
 
 # Configuration
-CONFIG_FILE = Path(__file__).parent.parent / "config.yaml"
-FILE_SERVER_IP = "192.168.1.12"
-
-# Load config
-try:
-    with open(CONFIG_FILE) as f:
-        config = yaml.safe_load(f)
-        FILE_SERVER_IP = config['network']['file_server_ip']
-        ORG_NAME = config['organization']['name']
-except:
-    ORG_NAME = "Esports Tournament"
+CONFIG_FILE = Path(os.environ.get('ESPORTS_CONFIG', Path(__file__).parent.parent / "config.yaml"))
+STATIC_DIR = Path(__file__).parent / "static"
+
+# Load config (re-checked on requests, so edits apply without a restart)
+config_watcher = ConfigWatcher(CONFIG_FILE)
+if config_watcher.error:
+    app.logger.warning("Using default settings, could not load %s: %s",
+                       CONFIG_FILE, config_watcher.error)
+config = config_watcher.current()
+FILE_SERVER_IP = config.network.file_server_ip
+REGISTRATION = config.registration
+ORG_NAME = config.organization.name
+
+# Persistent SSH sessions to the file server, shared by all requests
+file_server = FileServerPool(
+    FILE_SERVER_IP,
+    user=REGISTRATION.get('ssh_user', 'ansible'),
+    size=REGISTRATION.get('ssh_pool_size', 4),
+    connect_timeout=REGISTRATION.get('ssh_connect_timeout', 5),
+    command_timeout=REGISTRATION.get('ssh_command_timeout', 10)
+)
+atexit.register(file_server.close)
+
+# Email/team records for staff lookups
+store = RegistrationStore(
+    REGISTRATION.get('database', Path(__file__).parent / 'registration.db')
+)
+atexit.register(store.close)
+
+# Prometheus metrics for /metrics; serve.py sets a directory shared by workers
+metrics = MetricsRegistry(shared_dir=os.environ.get('REGISTRATION_METRICS_DIR'))
+request_latency = metrics.histogram(
+    'registration_request_duration_seconds',
+    'HTTP request latency by route, method and status'
+)
+fileserver_latency = metrics.histogram(
+    'registration_fileserver_duration_seconds',
+    'File server (SSH) command latency by operation'
+)
+fileserver_failures = metrics.counter(
+    'registration_fileserver_failures_total',
+    'File server (SSH) commands that failed, by operation'
+)
+username_check_latency = metrics.histogram(
+    'registration_username_check_duration_seconds',
+    'check_user_exists latency (local index and store lookups)',
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05)
+)
 
 # HTML Templates
 MAIN_TEMPLATE = """
@@ -44,130 +102,7 @@ MAIN_TEMPLATE = """
 <html>
 <head>
     <title>Player Registration - {{ org_name }}</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            padding: 20px;
-        }
-        .container {
-            background: white;
-            border-radius: 20px;
-            padding: 40px;
-            max-width: 500px;
-            width: 100%;
-            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-        }
-        h1 {
-            color: #667eea;
-            margin-bottom: 10px;
-            text-align: center;
-        }
-        .subtitle {
-            text-align: center;
-            color: #666;
-            margin-bottom: 30px;
-        }
-        .form-group {
-            margin-bottom: 20px;
-        }
-        label {
-            display: block;
-            margin-bottom: 5px;
-            color: #333;
-            font-weight: 600;
-        }
-        input, select {
-            width: 100%;
-            padding: 12px;
-            border: 2px solid #ddd;
-            border-radius: 8px;
-            font-size: 16px;
-            transition: border-color 0.3s;
-        }
-        input:focus, select:focus {
-            outline: none;
-            border-color: #667eea;
-        }
-        .btn {
-            width: 100%;
-            padding: 15px;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border: none;
-            border-radius: 8px;
-            font-size: 18px;
-            font-weight: 600;
-            cursor: pointer;
-            transition: transform 0.2s;
-        }
-        .btn:hover {
-            transform: translateY(-2px);
-        }
-        .btn:active {
-            transform: translateY(0);
-        }
-        .alert {
-            padding: 15px;
-            margin-bottom: 20px;
-            border-radius: 8px;
-            font-weight: 500;
-        }
-        .alert-success {
-            background: #d4edda;
-            color: #155724;
-            border: 1px solid #c3e6cb;
-        }
-        .alert-error {
-            background: #f8d7da;
-            color: #721c24;
-            border: 1px solid #f5c6cb;
-        }
-        .help-text {
-            font-size: 14px;
-            color: #666;
-            margin-top: 5px;
-        }
-        .rules {
-            background: #f8f9fa;
-            padding: 15px;
-            border-radius: 8px;
-            margin-bottom: 20px;
-            font-size: 14px;
-            color: #666;
-        }
-        .rules ul {
-            margin-left: 20px;
-            margin-top: 10px;
-        }
-        .footer {
-            text-align: center;
-            margin-top: 30px;
-            color: #999;
-            font-size: 14px;
-        }
-        .stats {
-            text-align: center;
-            margin-top: 20px;
-            padding: 15px;
-            background: #f8f9fa;
-            border-radius: 8px;
-        }
-        .stats-number {
-            font-size: 36px;
-            font-weight: 700;
-            color: #667eea;
-        }
-        .stats-label {
-            color: #666;
-            margin-top: 5px;
-        }
-    </style>
+    <link rel="stylesheet" href="{{ stylesheet_url }}">
 </head>
 <body>
     <div class="container">
@@ -198,7 +133,7 @@ MAIN_TEMPLATE = """
                        pattern="[a-zA-Z0-9]{3,15}" 
                        required 
                        placeholder="player123">
-                <div class="help-text">This will be your login name</div>
+                <div class="help-text" id="username-status">This will be your login name</div>
             </div>
             
             <div class="form-group">
@@ -244,6 +179,31 @@ MAIN_TEMPLATE = """
             Need help? Contact tournament staff
         </div>
     </div>
+    <script>
+        // Live username availability check, debounced while typing
+        (function() {
+            var input = document.getElementById('username');
+            var status = document.getElementById('username-status');
+            var timer = null;
+            input.addEventListener('input', function() {
+                clearTimeout(timer);
+                timer = setTimeout(function() {
+                    if (input.value.length < 3) {
+                        status.textContent = 'This will be your login name';
+                        status.style.color = '';
+                        return;
+                    }
+                    fetch('/api/username-available?username=' + encodeURIComponent(input.value))
+                        .then(function(r) { return r.json(); })
+                        .then(function(data) {
+                            status.textContent = data.message;
+                            status.style.color = data.available ? '#155724' : '#721c24';
+                        })
+                        .catch(function() {});
+                }, 250);
+            });
+        })();
+    </script>
 </body>
 </html>
 """
@@ -253,68 +213,9 @@ SUCCESS_TEMPLATE = """
 <html>
 <head>
     <title>Registration Success</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            padding: 20px;
-        }
-        .container {
-            background: white;
-            border-radius: 20px;
-            padding: 40px;
-            max-width: 500px;
-            width: 100%;
-            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-            text-align: center;
-        }
-        .success-icon {
-            font-size: 80px;
-            margin-bottom: 20px;
-        }
-        h1 {
-            color: #28a745;
-            margin-bottom: 20px;
-        }
-        .credentials {
-            background: #f8f9fa;
-            padding: 20px;
-            border-radius: 10px;
-            margin: 20px 0;
-            text-align: left;
-        }
-        .credentials strong {
-            color: #667eea;
-        }
-        .instructions {
-            background: #fff3cd;
-            padding: 15px;
-            border-radius: 8px;
-            margin: 20px 0;
-            font-size: 14px;
-            color: #856404;
-        }
-        .btn {
-            display: inline-block;
-            padding: 15px 30px;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border: none;
-            border-radius: 8px;
-            font-size: 16px;
-            font-weight: 600;
-            cursor: pointer;
-            text-decoration: none;
-            margin-top: 20px;
-        }
-    </style>
+    <link rel="stylesheet" href="{{ stylesheet_url }}">
 </head>
-<body>
+<body class="page-status page-success">
     <div class="container">
         <div class="success-icon">✅</div>
         <h1>Account Created!</h1>
@@ -344,6 +245,81 @@ SUCCESS_TEMPLATE = """
 </html>
 """
 
+PROVISIONING_TEMPLATE = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Creating Account...</title>
+    <link rel="stylesheet" href="{{ stylesheet_url }}">
+</head>
+<body class="page-status">
+    <div class="container">
+        <div class="spinner" id="spinner"></div>
+        <h1>Creating Account...</h1>
+        <p class="status" id="status">Setting up <strong>{{ username }}</strong>. This usually takes a few seconds.</p>
+        <div class="alert alert-error hidden" id="error"></div>
+        <a href="/" class="btn hidden" id="back">Try Again</a>
+    </div>
+    <script>
+        // Poll the job until the file server has created the account
+        (function poll() {
+            fetch('/register/status/{{ job_id }}')
+                .then(function(r) { return r.json(); })
+                .then(function(job) {
+                    if (job.state === 'succeeded') {
+                        window.location = '/register/complete/{{ job_id }}';
+                    } else if (job.state === 'failed' || job.state === 'unknown') {
+                        document.getElementById('spinner').classList.add('hidden');
+                        document.getElementById('status').classList.add('hidden');
+                        document.getElementById('error').textContent = job.message;
+                        document.getElementById('error').classList.remove('hidden');
+                        document.getElementById('back').classList.remove('hidden');
+                    } else {
+                        if (job.position) {
+                            document.getElementById('status').textContent =
+                                'You are number ' + job.position + ' in line. Hang tight!';
+                        }
+                        setTimeout(poll, 1000);
+                    }
+                })
+                .catch(function() { setTimeout(poll, 2000); });
+        })();
+    </script>
+</body>
+</html>
+"""
+
+# Compiled once at startup instead of on every request
+main_page = app.jinja_env.from_string(MAIN_TEMPLATE)
+success_page = app.jinja_env.from_string(SUCCESS_TEMPLATE)
+provisioning_page = app.jinja_env.from_string(PROVISIONING_TEMPLATE)
+
+def render(template, **context):
+    """Render a precompiled template with the usual Flask template context."""
+    app.update_template_context(context)
+    return template.render(context)
+
+def load_static_assets():
+    """Read static files into memory along with a gzipped copy and ETag."""
+    assets = {}
+    for path in sorted(STATIC_DIR.iterdir()):
+        if not path.is_file():
+            continue
+        data = path.read_bytes()
+        assets[path.name] = {
+            'data': data,
+            'gzip': gzip.compress(data, compresslevel=9),
+            'etag': hashlib.sha256(data).hexdigest()[:16],
+            'mimetype': mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        }
+    return assets
+
+STATIC_ASSETS = load_static_assets()
+
+# Responses smaller than this aren't worth compressing
+GZIP_MIN_SIZE = 500
+GZIP_MIMETYPES = {'text/html', 'text/css', 'application/json', 'application/javascript'}
+
 def validate_username(username):
     """Validate username meets requirements."""
     if not username or len(username) < 3 or len(username) > 15:
@@ -361,65 +337,272 @@ def validate_password(password):
     
     return True, ""
 
-def check_user_exists(username):
-    """Check if username already exists on file server."""
+# Exit status create_user's remote command uses for "username taken"
+USER_EXISTS_EXIT = 17
+
+# Extra remote time budget per account in a bulk import
+BULK_SECONDS_PER_USER = 2
+MAX_IMPORT_ROWS = 500
+
+def run_remote(operation, command, ok_codes=(0,), **kwargs):
+    """Run a file server command, recording latency and failures for /metrics."""
+    start = time.perf_counter()
     try:
-        # SSH to file server and check
-        result = subprocess.run(
-            ['ssh', f'ansible@{FILE_SERVER_IP}', f'sudo pdbedit -L | grep -q "^{username}:"'],
-            capture_output=True,
-            timeout=5
-        )
-        return result.returncode == 0
-    except:
-        return False
+        result = file_server.run(command, **kwargs)
+    except Exception:
+        fileserver_failures.inc(operation=operation)
+        raise
+    finally:
+        fileserver_latency.observe(time.perf_counter() - start, operation=operation)
+    if result.returncode not in ok_codes:
+        fileserver_failures.inc(operation=operation)
+    return result
+
+def check_user_exists(username):
+    """Check if username is already taken (or being registered right now)."""
+    # The store covers accounts created by other worker processes since the
+    # last index resync
+    with username_check_latency.time():
+        return (username in usernames
+                or provisioning.is_pending(username)
+                or store.exists(username))
 
 def create_user(username, password, email, team=""):
     """Create user account on file server."""
     try:
-        # SSH to file server and run create-user script
-        cmd = f'sudo /usr/local/bin/create-user {username} {password}'
-        result = subprocess.run(
-            ['ssh', f'ansible@{FILE_SERVER_IP}', cmd],
-            capture_output=True,
-            timeout=10,
-            text=True
+        # Confirm the name is still free and run create-user in one round trip
+        cmd = (
+            f'sudo pdbedit -u {username} >/dev/null 2>&1 && exit {USER_EXISTS_EXIT}; '
+            f'sudo /usr/local/bin/create-user {username} {shlex.quote(password)}'
         )
+        result = run_remote('create_user', cmd, ok_codes=(0, USER_EXISTS_EXIT))
+        
+        if result.returncode == USER_EXISTS_EXIT:
+            usernames.add(username)
+            return False, "Username already taken. Please choose another."
         
         if result.returncode != 0:
             return False, f"Error creating account: {result.stderr}"
         
-        # Store email and team info (optional - could be in a database)
-        # For now, just log it
-        with open('/var/log/registration.log', 'a') as f:
-            f.write(f"{username},{email},{team}\n")
+        usernames.add(username)
+        record_registration(username, email, team)
         
         return True, "Account created successfully"
     
+    except FileServerError as e:
+        return False, f"File server unavailable: {str(e)}"
     except Exception as e:
         return False, f"Error: {str(e)}"
 
-def get_registered_count():
-    """Get count of registered users."""
+def record_registration(username, email, team=""):
+    """Store email and team info for a newly created account."""
+    store.record(username, email, team)
+
+# Reads "username<TAB>password" lines on stdin and creates each account,
+# printing "username<TAB>status[<TAB>message]" per line
+BULK_CREATE_SCRIPT = r"""
+while IFS=$'\t' read -r user pass; do
+    if sudo pdbedit -u "$user" >/dev/null 2>&1 </dev/null; then
+        printf '%s\texists\n' "$user"
+    elif out=$(sudo /usr/local/bin/create-user "$user" "$pass" 2>&1 </dev/null); then
+        printf '%s\tcreated\n' "$user"
+    else
+        printf '%s\tfailed\t%s\n' "$user" "$(printf '%s' "$out" | tail -n 1)"
+    fi
+done
+"""
+
+def create_users(players):
+    """
+    Create many accounts in one file server session.
+
+    players is a list of dicts with username, password, email and team.
+    Returns a dict mapping username to (status, message), where status is
+    'created', 'exists' or 'failed'.
+    """
+    if not players:
+        return {}
+    
+    batch = ''.join(f"{p['username']}\t{p['password']}\n" for p in players)
+    timeout = file_server.command_timeout + len(players) * BULK_SECONDS_PER_USER
     try:
-        result = subprocess.run(
-            ['ssh', f'ansible@{FILE_SERVER_IP}', 'sudo pdbedit -L | wc -l'],
-            capture_output=True,
-            timeout=5,
-            text=True
+        result = run_remote('bulk_create', f'bash -c {shlex.quote(BULK_CREATE_SCRIPT)}',
+                            timeout=timeout, input=batch)
+    except FileServerError as e:
+        return {p['username']: ('failed', f"File server unavailable: {str(e)}") for p in players}
+    except Exception as e:
+        return {p['username']: ('failed', f"Error: {str(e)}") for p in players}
+    
+    outcomes = {}
+    for line in result.stdout.splitlines():
+        fields = line.split('\t', 2)
+        if len(fields) >= 2:
+            outcomes[fields[0]] = (fields[1], fields[2] if len(fields) > 2 else '')
+    
+    results = {}
+    for player in players:
+        username = player['username']
+        status, message = outcomes.get(username, ('failed', result.stderr.strip() or 'No result from file server'))
+        if status == 'created':
+            usernames.add(username)
+            record_registration(username, player.get('email', ''), player.get('team', ''))
+            message = "Account created successfully"
+        elif status == 'exists':
+            usernames.add(username)
+            message = "Username already taken"
+        else:
+            message = f"Error creating account: {message}"
+        results[username] = (status, message)
+    
+    return results
+
+def get_registered_count():
+    """Get count of registered users from the file server."""
+    result = run_remote('count', 'sudo pdbedit -L | wc -l')
+    return int(result.stdout.strip())
+
+def list_usernames():
+    """Get every username on the file server in one bulk listing."""
+    result = run_remote('list_usernames', 'sudo pdbedit -L')
+    if result.returncode != 0:
+        raise FileServerError(f"pdbedit failed: {result.stderr.strip()}")
+    return [line.split(':', 1)[0] for line in result.stdout.splitlines() if line]
+
+# Served to page views and health checks; resynced in the background
+registered_count = RegisteredCountCache(
+    get_registered_count,
+    created_since=store.count_since,
+    ttl=REGISTRATION.get('count_ttl', 30)
+)
+usernames = UsernameIndex(
+    list_usernames,
+    resync_interval=REGISTRATION.get('username_resync_interval', 60)
+)
+
+# Background account creation, capped at the file server pool size
+provisioning = JobQueue(
+    create_user,
+    workers=REGISTRATION.get('provisioning_workers', file_server.size),
+    max_pending=REGISTRATION.get('provisioning_queue_size', 200),
+    store=store
+)
+metrics.gauge(
+    'registration_provisioning_queue_depth',
+    'Registrations waiting for a provisioning worker',
+    lambda: provisioning.depth
+)
+metrics.gauge(
+    'registration_provisioning_in_flight',
+    'Registrations currently being created on the file server',
+    lambda: provisioning.in_flight
+)
+metrics.gauge(
+    'registration_registered_players',
+    'Registered players (file server count plus registrations since resync)',
+    registered_count.get,
+    aggregate='max'
+)
+# serve.py passes the effective --graceful-timeout; gunicorn kills the
+# worker once it has passed, so the drain has to finish well before that
+GRACEFUL_TIMEOUT = float(
+    os.environ.get('REGISTRATION_GRACEFUL_TIMEOUT')
+    or (REGISTRATION.get('server') or {}).get('graceful_timeout', 30)
+)
+SHUTDOWN_MARGIN = 5
+
+def drain_on_exit():
+    """Commit queued registrations, finish provisioning jobs, then commit theirs."""
+    store.flush()
+    provisioning.shutdown(timeout=max(1.0, GRACEFUL_TIMEOUT - SHUTDOWN_MARGIN))
+    store.close()
+
+# Registered last, so it runs before file_server.close and store.close
+atexit.register(drain_on_exit)
+
+@app.context_processor
+def static_urls():
+    """Versioned asset URLs, so browsers can cache them indefinitely."""
+    return {'stylesheet_url': f"/static/registration.css?v={STATIC_ASSETS['registration.css']['etag']}"}
+
+def apply_config_change(old, new):
+    """Pick up config.yaml edits that are safe to apply while running."""
+    global ORG_NAME, FILE_SERVER_IP
+    ORG_NAME = new.organization.name
+    if new.network.file_server_ip != old.network.file_server_ip:
+        app.logger.info("File server changed from %s to %s",
+                        old.network.file_server_ip, new.network.file_server_ip)
+        FILE_SERVER_IP = new.network.file_server_ip
+        file_server.set_host(FILE_SERVER_IP)
+
+config_watcher.on_change(apply_config_change)
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    metrics.start()
+    config_watcher.current()
+
+# Registered before compress_response, so it runs after it and includes it
+@app.after_request
+def record_request_latency(response):
+    """Record per-route latency for /metrics."""
+    start = g.pop('request_start', None)
+    if start is not None:
+        request_latency.observe(
+            time.perf_counter() - start,
+            route=request.url_rule.rule if request.url_rule else 'unmatched',
+            method=request.method,
+            status=str(response.status_code)
         )
-        return int(result.stdout.strip())
-    except:
-        return 0
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Gzip text responses for clients that accept it."""
+    if (response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in GZIP_MIMETYPES
+            or 'gzip' not in request.accept_encodings):
+        return response
+    
+    data = response.get_data()
+    if len(data) < GZIP_MIN_SIZE:
+        return response
+    
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+@app.route('/static/<filename>')
+def static_asset(filename):
+    """Serve a static asset with long-lived cache headers and an ETag."""
+    asset = STATIC_ASSETS.get(filename)
+    if asset is None:
+        abort(404)
+    
+    if 'gzip' in request.accept_encodings:
+        response = Response(asset['gzip'], mimetype=asset['mimetype'])
+        response.headers['Content-Encoding'] = 'gzip'
+        response.set_etag(asset['etag'] + '-gz')
+    else:
+        response = Response(asset['data'], mimetype=asset['mimetype'])
+        response.set_etag(asset['etag'])
+    
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
 
 @app.route('/')
 def index():
     """Show registration form."""
-    registered_count = get_registered_count()
-    return render_template_string(
-        MAIN_TEMPLATE,
+    return render(
+        main_page,
         org_name=ORG_NAME,
-        registered_count=registered_count
+        registered_count=registered_count.get()
     )
 
 @app.route('/register', methods=['POST'])
@@ -453,25 +636,209 @@ def register():
         flash('Username already taken. Please choose another.', 'error')
         return redirect('/')
     
-    # Create user
-    success, msg = create_user(username, password, email, team)
+    # Queue account creation; the provisioning page polls for the result
+    try:
+        job_id = provisioning.submit(
+            key=username,
+            username=username,
+            password=password,
+            email=email,
+            team=team
+        )
+    except DuplicateJob:
+        flash('Username already taken. Please choose another.', 'error')
+        return redirect('/')
+    except QueueFull:
+        flash('Registration is very busy right now. Please try again in a minute.', 'error')
+        return redirect('/')
     
-    if not success:
-        flash(msg, 'error')
+    return render(
+        provisioning_page,
+        username=username,
+        job_id=job_id
+    )
+
+@app.route('/register/status/<job_id>')
+def register_status(job_id):
+    """Report the state of a queued registration."""
+    job = provisioning.status(job_id)
+    if job is None:
+        return {'state': 'unknown', 'message': 'Registration not found. Please try again.'}, 404
+    
+    response = {'state': job['state'], 'message': job['message']}
+    if 'position' in job:
+        response['position'] = job['position']
+    return response
+
+@app.route('/register/complete/<job_id>')
+def register_complete(job_id):
+    """Show the success page for a finished registration."""
+    job = provisioning.status(job_id)
+    if job is None or job['state'] != 'succeeded':
         return redirect('/')
     
     # Success!
-    return render_template_string(
-        SUCCESS_TEMPLATE,
-        username=username,
-        email=email
+    return render(
+        success_page,
+        username=job['params']['username'],
+        email=job['params']['email']
+    )
+
+@app.route('/api/username-available')
+def username_available():
+    """Check a username against the local index as the player types."""
+    username = request.args.get('username', '').lower().strip()
+    
+    valid, msg = validate_username(username)
+    if not valid:
+        return {'username': username, 'available': False, 'message': msg}
+    
+    if check_user_exists(username):
+        return {'username': username, 'available': False, 'message': 'Username already taken'}
+    
+    return {'username': username, 'available': True, 'message': 'Username available'}
+
+def staff_required(view):
+    """Require HTTP basic auth with registration.staff_password."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        staff_password = REGISTRATION.get('staff_password')
+        if not staff_password:
+            return {'error': 'Staff access is disabled (set registration.staff_password)'}, 403
+        auth = request.authorization
+        if not auth or not secrets.compare_digest(auth.password or '', str(staff_password)):
+            return ({'error': 'Staff login required'}, 401,
+                    {'WWW-Authenticate': 'Basic realm="Registration staff"'})
+        return view(*args, **kwargs)
+    return wrapper
+
+def parse_roster():
+    """Read roster rows from an uploaded CSV file or a JSON body."""
+    if request.is_json:
+        data = request.get_json()
+        rows = data.get('players', []) if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            raise ValueError("JSON body must be a list of players or {\"players\": [...]}")
+        return rows
+    
+    upload = request.files.get('roster')
+    if upload is None:
+        raise ValueError("Upload a CSV file as 'roster' or POST JSON")
+    text = io.TextIOWrapper(upload.stream, encoding='utf-8-sig')
+    return list(csv.DictReader(text))
+
+@app.route('/staff/import', methods=['POST'])
+@staff_required
+def bulk_import():
+    """Create accounts for a whole team/school roster at once."""
+    try:
+        rows = parse_roster()
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        return {'error': str(e)}, 400
+    
+    if len(rows) > MAX_IMPORT_ROWS:
+        return {'error': f"Roster has {len(rows)} rows; the limit is {MAX_IMPORT_ROWS}"}, 400
+    
+    report = []
+    players = []
+    seen = set()
+    
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            report.append({'row': number, 'username': '', 'status': 'invalid',
+                           'message': 'Row must be an object'})
+            continue
+        
+        username = str(row.get('username') or '').lower().strip()
+        password = str(row.get('password') or '')
+        entry = {'row': number, 'username': username}
+        report.append(entry)
+        
+        valid, msg = validate_username(username)
+        if valid:
+            valid, msg = validate_password(password)
+        if valid and any(c in password for c in '\t\r\n'):
+            valid, msg = False, "Password cannot contain tabs or line breaks"
+        if not valid:
+            entry.update(status='invalid', message=msg)
+        elif username in seen:
+            entry.update(status='duplicate', message='Username appears earlier in this roster')
+        elif check_user_exists(username):
+            entry.update(status='exists', message='Username already taken')
+        else:
+            seen.add(username)
+            players.append({
+                'username': username,
+                'password': password,
+                'email': str(row.get('email') or '').strip(),
+                'team': str(row.get('team') or '').strip()
+            })
+    
+    results = create_users(players)
+    for entry in report:
+        if 'status' not in entry:
+            entry['status'], entry['message'] = results[entry['username']]
+    
+    summary = {}
+    for entry in report:
+        summary[entry['status']] = summary.get(entry['status'], 0) + 1
+    
+    return {'summary': summary, 'results': report}
+
+@app.route('/staff/registrations')
+@staff_required
+def search_registrations():
+    """Search registrations by username/email prefix, email or team."""
+    try:
+        limit = min(int(request.args.get('limit', 100)), 1000)
+    except ValueError:
+        return {'error': 'limit must be a number'}, 400
+    
+    results = store.search(
+        query=request.args.get('q', '').strip(),
+        email=request.args.get('email'),
+        team=request.args.get('team'),
+        limit=limit
     )
+    return {'count': len(results), 'results': results}
+
+@app.route('/staff/registrations/teams')
+@staff_required
+def team_counts():
+    """Players registered per team/school."""
+    return {'total': store.count(), 'teams': store.team_counts()}
+
+@app.route('/staff/registrations/<username>')
+@staff_required
+def get_registration(username):
+    """Look up a single registration."""
+    registration = store.get(username)
+    if registration is None:
+        return {'error': f"No registration for {username}"}, 404
+    return registration
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/health')
 def health():
     """Health check endpoint."""
-    return {'status': 'ok', 'registered': get_registered_count()}
+    return {'status': 'ok', 'registered': registered_count.get()}
+
+def seed_caches():
+    """
+    Load the username index and registered count from the file server
+    before taking traffic, so a worker's first availability check doesn't
+    see an empty index. If the file server is unreachable, requests are
+    served anyway and the background threads keep retrying.
+    """
+    usernames.seed()
+    registered_count.seed()
 
 if __name__ == '__main__':
+    seed_caches()
+    
     # Run on all interfaces so it's accessible from network
     app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Boot Wave Orchestrator for High School Esports LAN Infrastructure
+
+Powers on the fleet in waves instead of all at once. Waking 200 machines
+together floods DHCP, TFTP/nginx (boot.wim) and then the file server
+(roaming profiles); waking them one by one wastes the morning.
+
+- MACs come from config/mac-addresses.yaml, so machines that are powered
+  off (and missing from the ARP cache) can still be woken
+- Magic packets go out over a UDP broadcast socket, a wave at a time
+- The next wave is admitted only when the boot servers have headroom:
+  the iPXE nginx request rate (tailed from its access log) is below
+  --max-rate and fewer than --max-booting machines are still booting
+- Each machine is tracked through a new DHCP lease, first iPXE request
+  and "up" (accepting connections on --ready-port), and the run ends with
+  time-to-boot per wave. Machines already up before the first wave are
+  skipped, so they don't count as instant boots
+
+Run on the iPXE server, where the dnsmasq leases and nginx log live.
+
+Usage:
+    python3 boot_waves.py --dry-run
+    python3 boot_waves.py --wave-size 20 --max-booting 60
+    python3 boot_waves.py --cluster gryffindor --max-rate 40 --json boot-report.json
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import os
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from config_loader import Config, load_config
+from fleet_controller import LEASES_FILE, Host, Inventory, probe, resolve_targets, send_magic_packets
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+NGINX_ACCESS_LOG = Path('/var/log/nginx/access.log')
+
+RATE_WINDOW = 10.0  # seconds of nginx requests the rate is measured over
+PERCENTILES = (50, 90, 100)
+
+
+class Boot:
+    """One machine's progress from magic packet to login screen."""
+
+    def __init__(self, host: Host, wave: int):
+        self.host = host
+        self.wave = wave
+        self.ip = host.ip
+        self.woken: Optional[float] = None
+        self.old_lease: Optional[str] = None  # lease expiry when woken
+        self.dhcp: Optional[float] = None
+        self.pxe: Optional[float] = None
+        self.up: Optional[float] = None
+        self.failed = False
+
+    @property
+    def booting(self) -> bool:
+        return self.woken is not None and self.up is None and not self.failed
+
+    def seconds(self, stage: str) -> Optional[float]:
+        at = getattr(self, stage)
+        return at - self.woken if at is not None and self.woken is not None else None
+
+
+class LogTail:
+    """New lines of the nginx access log since the last read (handles rotation)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.inode = None
+        self.offset = 0
+        try:
+            stat = path.stat()
+            self.inode, self.offset = stat.st_ino, stat.st_size  # only requests from now on
+        except OSError:
+            pass
+
+    def read(self) -> List[str]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return []
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.inode, self.offset = stat.st_ino, 0
+        if stat.st_size == self.offset:
+            return []
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(stat.st_size - self.offset)
+        end = data.rfind(b'\n') + 1
+        self.offset += end
+        return data[:end].decode(errors='replace').splitlines()
+
+
+class Orchestrator:
+    """Wakes machines wave by wave, pacing on server load."""
+
+    def __init__(self, hosts: List[Host], inventory: Inventory, broadcast: str,
+                 wave_size: int = 20, max_booting: int = 60, max_rate: Optional[float] = None,
+                 min_gap: float = 15.0, boot_timeout: float = 600.0, ready_port: int = 22,
+                 access_log: Path = NGINX_ACCESS_LOG, leases: Path = LEASES_FILE):
+        self.waves: List[List[Boot]] = [
+            [Boot(host, n) for host in hosts[i:i + wave_size]]
+            for n, i in enumerate(range(0, len(hosts), wave_size))
+        ]
+        self.inventory = inventory
+        self.broadcast = broadcast
+        self.max_booting = max_booting
+        self.max_rate = max_rate
+        self.min_gap = min_gap
+        self.boot_timeout = boot_timeout
+        self.ready_port = ready_port
+        self.log = LogTail(access_log)
+        self.leases = leases
+        self.requests: Deque[float] = deque()
+        self.wave_sent: List[float] = []
+        self.started = 0.0
+
+    @property
+    def boots(self) -> List[Boot]:
+        return [boot for wave in self.waves for boot in wave]
+
+    def rate(self, now: float) -> float:
+        while self.requests and self.requests[0] < now - RATE_WINDOW:
+            self.requests.popleft()
+        return len(self.requests) / RATE_WINDOW
+
+    def _observe(self, now: float) -> None:
+        """Update each machine's stage from the leases, nginx log and probes."""
+        self.inventory.reload_leases(self.leases)
+        by_ip: Dict[str, Boot] = {}
+        for boot in self.boots:
+            if not boot.booting:
+                continue
+            mac = boot.host.mac
+            lease = self.inventory.lease_expiry.get(mac)
+            if boot.dhcp is None and lease is not None and lease != boot.old_lease:
+                boot.dhcp, boot.ip = now, self.inventory.ip_of[mac]
+            # The IP known before the wake may be stale or held by another
+            # machine; only trust the one from this boot's DHCP lease
+            if boot.dhcp is not None:
+                by_ip[boot.ip] = boot
+            if now - boot.woken > self.boot_timeout:
+                boot.failed = True
+
+        for line in self.log.read():
+            self.requests.append(now)
+            boot = by_ip.get(line.split(' ', 1)[0])
+            if boot and boot.pxe is None and '/boot.ipxe' in line:
+                boot.pxe = now
+
+        probing = [boot for boot in by_ip.values() if boot.booting]
+        if probing:
+            results = asyncio.run(self._probe_all([boot.ip for boot in probing]))
+            for boot, up in zip(probing, results):
+                if up:
+                    boot.up = now
+
+    async def _probe_all(self, ips: List[str]) -> List[bool]:
+        return await asyncio.gather(*(probe(ip, 0.5, self.ready_port) for ip in ips))
+
+    def _admit(self, now: float) -> Optional[str]:
+        """None if the next wave may go, otherwise what it is waiting for."""
+        if self.wave_sent and now - self.wave_sent[-1] < self.min_gap:
+            return 'minimum gap'
+        booting = sum(boot.booting for boot in self.boots)
+        if booting + len(self.waves[len(self.wave_sent)]) > max(self.max_booting, len(self.waves[0])):
+            return f'{booting} still booting'
+        if self.max_rate is not None and self.rate(now) > self.max_rate:
+            return f'nginx at {self.rate(now):.0f} req/s'
+        return None
+
+    def _send_wave(self, now: float) -> None:
+        wave = self.waves[len(self.wave_sent)]
+        send_magic_packets([boot.host.mac for boot in wave], self.broadcast)
+        for boot in wave:
+            boot.woken = now
+            boot.old_lease = self.inventory.lease_expiry.get(boot.host.mac)
+        self.wave_sent.append(now)
+        print(f"[{now - self.started:6.0f}s] 🔌 Wave {len(self.wave_sent)}/{len(self.waves)}: "
+              f"woke {len(wave)} machine(s)")
+
+    def run(self, interval: float = 2.0) -> None:
+        self.started = time.monotonic()
+        last_status = None
+        while True:
+            now = time.monotonic()
+            self._observe(now)
+            if len(self.wave_sent) < len(self.waves):
+                waiting = self._admit(now)
+                if waiting is None:
+                    self._send_wave(now)
+                elif waiting != last_status:
+                    print(f"[{now - self.started:6.0f}s] ⏳ Wave {len(self.wave_sent) + 1} waiting: {waiting}")
+                last_status = waiting
+            elif not any(boot.booting for boot in self.boots):
+                break
+            time.sleep(interval)
+
+
+def already_up(hosts: List[Host], port: int, timeout: float = 1.0) -> List[Host]:
+    """Hosts with a known IP that already answer on port (powered on before the run)."""
+    known = [host for host in hosts if host.ip]
+
+    async def probe_all():
+        return await asyncio.gather(*(probe(host.ip, timeout, port) for host in known))
+
+    return [host for host, up in zip(known, asyncio.run(probe_all()) if known else []) if up]
+
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def wave_report(orchestrator: Orchestrator) -> List[Dict]:
+    rows = []
+    for n, wave in enumerate(orchestrator.waves):
+        row = {
+            'wave': n + 1,
+            'machines': len(wave),
+            'sent_at': (orchestrator.wave_sent[n] - orchestrator.started) if n < len(orchestrator.wave_sent) else None,
+            'booted': sum(boot.up is not None for boot in wave),
+            'failed': [boot.host.label for boot in wave if boot.failed],
+        }
+        for stage in ('dhcp', 'pxe', 'up'):
+            times = [t for t in (boot.seconds(stage) for boot in wave) if t is not None]
+            row[stage] = {f'p{p}' if p < 100 else 'max': percentile(times, p) for p in PERCENTILES}
+        rows.append(row)
+    return rows
+
+
+def format_seconds(value: Optional[float]) -> str:
+    return '-' if value is None else f"{value:.0f}s"
+
+
+def print_report(rows: List[Dict], elapsed: float) -> None:
+    print("\nBoot Waves")
+    print("=" * 60)
+    print(f"  {'Wave':>4} {'Sent':>6} {'Up':>7}  {'DHCP p50':>8} {'iPXE p50':>8} "
+          f"{'Up p50':>7} {'Up p90':>7} {'Up max':>7}")
+    for row in rows:
+        print(f"  {row['wave']:>4} {format_seconds(row['sent_at']):>6} {row['booted']:>3}/{row['machines']:<3}  "
+              f"{format_seconds(row['dhcp']['p50']):>8} {format_seconds(row['pxe']['p50']):>8} "
+              f"{format_seconds(row['up']['p50']):>7} {format_seconds(row['up']['p90']):>7} "
+              f"{format_seconds(row['up']['max']):>7}")
+    failed = [name for row in rows for name in row['failed']]
+    total = sum(row['machines'] for row in rows)
+    print(f"\n{total - len(failed)}/{total} machine(s) up in {elapsed / 60:.1f} minutes")
+    if failed:
+        print(f"❌ Not up before the timeout: {', '.join(failed)}")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Wake the fleet in waves paced by boot server load')
+    parser.add_argument('--config', default=os.environ.get('ESPORTS_CONFIG', PROJECT_ROOT / 'config.yaml'),
+                        help='Path to config.yaml')
+    parser.add_argument('--cluster', help='Only machines in this config/clusters.yaml cluster')
+    parser.add_argument('--wave-size', type=int, default=20, help='Machines per wave (default: 20)')
+    parser.add_argument('--max-booting', type=int, default=60,
+                        help='Machines allowed to be booting at once (default: 60)')
+    parser.add_argument('--max-rate', type=float,
+                        help='Hold waves while nginx serves more requests/s than this')
+    parser.add_argument('--min-gap', type=float, default=15, help='Seconds between waves (default: 15)')
+    parser.add_argument('--boot-timeout', type=float, default=600,
+                        help='Seconds before a machine counts as failed (default: 600)')
+    parser.add_argument('--ready-port', type=int, default=22,
+                        help='Port a booted machine answers on (default: 22, SSH)')
+    parser.add_argument('--access-log', default=str(NGINX_ACCESS_LOG),
+                        help=f'iPXE nginx access log (default: {NGINX_ACCESS_LOG})')
+    parser.add_argument('--leases', default=str(LEASES_FILE), help=f'dnsmasq lease file (default: {LEASES_FILE})')
+    parser.add_argument('--dry-run', action='store_true', help='Show the waves without waking anything')
+    parser.add_argument('--json', metavar='FILE', help="Write the per-wave report as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    config_path = Path(args.config)
+    try:
+        config = load_config(config_path) if config_path.exists() else Config({}, config_path)
+        inventory = Inventory(config_path.parent, Path(args.leases))
+        hosts = resolve_targets('cluster', args.cluster, config, inventory) if args.cluster else inventory.all_named()
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    missing = [host.label for host in hosts if not host.mac]
+    hosts = [host for host in hosts if host.mac]
+    if missing:
+        print(f"⚠️  No MAC address for: {', '.join(missing)}")
+    if not hosts:
+        print("❌ No machines with MAC addresses (add them to config/mac-addresses.yaml)", file=sys.stderr)
+        sys.exit(1)
+
+    # A machine that is already on would count as booted in ~0s and skew the report
+    running = already_up(hosts, args.ready_port)
+    if running:
+        print(f"⚠️  Already up, skipping: {', '.join(host.label for host in running)}")
+        hosts = [host for host in hosts if host not in running]
+        if not hosts:
+            print("✅ Every machine is already up")
+            return
+
+    broadcast = str(ipaddress.ip_network(config.network.subnet, strict=False).broadcast_address)
+    orchestrator = Orchestrator(
+        hosts, inventory, broadcast, wave_size=args.wave_size, max_booting=args.max_booting,
+        max_rate=args.max_rate, min_gap=args.min_gap, boot_timeout=args.boot_timeout,
+        ready_port=args.ready_port, access_log=Path(args.access_log), leases=Path(args.leases),
+    )
+
+    print(f"Machines: {len(hosts)} in {len(orchestrator.waves)} wave(s) of up to {args.wave_size}")
+    if args.dry_run:
+        for n, wave in enumerate(orchestrator.waves, 1):
+            print(f"  Wave {n}: {', '.join(boot.host.name or boot.host.mac for boot in wave)}")
+        return
+    if not Path(args.access_log).exists():
+        print(f"⚠️  {args.access_log} not found; pacing on booting machines only")
+
+    try:
+        orchestrator.run()
+    except KeyboardInterrupt:
+        print("\nStopped; machines already woken keep booting")
+    except OSError as e:
+        print(f"❌ Could not send magic packets: {e}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = time.monotonic() - orchestrator.started
+    rows = wave_report(orchestrator)
+
+    if args.json:
+        payload = json.dumps({'elapsed_seconds': elapsed, 'waves': rows}, indent=2)
+        if args.json == '-':
+            print(payload)
+            return
+        Path(args.json).write_text(payload + '\n')
+    print_report(rows, elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -55,17 +55,17 @@ echo ""
 log_info "Validating Proxmox configuration..."
 
 # Check Proxmox settings
-python3 - "$CONFIG_FILE" <<'PYTHON_CHECK'
+python3 - "$CONFIG_FILE" "$SCRIPT_DIR" <<'PYTHON_CHECK'
 import sys
-import yaml
 
 config_file = sys.argv[1]
+sys.path.insert(0, sys.argv[2])
+from config_loader import load_yaml
 errors = 0
 warnings = 0
 
 try:
-    with open(config_file, 'r') as f:
-        config = yaml.safe_load(f) or {}
+    config = load_yaml(config_file) or {}
 except Exception as e:
     print(f"✗ Failed to parse YAML: {e}")
     sys.exit(1)
@@ -139,16 +139,16 @@ fi
 echo ""
 log_info "Validating network configuration..."
 
-python3 - "$CONFIG_FILE" <<'PYTHON_CHECK'
+python3 - "$CONFIG_FILE" "$SCRIPT_DIR" <<'PYTHON_CHECK'
 import sys
-import yaml
 
 config_file = sys.argv[1]
+sys.path.insert(0, sys.argv[2])
+from config_loader import load_yaml
 errors = 0
 
 try:
-    with open(config_file, 'r') as f:
-        config = yaml.safe_load(f) or {}
+    config = load_yaml(config_file) or {}
 except:
     sys.exit(1)
 
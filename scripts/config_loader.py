@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Shared Configuration Loader for High School Esports LAN Infrastructure
+
+One place for every Python tool to read config.yaml (and other YAML files
+such as config/mac-addresses.yaml):
+
+- Parses with libyaml's C loader when PyYAML was built with it
+- Caches parsed files in memory (keyed on mtime/size) and on disk (one
+  owner-only entry per file, checked against its content hash), so repeated
+  loads and separate tool invocations skip the parse entirely
+- Exposes typed, lazily built section accessors (config.network, ...)
+- Supports hot reload: ConfigWatcher notices a changed file and notifies
+  listeners without restarting the process
+
+Usage:
+    from config_loader import load_config
+    config = load_config('config.yaml')
+    print(config.network.file_server_ip)
+"""
+
+import hashlib
+import marshal
+import os
+import threading
+import time
+from dataclasses import dataclass, field, fields
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CONFIG = PROJECT_ROOT / "config.yaml"
+
+# libyaml is 10-20x faster than the pure-Python loader
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'esports-lan' / 'yaml'
+
+_memory_cache: Dict[Path, tuple] = {}
+_memory_lock = threading.Lock()
+
+
+def _disk_cache_path(path: Path) -> Path:
+    # One entry per source file, so an edited config replaces its old parse
+    # instead of leaving every earlier version (and its secrets) behind
+    return CACHE_DIR / f'{hashlib.sha256(str(path).encode()).hexdigest()}.marshal'
+
+
+def _read_disk_cache(path: Path, digest: str):
+    try:
+        with open(_disk_cache_path(path), 'rb') as f:
+            cached_digest, data = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return False, None
+    if cached_digest != digest:
+        return False, None
+    return True, data
+
+
+def _write_disk_cache(path: Path, digest: str, data) -> None:
+    # marshal can't serialize every YAML type (e.g. dates); skip those files.
+    # Unlike pickle, loading marshal data never runs code.
+    try:
+        payload = marshal.dumps((digest, data))
+    except ValueError:
+        return
+    target = _disk_cache_path(path)
+    tmp = target.with_suffix(f'.{os.getpid()}.tmp')
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True, mode=0o700)
+        # The config holds passwords: readable by the owner only, whatever the umask
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp, target)
+    except OSError:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def load_yaml(path, use_cache: bool = True):
+    """
+    Parse a YAML file, reusing a cached parse when the file hasn't changed.
+
+    Raises FileNotFoundError and yaml.YAMLError like yaml.safe_load would.
+    Callers must not mutate the returned data when use_cache is True.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+
+    if use_cache:
+        with _memory_lock:
+            cached = _memory_cache.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+    raw = path.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+
+    found, data = _read_disk_cache(path, digest) if use_cache else (False, None)
+    if not found:
+        data = yaml.load(raw, Loader=SafeLoader)
+        if use_cache:
+            _write_disk_cache(path, digest, data)
+
+    if use_cache:
+        with _memory_lock:
+            _memory_cache[path] = (stamp, data)
+    return data
+
+
+def _build(cls, data):
+    """Build a settings dataclass from a dict, ignoring unknown keys."""
+    data = data if isinstance(data, dict) else {}
+    names = {f.name for f in fields(cls)}
+    return cls(**{k: v for k, v in data.items() if k in names})
+
+
+@dataclass(frozen=True)
+class OrganizationSettings:
+    name: str = "Esports Tournament"
+    short_name: str = ""
+    contact_email: str = ""
+
+
+@dataclass(frozen=True)
+class NetworkSettings:
+    ipxe_server_ip: str = "192.168.1.10"
+    lancache_server_ip: str = "192.168.1.11"
+    file_server_ip: str = "192.168.1.12"
+    subnet: str = "192.168.1.0/24"
+    gateway: str = "192.168.1.1"
+    dns_primary: str = "8.8.8.8"
+    dns_secondary: str = "8.8.4.4"
+    dhcp_range_start: str = "192.168.1.100"
+    dhcp_range_end: str = "192.168.1.254"
+    expected_clients: int = 200
+    vlan_id: Optional[int] = None
+    proxmox_ip: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class GamesSettings:
+    enabled: List[str] = field(default_factory=list)
+    clients: Dict[str, Any] = field(default_factory=dict)
+
+
+class Config:
+    """Parsed configuration with typed, lazily built section accessors."""
+
+    def __init__(self, data, path=None):
+        self.raw = data if isinstance(data, dict) else {}
+        self.path = Path(path) if path else None
+
+    def section(self, name: str) -> Dict[str, Any]:
+        """A top-level section as a dict (empty if missing or null)."""
+        value = self.raw.get(name)
+        return value if isinstance(value, dict) else {}
+
+    def get(self, dotted: str, default=None):
+        """Look up a nested value by dotted path, e.g. 'advanced.pxe.timeout_seconds'."""
+        node = self.raw
+        for part in dotted.split('.'):
+            if not isinstance(node, dict) or part not in node:
+                return default
+            node = node[part]
+        return node
+
+    @cached_property
+    def organization(self) -> OrganizationSettings:
+        return _build(OrganizationSettings, self.raw.get('organization'))
+
+    @cached_property
+    def network(self) -> NetworkSettings:
+        return _build(NetworkSettings, self.raw.get('network'))
+
+    @cached_property
+    def games(self) -> GamesSettings:
+        return _build(GamesSettings, self.raw.get('games'))
+
+    @property
+    def vms(self) -> Dict[str, Any]:
+        return self.section('vms')
+
+    @property
+    def registration(self) -> Dict[str, Any]:
+        return self.section('registration')
+
+    @property
+    def advanced(self) -> Dict[str, Any]:
+        return self.section('advanced')
+
+
+def load_config(path=None, use_cache: bool = True) -> Config:
+    """Load config.yaml (or another config file) through the shared cache."""
+    path = Path(path) if path else DEFAULT_CONFIG
+    return Config(load_yaml(path, use_cache=use_cache), path)
+
+
+class ConfigWatcher:
+    """
+    Hot-reloading handle on a config file.
+
+    current() returns the latest Config, re-checking the file's mtime at most
+    every check_interval seconds; listeners registered with on_change() are
+    called with (old, new) whenever the content changes.
+    """
+
+    def __init__(self, path=None, check_interval: float = 2.0, default=None):
+        """default is returned by current() when the file can't be loaded."""
+        self.path = Path(path) if path else DEFAULT_CONFIG
+        self.check_interval = check_interval
+        self.error: Optional[Exception] = None
+        self._default = default if default is not None else Config({})
+        self._listeners: List[Callable[[Config, Config], None]] = []
+        self._lock = threading.Lock()
+        self._config = self._load() or self._default
+        self._checked_at = time.monotonic()
+
+    def _load(self) -> Optional[Config]:
+        try:
+            config = load_config(self.path)
+        except (OSError, yaml.YAMLError) as e:
+            self.error = e
+            return None
+        self.error = None
+        return config
+
+    def on_change(self, listener: Callable[[Config, Config], None]) -> None:
+        self._listeners.append(listener)
+
+    def current(self) -> Config:
+        """The latest successfully loaded Config."""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._config
+        with self._lock:
+            if now - self._checked_at < self.check_interval:
+                return self._config
+            self._checked_at = now
+            new = self._load()
+            # A broken edit keeps the last good config
+            if new is None or new.raw is self._config.raw or new.raw == self._config.raw:
+                return self._config
+            old, self._config = self._config, new
+        for listener in self._listeners:
+            listener(old, new)
+        return new
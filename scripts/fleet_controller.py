@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Fleet Controller for High School Esports LAN Infrastructure
+
+Remote power and session management for tournament machines. Every target
+is probed and commanded concurrently (asyncio), with a limit on parallel
+SSH sessions and a timeout per host, so "lock all 200 stations" takes
+seconds instead of minutes. Finishes with a per-host result summary.
+
+Actions:  shutdown, reboot, lock, wol, disable
+Targets:  all                  DHCP range from config.yaml
+          cluster NAME         config/clusters.yaml (IPs or machine names)
+          range START-END      e.g. 100-150 (last octet) or full IPs
+          ip IP_ADDRESS
+          machine NAME         config/mac-addresses.yaml name
+
+Machine names are resolved MAC -> IP through the dnsmasq lease file (on the
+iPXE server) or the ARP cache. Wake-on-LAN sends magic packets directly
+over UDP, so no wakeonlan/etherwake install is needed.
+
+Usage:
+    python3 fleet_controller.py --action lock --target all --confirm
+    python3 fleet_controller.py --action reboot --target machine ENTERPRISE
+    python3 fleet_controller.py --action wol --target cluster gryffindor
+    python3 fleet_controller.py --action shutdown --target range 100-120 --dry-run
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import json
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from config_loader import Config, load_config, load_yaml
+from network_conflicts import MAC_ADDRESSES_FILE, load_mac_mappings, parse_mac
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CLUSTERS_FILE = 'config/clusters.yaml'  # relative to the directory holding config.yaml
+LEASES_FILE = Path('/var/lib/misc/dnsmasq.leases')
+ARP_TABLE = Path('/proc/net/arp')
+
+# Remote commands for Windows clients (OpenSSH server)
+COMMANDS = {
+    'shutdown': 'shutdown /s /t 10',
+    'reboot': 'shutdown /r /t 10',
+    'lock': 'rundll32.exe user32.dll,LockWorkStation',
+    'disable': 'powershell.exe -Command "Disable-NetAdapter -Name \'Ethernet\' -Confirm:$false"',
+}
+ACTIONS = list(COMMANDS) + ['wol']
+
+SSH_PORT = 22
+WOL_PORT = 9
+
+
+class Host(NamedTuple):
+    ip: Optional[str]
+    name: str = ''
+    mac: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.name} ({self.ip})" if self.name and self.ip else self.name or self.ip or '?'
+
+
+class HostResult(NamedTuple):
+    host: Host
+    status: str  # 'ok', 'failed', 'offline' or 'dry-run'
+    detail: str
+    seconds: float
+
+
+class Inventory:
+    """Machine names, MACs and current IPs from the config files and DHCP leases."""
+
+    def __init__(self, config_dir: Path, leases: Path = LEASES_FILE):
+        self.config_dir = config_dir
+        self.by_name: Dict[str, str] = {}  # upper-case name -> MAC
+        self.names: Dict[str, str] = {}  # MAC -> name
+        mac_file = config_dir / MAC_ADDRESSES_FILE
+        if mac_file.exists():
+            for entry in load_mac_mappings(mac_file):
+                try:
+                    mac = format_mac(entry.mac)
+                except ValueError:
+                    continue  # reported by validate_config.py
+                self.by_name[entry.name.upper()] = mac
+                self.names[mac] = entry.name
+
+        self.reload_leases(leases)
+
+    def reload_leases(self, leases: Path = LEASES_FILE) -> None:
+        """MAC <-> IP from dnsmasq leases ("expiry mac ip hostname client-id") and ARP."""
+        self.ip_of: Dict[str, str] = {}
+        self.mac_of: Dict[str, str] = {}
+        self.lease_expiry: Dict[str, str] = {}  # MAC -> expiry; changes when a lease is renewed
+        for line in _read_lines(ARP_TABLE)[1:]:
+            fields = line.split()
+            if len(fields) >= 4 and fields[3] != '00:00:00:00:00:00':
+                self._learn(fields[3], fields[0])
+        for line in _read_lines(leases):
+            fields = line.split()
+            if len(fields) >= 3:
+                mac = self._learn(fields[1], fields[2])
+                if mac:
+                    self.lease_expiry[mac] = fields[0]
+
+    def _learn(self, mac: str, ip: str) -> Optional[str]:
+        try:
+            mac = format_mac(mac)
+        except ValueError:
+            return None
+        self.ip_of[mac] = ip
+        self.mac_of[ip] = mac
+        return mac
+
+    def host_for_ip(self, ip: str) -> Host:
+        mac = self.mac_of.get(ip)
+        return Host(ip, self.names.get(mac, ''), mac)
+
+    def host_for_name(self, name: str) -> Host:
+        """Raises KeyError for unknown names."""
+        mac = self.by_name[name.upper()]
+        return Host(self.ip_of.get(mac), self.names[mac], mac)
+
+    def all_named(self) -> List[Host]:
+        return [Host(self.ip_of.get(mac), name, mac) for mac, name in self.names.items()]
+
+
+def _read_lines(path: Path) -> List[str]:
+    try:
+        return path.read_text().splitlines()
+    except OSError:
+        return []
+
+
+def format_mac(text: str) -> str:
+    """Normalize a MAC to aa:bb:cc:dd:ee:ff. Raises ValueError."""
+    value = parse_mac(text)
+    return ':'.join(f"{(value >> shift) & 0xff:02x}" for shift in range(40, -8, -8))
+
+
+def ip_range(start: str, end: str) -> List[str]:
+    first, last = int(ipaddress.ip_address(start)), int(ipaddress.ip_address(end))
+    if last < first:
+        raise ValueError(f"range {start}-{end} is empty")
+    return [str(ipaddress.ip_address(i)) for i in range(first, last + 1)]
+
+
+def resolve_targets(target: str, value: Optional[str], config, inventory: Inventory) -> List[Host]:
+    """Hosts for a --target; raises ValueError for bad or unknown targets."""
+    network = config.network
+    if target == 'all':
+        return [inventory.host_for_ip(ip) for ip in ip_range(network.dhcp_range_start, network.dhcp_range_end)]
+    if not value:
+        raise ValueError(f"--target {target} needs a value")
+
+    if target == 'ip':
+        ipaddress.ip_address(value)
+        return [inventory.host_for_ip(value)]
+
+    if target == 'range':
+        parts = [part.strip() for part in value.split('-')]
+        if len(parts) != 2 or not all(parts):
+            raise ValueError(f"invalid range '{value}': expected START-END, "
+                             "e.g. 100-150 or 192.168.1.100-192.168.1.150")
+        start, end = parts
+        # A bare last octet takes the rest of the address from the DHCP range or START
+        if '.' not in start:
+            start = f"{network.dhcp_range_start.rsplit('.', 1)[0]}.{start}"
+        if '.' not in end:
+            end = f"{start.rsplit('.', 1)[0]}.{end}"
+        for address in (start, end):
+            try:
+                ipaddress.IPv4Address(address)
+            except ValueError:
+                raise ValueError(f"invalid range '{value}': {address} is not an IPv4 address") from None
+        return [inventory.host_for_ip(ip) for ip in ip_range(start, end)]
+
+    if target == 'machine':
+        try:
+            return [inventory.host_for_name(value)]
+        except KeyError:
+            pass
+        try:
+            ipaddress.ip_address(value)
+            return [inventory.host_for_ip(value)]
+        except ValueError:
+            raise ValueError(f"unknown machine '{value}' (not in {MAC_ADDRESSES_FILE})") from None
+
+    if target == 'cluster':
+        path = inventory.config_dir / CLUSTERS_FILE
+        if not path.exists():
+            raise ValueError(f"clusters file not found: {path}")
+        clusters = load_yaml(path) or {}
+        if value not in clusters:
+            known = ', '.join(sorted(map(str, clusters))) or 'none'
+            raise ValueError(f"unknown cluster '{value}' (defined: {known})")
+        hosts = []
+        for member in clusters[value] or []:
+            member = str(member)
+            try:
+                ipaddress.ip_address(member)
+                hosts.append(inventory.host_for_ip(member))
+            except ValueError:
+                try:
+                    hosts.append(inventory.host_for_name(member))
+                except KeyError:
+                    raise ValueError(f"cluster '{value}': unknown machine '{member}'") from None
+        return hosts
+
+    raise ValueError(f"invalid target: {target}")
+
+
+def wake_targets(hosts: List[Host], inventory: Inventory) -> List[Host]:
+    """Hosts to wake for --target all, plus every machine with a named MAC."""
+    # Machines that are off have no ARP entry, so their IPs resolve to no MAC
+    known = {host.mac for host in hosts}
+    return [host for host in hosts if host.mac] + [
+        host for host in inventory.all_named() if host.mac not in known
+    ]
+
+
+def magic_packet(mac: str) -> bytes:
+    return b'\xff' * 6 + bytes.fromhex(format_mac(mac).replace(':', '')) * 16
+
+
+def send_magic_packets(macs: Iterable[str], broadcast: str, port: int = WOL_PORT) -> None:
+    """Wake-on-LAN: one UDP broadcast per MAC. Raises OSError or ValueError."""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        for mac in macs:
+            sock.sendto(magic_packet(mac), (broadcast, port))
+
+
+async def probe(ip: str, timeout: float, port: int = SSH_PORT) -> bool:
+    """True if the host accepts connections on the port (SSH by default)."""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    return True
+
+
+class FleetController:
+    """Runs one action against many hosts concurrently."""
+
+    def __init__(self, action: str, user: str = 'administrator', concurrency: int = 64,
+                 probe_timeout: float = 1.0, command_timeout: float = 15.0,
+                 broadcast: str = '192.168.1.255', dry_run: bool = False):
+        self.action = action
+        self.user = user
+        self.concurrency = concurrency
+        self.probe_timeout = probe_timeout
+        self.command_timeout = command_timeout
+        self.broadcast = broadcast
+        self.dry_run = dry_run
+
+    def run(self, hosts: List[Host]) -> List[HostResult]:
+        if self.action == 'wol':
+            return self.wake(hosts)
+        return asyncio.run(self._run_all(hosts))
+
+    def wake(self, hosts: List[Host]) -> List[HostResult]:
+        results = []
+        for host in hosts:
+            if not host.mac:
+                results.append(HostResult(host, 'failed', 'MAC address unknown', 0.0))
+            elif self.dry_run:
+                results.append(HostResult(host, 'dry-run', f'would wake {host.mac}', 0.0))
+            else:
+                started = time.monotonic()
+                try:
+                    send_magic_packets([host.mac], self.broadcast)
+                    results.append(HostResult(host, 'ok', f'magic packet to {host.mac}',
+                                              time.monotonic() - started))
+                except (OSError, ValueError) as e:
+                    results.append(HostResult(host, 'failed', str(e), time.monotonic() - started))
+        return results
+
+    async def _run_all(self, hosts: List[Host]) -> List[HostResult]:
+        limit = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*(self._run_one(host, limit) for host in hosts))
+
+    async def _run_one(self, host: Host, limit: asyncio.Semaphore) -> HostResult:
+        started = time.monotonic()
+
+        def result(status: str, detail: str) -> HostResult:
+            return HostResult(host, status, detail, time.monotonic() - started)
+
+        if not host.ip:
+            return result('offline', 'no IP address (no DHCP lease)')
+        # Probes are cheap sockets; only SSH sessions count against the limit
+        if not await probe(host.ip, self.probe_timeout):
+            return result('offline', 'no answer on port 22')
+        command = COMMANDS[self.action]
+        if self.dry_run:
+            return result('dry-run', f'would run: {command}')
+
+        async with limit:
+            process = await asyncio.create_subprocess_exec(
+                'ssh', '-o', 'BatchMode=yes', '-o', 'StrictHostKeyChecking=no',
+                '-o', f'ConnectTimeout={max(1, int(self.probe_timeout * 5))}',
+                f'{self.user}@{host.ip}', command,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                _, stderr = await asyncio.wait_for(process.communicate(), self.command_timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                return result('failed', f'timed out after {self.command_timeout:g}s')
+        if process.returncode != 0:
+            message = stderr.decode(errors='replace').strip().splitlines()
+            return result('failed', message[-1] if message else f'ssh exited with {process.returncode}')
+        return result('ok', '')
+
+
+def print_summary(action: str, results: List[HostResult], elapsed: float, verbose: bool) -> None:
+    counts: Dict[str, int] = {}
+    for r in results:
+        counts[r.status] = counts.get(r.status, 0) + 1
+
+    print("\nFleet Summary")
+    print("=" * 60)
+    icons = {'ok': '✅', 'dry-run': '📝', 'offline': '⚠️ ', 'failed': '❌'}
+    for r in sorted(results, key=lambda r: (r.status == 'ok', r.status, r.host.ip or '')):
+        if r.status == 'ok' and not verbose:
+            continue
+        if r.status == 'offline' and not verbose and len(results) > 1:
+            continue
+        detail = f" - {r.detail}" if r.detail else ''
+        print(f"  {icons.get(r.status, '?')} {r.host.label:<32} {r.seconds:5.1f}s{detail}")
+
+    parts = [f"{counts.get(s, 0)} {s}" for s in ('ok', 'failed', 'offline', 'dry-run') if counts.get(s)]
+    print(f"\n{action}: {', '.join(parts) or 'no hosts'} ({len(results)} host(s) in {elapsed:.1f}s)")
+    if counts.get('offline') and not verbose and len(results) > 1:
+        print("  (offline hosts hidden; use --verbose to list them)")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Remote power and session management for tournament machines')
+    parser.add_argument('--action', required=True, choices=ACTIONS)
+    parser.add_argument('--target', required=True, nargs='+', metavar='TARGET',
+                        help='all | cluster NAME | range START-END | ip IP | machine NAME')
+    parser.add_argument('--config', default=os.environ.get('ESPORTS_CONFIG', PROJECT_ROOT / 'config.yaml'),
+                        help='Path to config.yaml')
+    parser.add_argument('--user', default='administrator', help='SSH user (default: administrator)')
+    parser.add_argument('--concurrency', type=int, default=64, help='Parallel SSH sessions (default: 64)')
+    parser.add_argument('--probe-timeout', type=float, default=1.0,
+                        help='Seconds to wait for port 22 (default: 1)')
+    parser.add_argument('--timeout', type=float, default=15.0, help='Seconds per remote command (default: 15)')
+    parser.add_argument('--leases', default=str(LEASES_FILE), help=f'dnsmasq lease file (default: {LEASES_FILE})')
+    parser.add_argument('--confirm', action='store_true', help='Skip the confirmation prompt')
+    parser.add_argument('--dry-run', action='store_true', help='Show what would be done without doing it')
+    parser.add_argument('--verbose', action='store_true', help='List every host in the summary')
+    parser.add_argument('--json', metavar='FILE', help="Write per-host results as JSON ('-' for stdout)")
+    # manage_machines.sh slept this long between hosts; kept so old invocations still run
+    parser.add_argument('--wait', type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.wait is not None:
+        print("⚠️  --wait is deprecated and ignored: hosts are now commanded concurrently", file=sys.stderr)
+
+    target, value = args.target[0], ' '.join(args.target[1:]) or None
+    config_path = Path(args.config)
+    try:
+        if config_path.exists():
+            config = load_config(config_path)
+        else:
+            print(f"Note: {config_path} not found, using the default network", file=sys.stderr)
+            config = Config({}, config_path)
+        inventory = Inventory(config_path.parent, Path(args.leases))
+        hosts = resolve_targets(target, value, config, inventory)
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.action == 'wol' and target == 'all':
+        hosts = wake_targets(hosts, inventory)
+    if not hosts:
+        print("❌ No target machines found", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Action: {args.action}")
+    print(f"Target: {target} {value or ''}")
+    print(f"Machines: {len(hosts)}")
+
+    if not args.confirm and not args.dry_run:
+        print(f"\n⚠️  About to perform '{args.action}' on {len(hosts)} machine(s)")
+        try:
+            reply = input("Are you sure? Type 'yes' to confirm: ")
+        except EOFError:
+            reply = ''
+        if reply != 'yes':
+            print("Cancelled")
+            sys.exit(0)
+
+    network = ipaddress.ip_network(config.network.subnet, strict=False)
+    controller = FleetController(
+        args.action, user=args.user, concurrency=args.concurrency,
+        probe_timeout=args.probe_timeout, command_timeout=args.timeout,
+        broadcast=str(network.broadcast_address), dry_run=args.dry_run,
+    )
+    started = time.monotonic()
+    results = controller.run(hosts)
+    elapsed = time.monotonic() - started
+
+    if args.json:
+        payload = json.dumps([
+            {'ip': r.host.ip, 'name': r.host.name, 'mac': r.host.mac, 'status': r.status,
+             'detail': r.detail, 'seconds': round(r.seconds, 3)}
+            for r in results
+        ], indent=2)
+        if args.json == '-':
+            print(payload)
+        else:
+            Path(args.json).write_text(payload + '\n')
+
+    print_summary(args.action, results, elapsed, args.verbose)
+    if not any(r.status in ('ok', 'dry-run') for r in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
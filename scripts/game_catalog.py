@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Game Catalog for High School Esports LAN Infrastructure
+
+Reads the game definitions (approximate install size and platform) from the
+GAMES array in lancache/scripts/prefill.sh, so Python tools and the prefill
+script share one list. Names are normalized to the config.yaml spelling
+(games.enabled uses underscores, prefill.sh uses hyphens).
+
+Usage:
+    from game_catalog import load_game_catalog
+    catalog = load_game_catalog()
+    print(catalog['fortnite'].size_gb)
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, NamedTuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+PREFILL_SCRIPT = PROJECT_ROOT / "lancache" / "scripts" / "prefill.sh"
+
+# Matches entries like:  ["csgo"]="25GB|Steam|730"
+_ENTRY_RE = re.compile(r'^\s*\["([^"]+)"\]="(\d+(?:\.\d+)?)GB\|([^"|]*)(?:\|([^"]*))?"', re.MULTILINE)
+
+
+class Game(NamedTuple):
+    name: str  # prefill.sh spelling, e.g. "rocket-league"
+    size_gb: float
+    platform: str
+    prefill_id: str = ''  # Steam app ID or Battle.net product code
+
+
+def game_key(name: str) -> str:
+    """Normalize a game name to the games.enabled spelling."""
+    return name.strip().lower().replace('-', '_')
+
+
+def load_game_catalog(path=PREFILL_SCRIPT) -> Dict[str, Game]:
+    """Game definitions keyed by normalized name. Raises FileNotFoundError."""
+    text = Path(path).read_text()
+    return {
+        game_key(name): Game(name, float(size), platform, prefill_id)
+        for name, size, platform, prefill_id in _ENTRY_RE.findall(text)
+    }
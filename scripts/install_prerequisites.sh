@@ -240,7 +240,8 @@ pip3 install \
     pyyaml \
     jsonschema \
     jinja2 \
-    requests
+    requests \
+    numpy
 
 log_success "Python dependencies installed"
 
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+IP/MAC Conflict Detection for High School Esports LAN Infrastructure
+
+Finds addressing problems that break PXE boot in ways that are hard to
+troubleshoot on event day:
+
+- Server IPs, the gateway or DNS servers that fall inside the DHCP range
+  (dnsmasq would hand them out to clients)
+- Two infrastructure addresses sharing one IP
+- A DHCP range that leaves the subnet or covers its network/broadcast address
+- Duplicate MAC addresses or machine names in config/mac-addresses.yaml
+- A DHCP pool too small for the mapped machines or expected client count
+
+Addresses are handled as sorted integer intervals, so checks run in
+O(n log n) whatever the size of the DHCP range (a /16 is no slower than a
+/24) and scale to thousands of mapped machines.
+
+Usage:
+    python network_conflicts.py config.yaml
+    python network_conflicts.py config.yaml --macs config/mac-addresses.yaml
+"""
+
+import argparse
+import heapq
+import ipaddress
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from config_loader import SafeLoader, load_yaml
+
+# Relative to the directory holding config.yaml
+MAC_ADDRESSES_FILE = 'config/mac-addresses.yaml'
+
+# Used when network.expected_clients is not set
+DEFAULT_EXPECTED_CLIENTS = 200
+
+# Single infrastructure addresses, checked against each other and the DHCP range
+SERVER_FIELDS = ['ipxe_server_ip', 'lancache_server_ip', 'file_server_ip', 'proxmox_ip', 'gateway']
+DNS_FIELDS = ['dns_primary', 'dns_secondary']
+
+_MAC_RE = re.compile(r'^[0-9a-f]{2}([:-]?)[0-9a-f]{2}(\1[0-9a-f]{2}){4}$', re.IGNORECASE)
+
+
+class Interval(NamedTuple):
+    """Inclusive range of integer addresses with a description."""
+    start: int
+    end: int
+    label: str
+    kind: str  # 'server', 'dns', 'dhcp' or 'reserved'
+
+
+class IntervalSet:
+    """Address intervals kept sorted by start for sweep-line overlap detection."""
+
+    def __init__(self):
+        self._intervals: List[Interval] = []
+        self._sorted = True
+
+    def add(self, start: int, end: int, label: str, kind: str) -> None:
+        self._intervals.append(Interval(start, end, label, kind))
+        self._sorted = False
+
+    def __iter__(self) -> Iterator[Interval]:
+        if not self._sorted:
+            self._intervals.sort(key=lambda i: (i.start, -i.end))
+            self._sorted = True
+        return iter(self._intervals)
+
+    def overlaps(self) -> Iterator[Tuple[Interval, Interval]]:
+        """
+        Every pair of overlapping intervals, in O(n log n + pairs).
+
+        Sweeps intervals in start order while a heap holds those still open
+        (ordered by end); everything left open when an interval starts
+        overlaps it.
+        """
+        active: List[Tuple[int, int, Interval]] = []
+        for index, interval in enumerate(self):
+            while active and active[0][0] < interval.start:
+                heapq.heappop(active)
+            for _, _, other in active:
+                yield other, interval
+            heapq.heappush(active, (interval.end, index, interval))
+
+
+class MacEntry(NamedTuple):
+    """One line of mac_mappings, kept even when the MAC is repeated."""
+    mac: str
+    name: str
+    line: int
+
+
+class ConflictReport(NamedTuple):
+    errors: List[str]
+    warnings: List[str]
+
+
+def format_ip(value: int) -> str:
+    return str(ipaddress.ip_address(value))
+
+
+def parse_mac(text: str) -> int:
+    """MAC address (aa:bb:.., aa-bb-.. or aabb..) as an integer."""
+    text = str(text).strip()
+    if not _MAC_RE.match(text):
+        raise ValueError(f"invalid MAC address '{text}'")
+    return int(re.sub('[:-]', '', text), 16)
+
+
+def load_mac_mappings(path) -> List[MacEntry]:
+    """
+    Read mac_mappings from a mac-addresses.yaml file.
+
+    Works on the YAML node tree rather than the loaded dict so repeated keys
+    (which a plain load silently collapses) are kept, with line numbers.
+    Raises FileNotFoundError and yaml.YAMLError.
+    """
+    with open(path, 'rb') as f:
+        root = yaml.compose(f, Loader=SafeLoader)
+    if not isinstance(root, yaml.MappingNode):
+        return []
+    for key, value in root.value:
+        if key.value == 'mac_mappings' and isinstance(value, yaml.MappingNode):
+            return [
+                MacEntry(str(k.value), str(v.value), k.start_mark.line + 1)
+                for k, v in value.value
+            ]
+    return []
+
+
+def _parse_ip(network: Dict[str, Any], field: str) -> Optional[int]:
+    value = network.get(field)
+    if not value:
+        return None
+    try:
+        return int(ipaddress.ip_address(value))
+    except ValueError:
+        return None  # Reported by validate_network_config
+
+
+def check_macs(entries: List[MacEntry], source: str = MAC_ADDRESSES_FILE) -> Tuple[ConflictReport, int]:
+    """Check MAC mappings for bad or duplicate MACs and names; also returns the unique MAC count."""
+    errors: List[str] = []
+    warnings: List[str] = []
+
+    parsed = []
+    for entry in entries:
+        try:
+            parsed.append((parse_mac(entry.mac), entry))
+        except ValueError as e:
+            errors.append(f"{source} line {entry.line}: {e}")
+        if not entry.name.strip():
+            errors.append(f"{source} line {entry.line}: {entry.mac} has no machine name")
+
+    # Sorted, so duplicates of a MAC are adjacent
+    parsed.sort(key=lambda item: (item[0], item[1].line))
+    unique = 0
+    i = 0
+    while i < len(parsed):
+        j = i
+        while j + 1 < len(parsed) and parsed[j + 1][0] == parsed[i][0]:
+            j += 1
+        unique += 1
+        if j > i:
+            lines = ', '.join(str(entry.line) for _, entry in parsed[i:j + 1])
+            errors.append(f"{source}: MAC {parsed[i][1].mac} is mapped more than once (lines {lines})")
+        i = j + 1
+
+    # Windows computer names are case-insensitive
+    by_name: Dict[str, List[MacEntry]] = {}
+    for entry in entries:
+        if entry.name.strip():
+            by_name.setdefault(entry.name.strip().casefold(), []).append(entry)
+    for group in by_name.values():
+        if len(group) > 1:
+            lines = ', '.join(str(entry.line) for entry in group)
+            errors.append(f"{source}: name {group[0].name} is used by {len(group)} MACs (lines {lines})")
+
+    return ConflictReport(errors, warnings), unique
+
+
+def find_conflicts(network: Dict[str, Any], mac_entries: Optional[List[MacEntry]] = None,
+                   source: str = MAC_ADDRESSES_FILE) -> ConflictReport:
+    """Check the network section (and optional MAC mappings) for conflicts."""
+    network = network or {}
+    errors: List[str] = []
+    warnings: List[str] = []
+    intervals = IntervalSet()
+
+    for field in SERVER_FIELDS + DNS_FIELDS:
+        ip = _parse_ip(network, field)
+        if ip is not None:
+            intervals.add(ip, ip, f"network.{field}", 'dns' if field in DNS_FIELDS else 'server')
+
+    subnet = None
+    try:
+        subnet = ipaddress.ip_network(network.get('subnet', ''))
+    except ValueError:
+        pass  # Reported by validate_network_config
+    if subnet is not None and subnet.num_addresses > 2:
+        intervals.add(int(subnet.network_address), int(subnet.network_address),
+                      "the subnet's network address", 'reserved')
+        if subnet.version == 4:
+            intervals.add(int(subnet.broadcast_address), int(subnet.broadcast_address),
+                          "the subnet's broadcast address", 'reserved')
+
+    dhcp_start = _parse_ip(network, 'dhcp_range_start')
+    dhcp_end = _parse_ip(network, 'dhcp_range_end')
+    has_dhcp = dhcp_start is not None and dhcp_end is not None and dhcp_start <= dhcp_end
+    if has_dhcp:
+        dhcp_label = f"DHCP range {format_ip(dhcp_start)}-{format_ip(dhcp_end)}"
+        intervals.add(dhcp_start, dhcp_end, dhcp_label, 'dhcp')
+        if subnet is not None and (
+            dhcp_start < int(subnet.network_address) or dhcp_end > int(subnet.broadcast_address)
+        ):
+            errors.append(f"{dhcp_label} extends outside subnet {subnet}")
+
+    # Addresses taken out of the DHCP pool by fixed assignments
+    reserved_in_pool = set()
+    for a, b in intervals.overlaps():
+        kinds = {a.kind, b.kind}
+        if 'dhcp' in kinds:
+            point = b if a.kind == 'dhcp' else a
+            reserved_in_pool.add(point.start)
+            if point.kind == 'reserved':
+                errors.append(f"{dhcp_label} includes {point.label} ({format_ip(point.start)})")
+            elif point.kind == 'dns':
+                warnings.append(f"{point.label} ({format_ip(point.start)}) is inside the {dhcp_label}. "
+                                "Move it out of the range so it is never leased to a client.")
+            else:
+                errors.append(f"{point.label} ({format_ip(point.start)}) is inside the {dhcp_label} "
+                              "and could be leased to a client")
+        elif kinds == {'dns'}:
+            warnings.append(f"{a.label} and {b.label} are the same address ({format_ip(a.start)})")
+        elif 'dns' in kinds:
+            continue  # Pointing DNS at one of our own servers is fine
+        else:
+            errors.append(f"{a.label} and {b.label} are both {format_ip(a.start)}")
+
+    mapped = 0
+    if mac_entries:
+        mac_report, mapped = check_macs(mac_entries, source)
+        errors.extend(mac_report.errors)
+        warnings.extend(mac_report.warnings)
+
+    if has_dhcp:
+        pool = dhcp_end - dhcp_start + 1 - len(reserved_in_pool)
+        try:
+            expected = int(network.get('expected_clients') or DEFAULT_EXPECTED_CLIENTS)
+        except (TypeError, ValueError):
+            errors.append(f"network.expected_clients must be a number, got {network['expected_clients']!r}")
+            expected = DEFAULT_EXPECTED_CLIENTS
+        if pool < mapped:
+            errors.append(
+                f"DHCP range has {pool} free IPs but {mapped} machines are mapped in {source}"
+            )
+        elif pool < expected:
+            warnings.append(
+                f"DHCP range provides {pool} IPs for up to {expected} clients. "
+                "This may be tight."
+            )
+
+    return ConflictReport(errors, warnings)
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Check network addressing and MAC mappings for conflicts')
+    parser.add_argument('config', help='Path to config.yaml')
+    parser.add_argument('--macs', help=f'MAC mapping file (default: {MAC_ADDRESSES_FILE} next to the config)')
+    args = parser.parse_args()
+
+    config = load_yaml(args.config) or {}
+    mac_path = Path(args.macs) if args.macs else Path(args.config).parent / MAC_ADDRESSES_FILE
+    entries = load_mac_mappings(mac_path) if mac_path.exists() else []
+
+    report = find_conflicts(config.get('network'), entries, str(mac_path))
+    for error in report.errors:
+        print(f"❌ {error}")
+    for warning in report.warnings:
+        print(f"⚠️  {warning}")
+    if not report.errors and not report.warnings:
+        print(f"✅ No conflicts ({len(entries)} MAC mappings checked)")
+    sys.exit(1 if report.errors else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Incremental Config Renderer for High School Esports LAN Infrastructure
+
+Renders the service templates (*.j2) the playbooks deploy, without a full
+Ansible run. Each template is parsed once to find the config.yaml values it
+actually reads (e.g. advanced.pxe.timeout_seconds); a run re-renders only
+templates whose source or those values changed, and lists exactly which
+services need reloading. With --apply, changed files are validated and
+installed on their servers over SSH (one session per server, in parallel)
+and only the affected services are reloaded.
+
+State (template hashes, input fingerprints, output hashes, what was last
+applied) lives next to the rendered files, so a run after a one-value edit
+costs a config load, a hash per template and one render.
+
+Output layout: <output>/<server>/<destination path>, e.g.
+build/rendered/ipxe_server/etc/dnsmasq.conf
+
+Usage:
+    python3 render_configs.py                   # render, list pending reloads
+    python3 render_configs.py --apply           # ... then install and reload
+    python3 render_configs.py --deps            # which config keys each template reads
+    python3 render_configs.py --fact ansible_default_ipv4.interface=ens18
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import yaml
+
+try:
+    import jinja2
+    from jinja2 import meta, nodes
+except ImportError:
+    print("jinja2 is not installed. Install it with: pip3 install jinja2")
+    sys.exit(1)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from config_loader import load_config
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+OUTPUT_DIR = PROJECT_ROOT / 'build' / 'rendered'
+STATE_FILE = '.render-state.json'
+LOCAL = 'local'  # files used on this machine (e.g. by the image build)
+
+
+class Target(NamedTuple):
+    template: str                 # relative to PROJECT_ROOT
+    server: str                   # inventory group; the IP is network.<server>_ip
+    dest: str
+    service: Optional[str] = None
+    reload: Optional[str] = None  # run on the server after dest changes
+    validate: Optional[str] = None  # %s is the new file, as in Ansible's validate
+
+
+# Mirrors the template tasks in ansible/playbooks/. ipxe/config/tftpd-hpa.conf.j2
+# is a copy of deploy_ipxe.yml rather than a tftpd config, so it is not listed.
+TARGETS = [
+    Target('ipxe/config/dnsmasq.conf.j2', 'ipxe_server', '/etc/dnsmasq.conf', 'dnsmasq',
+           'systemctl restart dnsmasq', 'dnsmasq --test --conf-file=%s'),
+    Target('ipxe/config/nginx.conf.j2', 'ipxe_server', '/etc/nginx/nginx.conf', 'nginx',
+           'systemctl reload nginx', 'nginx -t -c %s'),
+    # Fallback menu; per-machine menus come from ipxe/scripts/boot_service.py
+    Target('ipxe/config/boot.ipxe.j2', 'ipxe_server', '/srv/tftp/boot.ipxe'),
+    Target('fileserver/config/smb.conf.j2', 'file_server', '/etc/samba/smb.conf', 'samba',
+           'systemctl reload smbd nmbd', 'testparm -s %s'),
+    Target('lancache/config/lancache.env.j2', 'lancache_server', '/opt/lancache/lancache.env', 'lancache',
+           'docker-compose -f /opt/lancache/docker-compose.yml up -d lancache'),
+    Target('lancache/config/lancache-dns.env.j2', 'lancache_server', '/opt/lancache/lancache-dns.env',
+           'lancache-dns', 'docker-compose -f /opt/lancache/docker-compose.yml up -d lancache-dns'),
+    Target('windows-image/config/autounattend.xml.j2', LOCAL, 'windows-image/autounattend.xml'),
+]
+
+
+def default_facts() -> Dict[str, Any]:
+    """
+    Fact namespaces the templates read, left empty.
+
+    Nothing is taken from this machine: its date and timezone needn't match
+    the servers', so templates fall back to their own defaults (e.g. TZ
+    America/New_York). Server-specific facts (ansible_default_ipv4.interface,
+    ansible_date_time.tz) are given once with --fact; they are remembered in
+    the render state.
+    """
+    return {'ansible_date_time': {}}
+
+
+def set_dotted(data: Dict[str, Any], dotted: str, value: Any) -> None:
+    *parents, last = dotted.split('.')
+    for key in parents:
+        data = data.setdefault(key, {})
+    data[last] = value
+
+
+def template_inputs(env: jinja2.Environment, source: str) -> List[str]:
+    """
+    Dotted paths of the context values a template reads.
+
+    Attribute chains are kept whole (advanced.pxe.timeout_seconds, not
+    advanced); a chain that can't be followed statically (a[var]) stops at
+    the part that can, which only makes the fingerprint coarser. Paths only
+    tested with 'is defined' end in '?': just their existence is an input.
+    """
+    ast = env.parse(source)
+    roots = meta.find_undeclared_variables(ast)
+    inner = set()
+    for node in ast.find_all((nodes.Getattr, nodes.Getitem)):
+        inner.add(id(node.node))
+    existence = {id(test.node) for test in ast.find_all(nodes.Test) if test.name in ('defined', 'undefined')}
+
+    paths = set()
+    for node in ast.find_all((nodes.Getattr, nodes.Getitem, nodes.Name)):
+        if id(node) in inner:
+            continue
+        suffix = '?' if id(node) in existence else ''
+        path = []
+        while True:
+            if isinstance(node, nodes.Getattr):
+                path.append(node.attr)
+            elif isinstance(node, nodes.Getitem) and isinstance(node.arg, nodes.Const):
+                path.append(str(node.arg.value))
+            elif isinstance(node, nodes.Getitem):
+                path = []  # only the part before a[var] is known
+            else:
+                break
+            node = node.node
+        if isinstance(node, nodes.Name) and node.ctx == 'load' and node.name in roots:
+            paths.add('.'.join([node.name] + path[::-1]) + suffix)
+    return sorted(path for path in paths if not (path.endswith('?') and path[:-1] in paths))
+
+
+def lookup(context: Dict[str, Any], dotted: str) -> Any:
+    """Value at a dotted path; the nearest existing parent if it's missing."""
+    exists_only = dotted.endswith('?')
+    value = context
+    for key in dotted.rstrip('?').split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return False if exists_only else ['<missing>', value if value is not context else None]
+        value = value[key]
+    return True if exists_only else value
+
+
+def digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class Renderer:
+    """Renders TARGETS into an output tree, skipping anything unchanged."""
+
+    def __init__(self, config: Dict[str, Any], output: Path, facts: Optional[Dict[str, str]] = None,
+                 targets: List[Target] = TARGETS, root: Path = PROJECT_ROOT):
+        self.output = output
+        self.root = root
+        self.targets = targets
+        self.state_path = output / STATE_FILE
+        try:
+            self.state = json.loads(self.state_path.read_text())
+        except (OSError, ValueError):
+            self.state = {}
+        self.facts: Dict[str, str] = self.state.setdefault('facts', {})  # --fact values, dotted
+        self.records: Dict[str, Dict[str, Any]] = self.state.setdefault('templates', {})
+        self.facts.update(facts or {})
+        self.context = default_facts()
+        self.context.update(config)
+        for name, value in self.facts.items():
+            set_dotted(self.context, name, value)
+        # Same settings as Ansible's template module
+        self.env = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(str(root)),
+            bytecode_cache=jinja2.FileSystemBytecodeCache(str(self._mkdir(output / '.jinja'))),
+            undefined=jinja2.StrictUndefined, trim_blocks=True, keep_trailing_newline=True)
+
+    @staticmethod
+    def _mkdir(path: Path) -> Path:
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def path_of(self, target: Target) -> Path:
+        return self.output / target.server / target.dest.lstrip('/')
+
+    def _render(self, target: Target) -> Dict[str, Any]:
+        record = dict(self.records.get(target.template, {}))
+        source = (self.root / target.template).read_bytes()
+        source_hash = digest(source)
+        if record.get('source') != source_hash:
+            record['inputs'] = template_inputs(self.env, source.decode())
+            record['source'] = source_hash
+        values = [lookup(self.context, path) for path in record['inputs']]
+        fingerprint = digest(json.dumps([source_hash, values], sort_keys=True, default=str).encode())
+
+        path = self.path_of(target)
+        try:
+            current = digest(path.read_bytes())
+        except OSError:
+            current = None
+        if record.get('fingerprint') == fingerprint and current is not None and current == record.get('output'):
+            return {'target': target, 'status': 'unchanged', 'record': record}
+
+        try:
+            text = self.env.get_template(target.template).render(self.context)
+        except jinja2.TemplateError as e:
+            return {'target': target, 'status': 'failed', 'error': str(e), 'record': record}
+        data = text.encode()
+        record['fingerprint'] = fingerprint
+        record['output'] = digest(data)
+        if record['output'] == current:
+            return {'target': target, 'status': 'same', 'record': record}
+        self._mkdir(path.parent)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        return {'target': target, 'status': 'rendered', 'record': record}
+
+    def render(self, jobs: int = 8) -> List[Dict[str, Any]]:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(self._render, self.targets))
+        for result in results:
+            self.records[result['target'].template] = result['record']
+        self.save()
+        return results
+
+    def pending(self) -> List[Target]:
+        """Targets whose rendered output differs from what was last applied."""
+        return [target for target in self.targets
+                if target.template in self.records
+                and self.records[target.template].get('output') != self.records[target.template].get('applied')]
+
+    def mark_applied(self, target: Target) -> None:
+        record = self.records[target.template]
+        record['applied'] = record.get('output')
+
+    def save(self) -> None:
+        tmp = self.state_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self.state, indent=2, sort_keys=True))
+        os.replace(tmp, self.state_path)
+
+
+def install_command(target: Target) -> str:
+    """Remote shell command that validates stdin and installs it at dest."""
+    dest = shlex.quote(target.dest)
+    steps = ['tmp=$(mktemp)', 'cat > "$tmp"']
+    if target.validate:
+        steps.append(target.validate.replace('%s', '"$tmp"'))
+    steps.append(f'install -D -m 0644 "$tmp" {dest}')
+    return ' && '.join(steps) + '; rc=$?; rm -f "$tmp"; exit $rc'
+
+
+def apply_server(renderer: Renderer, ip: str, targets: List[Target], user: str,
+                 timeout: float) -> List[Dict[str, Any]]:
+    """Install a server's changed files, then reload the services that use them."""
+    ssh = ['ssh', '-o', 'BatchMode=yes', '-o', 'ConnectTimeout=5', f'{user}@{ip}']
+    results, reloads = [], []
+    for target in targets:
+        try:
+            process = subprocess.run(ssh + [install_command(target)], input=renderer.path_of(target).read_bytes(),
+                                     capture_output=True, timeout=timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            results.append({'target': target, 'ok': False, 'message': str(e)})
+            continue
+        ok = process.returncode == 0
+        message = process.stderr.decode(errors='replace').strip().splitlines()
+        results.append({'target': target, 'ok': ok, 'message': message[-1] if message and not ok else ''})
+        if ok and target.reload:
+            if target.reload not in reloads:
+                reloads.append(target.reload)
+        elif ok:
+            renderer.mark_applied(target)
+
+    for command in reloads:
+        try:
+            process = subprocess.run(ssh + [command], stdin=subprocess.DEVNULL, capture_output=True,
+                                     timeout=timeout)
+            ok, message = process.returncode == 0, process.stderr.decode(errors='replace').strip()
+        except (OSError, subprocess.TimeoutExpired) as e:
+            ok, message = False, str(e)
+        for result in results:
+            target = result['target']
+            if result['ok'] and target.reload == command:
+                result['ok'] = ok
+                result['message'] = '' if ok else f"reload failed: {message.splitlines()[-1] if message else command}"
+                if ok:
+                    renderer.mark_applied(target)
+    return results
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Render service configs incrementally from config.yaml')
+    parser.add_argument('--config', default=os.environ.get('ESPORTS_CONFIG', PROJECT_ROOT / 'config.yaml'),
+                        help='Path to config.yaml')
+    parser.add_argument('--output', default=str(OUTPUT_DIR), help=f'Rendered file tree (default: {OUTPUT_DIR})')
+    parser.add_argument('--fact', action='append', default=[], metavar='NAME=VALUE',
+                        help='Override an Ansible fact, e.g. ansible_default_ipv4.interface=ens18')
+    parser.add_argument('--force', action='store_true', help='Re-render every template')
+    parser.add_argument('--deps', action='store_true', help='Show the config keys each template reads')
+    parser.add_argument('--apply', action='store_true', help='Install changed files over SSH and reload services')
+    parser.add_argument('--user', default='root', help='SSH user for --apply (default: root)')
+    parser.add_argument('--timeout', type=float, default=60, help='Seconds per SSH command (default: 60)')
+    parser.add_argument('--json', metavar='FILE', help="Write results as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    try:
+        config = load_config(Path(args.config))
+    except (OSError, yaml.YAMLError) as e:
+        print(f"❌ Could not load {args.config}: {e}", file=sys.stderr)
+        sys.exit(1)
+    facts = {}
+    for fact in args.fact:
+        name, sep, value = fact.partition('=')
+        if not sep:
+            parser.error(f"--fact expects NAME=VALUE, got '{fact}'")
+        facts[name] = value
+
+    renderer = Renderer(config.raw, Path(args.output), facts)
+    if args.force:
+        for template, record in renderer.records.items():
+            renderer.records[template] = {'applied': record['applied']} if 'applied' in record else {}
+    results = renderer.render()
+
+    if args.deps:
+        for target in renderer.targets:
+            print(f"{target.template}:")
+            for path in renderer.records.get(target.template, {}).get('inputs', []):
+                print(f"    {path}")
+        print()
+
+    symbols = {'rendered': '✅', 'same': '➖', 'unchanged': '·', 'failed': '❌'}
+    for result in results:
+        target = result['target']
+        if result['status'] != 'unchanged' or args.force:
+            line = f"{symbols[result['status']]} {target.template} -> {target.server}:{target.dest}"
+            if result['status'] == 'failed':
+                line += f"  ({result['error']})"
+                if 'ansible_' in result['error']:
+                    line += "\n   Set the server's value once with --fact, e.g. --fact ansible_default_ipv4.interface=ens18"
+            print(line)
+    rendered = sum(result['status'] in ('rendered', 'same') for result in results)
+    print(f"Rendered {rendered} of {len(results)} template(s) in {time.monotonic() - started:.2f}s")
+
+    pending = [target for target in renderer.pending() if target.server != LOCAL]
+    applied: List[Dict[str, Any]] = []
+    if pending and args.apply:
+        by_server: Dict[str, List[Target]] = {}
+        for target in pending:
+            by_server.setdefault(target.server, []).append(target)
+        with ThreadPoolExecutor(max_workers=len(by_server)) as pool:
+            futures = []
+            for server, targets in by_server.items():
+                ip = config.get(f'network.{server}_ip')
+                if not ip:
+                    print(f"❌ network.{server}_ip is not set; skipping {server}")
+                    continue
+                futures.append(pool.submit(apply_server, renderer, ip, targets, args.user, args.timeout))
+            for future in futures:
+                applied.extend(future.result())
+        renderer.save()
+        for result in applied:
+            target = result['target']
+            status = '✅' if result['ok'] else '❌'
+            print(f"{status} {target.server}:{target.dest}" + (f"  {result['message']}" if result['message'] else ''))
+        pending = [target for target in renderer.pending() if target.server != LOCAL]
+
+    if pending:
+        print()
+        print("Pending (not yet applied):")
+        for target in pending:
+            print(f"  {target.server}:{target.dest}" + (f"  -> {target.reload}" if target.reload else ''))
+        services = sorted({target.service for target in pending if target.service})
+        print(f"Services to reload: {', '.join(services) if services else 'none'}")
+
+    if args.json:
+        report = {
+            'templates': [{'template': r['target'].template, 'status': r['status'],
+                           'inputs': r['record'].get('inputs', []), 'error': r.get('error')} for r in results],
+            'applied': [{'server': r['target'].server, 'dest': r['target'].dest, 'ok': r['ok'],
+                         'message': r['message']} for r in applied],
+            'pending': [{'server': t.server, 'dest': t.dest, 'service': t.service, 'reload': t.reload}
+                        for t in pending],
+        }
+        text = json.dumps(report, indent=2)
+        if args.json == '-':
+            print(text)
+        else:
+            Path(args.json).write_text(text)
+
+    failed = any(r['status'] == 'failed' for r in results) or any(not r['ok'] for r in applied)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -7,30 +7,95 @@ common configuration errors.
 
 Usage:
     python validate_config.py config.yaml
+    python validate_config.py config.yaml --watch
+    python validate_config.py sites/ --json results.json --junit results.xml
+    python validate_config.py 'sites/*.yaml' --skip security --jobs 8
 """
 
+import argparse
+import glob
+import hashlib
+import json
+import os
 import sys
+import time
+import xml.etree.ElementTree as ET
 import yaml
 import ipaddress
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, NamedTuple, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools"))
+from cache_simulator import sizing_warnings as cache_sizing_warnings
+from config_loader import Config, load_yaml
+from game_catalog import PREFILL_SCRIPT
+from network_conflicts import MAC_ADDRESSES_FILE, find_conflicts, load_mac_mappings
+from resource_calculator import capacity_warnings, plan as plan_placement
+
+
+class Rule(NamedTuple):
+    """
+    A named validation rule: a ConfigValidator method, the config sections
+    it reads and any other files it reads (relative to the config's directory,
+    or absolute).
+    """
+    name: str
+    method: str
+    sections: Tuple[str, ...]
+    files: Tuple[str, ...] = ()
+
+
+# Every validation rule, in the order they run
+RULES: Dict[str, Rule] = {}
+
+
+def rule(name: str, *sections: str, files: Tuple[str, ...] = ()):
+    """Register a ConfigValidator method as a validation rule."""
+    def register(method):
+        RULES[name] = Rule(name, method.__name__, sections, files)
+        return method
+    return register
+
+
+def select_rules(only: Optional[List[str]] = None, skip: Optional[List[str]] = None) -> List[Rule]:
+    """Rules to run: all of them, or just those in only, minus those in skip."""
+    unknown = set(only or []) | set(skip or [])
+    unknown -= set(RULES)
+    if unknown:
+        raise ValueError(
+            f"Unknown rule(s): {', '.join(sorted(unknown))} "
+            f"(available: {', '.join(RULES)})"
+        )
+    return [r for r in RULES.values()
+            if (not only or r.name in only) and r.name not in (skip or [])]
 
 
 class ConfigValidator:
     """Validates configuration files for the esports infrastructure."""
     
-    def __init__(self, config_path: str):
-        """Initialize the validator with a config file path."""
+    def __init__(self, config_path: str, rules: Optional[List[Rule]] = None):
+        """
+        Initialize the validator with a config file path.
+        
+        rules limits validation to a subset of RULES (see select_rules).
+        """
         self.config_path = Path(config_path)
         self.config = None
         self.errors = []
         self.warnings = []
+        self.rules = rules if rules is not None else list(RULES.values())
+        # Per-rule (errors, warnings), the section digest they came from,
+        # and how long the rule last took in seconds
+        self._results: Dict[str, Tuple[List[str], List[str]]] = {}
+        self._digests: Dict[str, str] = {}
+        self.timings: Dict[str, float] = {}
         
     def load_config(self) -> bool:
         """Load and parse the YAML configuration file."""
         try:
-            with open(self.config_path, 'r') as f:
-                self.config = yaml.safe_load(f)
+            self.config = load_yaml(self.config_path) or {}
             return True
         except FileNotFoundError:
             self.errors.append(f"Configuration file not found: {self.config_path}")
@@ -39,6 +104,7 @@ class ConfigValidator:
             self.errors.append(f"YAML parsing error: {e}")
             return False
     
+    @rule('required_fields', 'organization', 'network', 'proxmox', 'vms', 'games', 'windows')
     def validate_required_fields(self) -> None:
         """Validate that all required fields are present."""
         required_sections = [
@@ -64,6 +130,7 @@ class ConfigValidator:
             elif len(org['short_name']) > 10:
                 self.warnings.append("organization.short_name should be 10 characters or less")
     
+    @rule('network', 'network')
     def validate_network_config(self) -> None:
         """Validate network configuration."""
         if 'network' not in self.config:
@@ -116,30 +183,36 @@ class ConfigValidator:
                 
                 if int(start) >= int(end):
                     self.errors.append("dhcp_range_start must be less than dhcp_range_end")
-                
-                # Calculate number of available IPs
-                num_ips = int(end) - int(start) + 1
-                if num_ips < 50:
-                    self.warnings.append(
-                        f"DHCP range only provides {num_ips} IPs. Consider expanding for 200 clients."
-                    )
-                elif num_ips < 200:
-                    self.warnings.append(
-                        f"DHCP range provides {num_ips} IPs for up to 200 clients. "
-                        "This may be tight."
-                    )
-                    
+
             except ValueError as e:
                 self.errors.append(f"Invalid DHCP range: {e}")
     
+    @rule('address_conflicts', 'network', files=(MAC_ADDRESSES_FILE,))
+    def validate_address_conflicts(self) -> None:
+        """Check for IP overlaps, duplicate MACs/names and DHCP pool exhaustion."""
+        if 'network' not in self.config:
+            return
+        
+        mac_path = self.config_path.parent / MAC_ADDRESSES_FILE
+        entries = []
+        if mac_path.exists():
+            try:
+                entries = load_mac_mappings(mac_path)
+            except yaml.YAMLError as e:
+                self.errors.append(f"{MAC_ADDRESSES_FILE}: YAML parsing error: {e}")
+        
+        report = find_conflicts(self.config['network'], entries)
+        self.errors.extend(report.errors)
+        self.warnings.extend(report.warnings)
+    
+    @rule('vm_resources', 'vms', 'proxmox', 'advanced', 'games', 'network',
+          files=(str(PREFILL_SCRIPT),))
     def validate_vm_resources(self) -> None:
         """Validate VM resource allocations."""
         if 'vms' not in self.config:
             return
             
         vms = self.config['vms']
-        total_memory = 0
-        total_cores = 0
         
         vm_names = ['ipxe_server', 'lancache_server', 'file_server', 'windows_builder']
         
@@ -155,14 +228,12 @@ class ConfigValidator:
                 memory = vm['memory']
                 if memory < 1024:
                     self.warnings.append(f"{vm_name}.memory is very low: {memory}MB")
-                total_memory += memory
             
             # Validate cores
             if 'cores' in vm:
                 cores = vm['cores']
                 if cores < 1:
                     self.errors.append(f"{vm_name}.cores must be at least 1")
-                total_cores += cores
             
             # Validate disk sizes
             if 'disk_size' in vm:
@@ -170,27 +241,21 @@ class ConfigValidator:
                 if disk < 20:
                     self.warnings.append(f"{vm_name}.disk_size is very small: {disk}GB")
         
-        # Check total resources
-        if total_memory > 388 * 1024:  # 388GB in MB
-            self.warnings.append(
-                f"Total VM memory ({total_memory/1024:.1f}GB) exceeds "
-                "recommended server RAM (388GB)"
-            )
+        # Check the VMs fit on the Proxmox node(s), and survive a node failure
+        try:
+            self.warnings.extend(capacity_warnings(plan_placement(self.config)))
+        except (TypeError, ValueError, KeyError) as e:
+            self.errors.append(f"Cannot plan VM placement: {e}")
         
-        # Validate LANCache cache size
-        if 'lancache_server' in vms and 'cache_disk_size' in vms['lancache_server']:
-            cache_size = vms['lancache_server']['cache_disk_size']
-            if cache_size < 5000:
-                self.warnings.append(
-                    f"LANCache cache_disk_size ({cache_size}GB) may be insufficient "
-                    "for multiple games"
-                )
-            if cache_size > 35000:
-                self.warnings.append(
-                    f"LANCache cache_disk_size ({cache_size}GB) exceeds "
-                    "recommended 40TB server storage"
-                )
+        # Check the LANCache holds the enabled games, patches included
+        try:
+            self.warnings.extend(cache_sizing_warnings(Config(self.config)))
+        except (TypeError, ValueError) as e:
+            self.errors.append(f"Cannot simulate LANCache sizing: {e}")
+        except FileNotFoundError as e:
+            self.warnings.append(f"Cannot simulate LANCache sizing: {e}")
     
+    @rule('games', 'games')
     def validate_games_config(self) -> None:
         """Validate games configuration."""
         if 'games' not in self.config:
@@ -216,6 +281,7 @@ class ConfigValidator:
             if not enabled_clients:
                 self.warnings.append("No game clients enabled")
     
+    @rule('windows', 'windows')
     def validate_windows_config(self) -> None:
         """Validate Windows configuration."""
         if 'windows' not in self.config:
@@ -247,6 +313,7 @@ class ConfigValidator:
                         "Ensure client machines have sufficient storage."
                     )
     
+    @rule('security', 'security')
     def validate_security_config(self) -> None:
         """Validate security settings."""
         if 'security' not in self.config:
@@ -276,15 +343,159 @@ class ConfigValidator:
         if not self.load_config():
             return False
         
-        self.validate_required_fields()
-        self.validate_network_config()
-        self.validate_vm_resources()
-        self.validate_games_config()
-        self.validate_windows_config()
-        self.validate_security_config()
+        self.run_checks()
         
         return len(self.errors) == 0
     
+    @staticmethod
+    def _file_stamp(path: Path) -> Optional[Tuple[int, int]]:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _rule_digest(self, r: Rule) -> str:
+        """Hash of a rule's inputs: its config sections and its files' mtimes."""
+        files = [self._file_stamp(self.config_path.parent / name) for name in r.files]
+        payload = json.dumps([[self.config.get(name) for name in r.sections], files],
+                             sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def _run_check(self, r: Rule) -> Tuple[List[str], List[str]]:
+        """
+        Run one rule's validate_* method, returning the errors and warnings
+        it found. A rule that crashes (e.g. on a value of the wrong type)
+        reports the exception as an error rather than stopping the others.
+        """
+        saved = self.errors, self.warnings
+        self.errors, self.warnings = [], []
+        try:
+            getattr(self, r.method)()
+        except Exception as e:
+            self.errors.append(f"Rule {r.name} failed: {type(e).__name__}: {e}")
+        finally:
+            found = self.errors, self.warnings
+            self.errors, self.warnings = saved
+        return found
+    
+    def run_checks(self, only_changed: bool = False) -> List[str]:
+        """
+        Run the validation rules on the loaded config and collect their
+        results into self.errors and self.warnings.
+        
+        With only_changed, rules whose sections are unchanged since their
+        last run reuse the cached results. Returns the names of the rules
+        that actually ran.
+        """
+        ran = []
+        for r in self.rules:
+            digest = self._rule_digest(r)
+            if only_changed and self._digests.get(r.name) == digest:
+                continue
+            started = time.perf_counter()
+            self._results[r.name] = self._run_check(r)
+            self.timings[r.name] = time.perf_counter() - started
+            self._digests[r.name] = digest
+            ran.append(r.name)
+        
+        self.errors = [e for errors, _ in self._results.values() for e in errors]
+        self.warnings = [w for _, warnings in self._results.values() for w in warnings]
+        return ran
+    
+    def report(self) -> Dict[str, Any]:
+        """Machine-readable results of the last validate() call."""
+        return {
+            'config': str(self.config_path),
+            'valid': not self.errors,
+            'errors': list(self.errors),
+            'warnings': list(self.warnings),
+            'rules': {
+                name: {
+                    'seconds': round(self.timings.get(name, 0.0), 6),
+                    'errors': errors,
+                    'warnings': warnings,
+                }
+                for name, (errors, warnings) in self._results.items()
+            },
+        }
+    
+    def watched_files(self) -> List[Path]:
+        """The config file and every other file the selected rules read."""
+        paths = [self.config_path]
+        paths.extend(self.config_path.parent / name for r in self.rules for name in r.files)
+        return list(dict.fromkeys(paths))
+    
+    def _stamps(self) -> Dict[Path, Optional[Tuple[int, int]]]:
+        return {path: self._file_stamp(path) for path in self.watched_files()}
+    
+    def watch(self, interval: float = 1.0) -> None:
+        """
+        Validate, then keep watching the config file (and the files the rules
+        read, such as mac-addresses.yaml) and revalidate whenever one changes,
+        printing only the errors and warnings that appeared or went away.
+        Only the rules that read a changed section or file run again.
+        Runs until interrupted.
+        """
+        self.validate()
+        self.print_results()
+        print(f"\nWatching {self.config_path} for changes (Ctrl+C to stop)...")
+        
+        loaded = self.config is not None
+        last_stamps = self._stamps()
+        while True:
+            time.sleep(interval)
+            stamps = self._stamps()
+            if stamps == last_stamps:
+                continue
+            # Other files changing doesn't need the config re-read, unless
+            # it didn't parse last time
+            reload = stamps[self.config_path] != last_stamps[self.config_path] or not loaded
+            last_stamps = stamps
+            now = time.strftime('%H:%M:%S')
+            
+            old_errors, old_warnings = self.errors, self.warnings
+            self.errors = []
+            if reload:
+                loaded = self.load_config()
+            if not loaded:
+                # Keep the last results until the file parses again
+                print(f"\n[{now}] ❌ {self.errors[0]}")
+                self.errors = old_errors
+                continue
+            
+            started = time.perf_counter()
+            try:
+                ran = self.run_checks(only_changed=True)
+            except Exception as e:
+                print(f"\n[{now}] ❌ Validation failed: {e}")
+                self.errors = old_errors
+                continue
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            
+            if not ran:
+                continue
+            checked = ', '.join(ran)
+            print(f"\n[{now}] Re-checked {checked} ({elapsed_ms:.1f} ms)")
+            self._print_diff(old_errors, self.errors, "❌ New error", "✅ Fixed")
+            self._print_diff(old_warnings, self.warnings, "⚠️  New warning", "✅ Cleared")
+            if old_errors == self.errors and old_warnings == self.warnings:
+                print("  No change in results")
+            if self.errors:
+                print(f"  Configuration has {len(self.errors)} error(s), "
+                      f"{len(self.warnings)} warning(s)")
+            else:
+                print(f"  Configuration is valid ({len(self.warnings)} warning(s))")
+    
+    @staticmethod
+    def _print_diff(old: List[str], new: List[str], added_label: str, removed_label: str) -> None:
+        for item in new:
+            if item not in old:
+                print(f"  {added_label}: {item}")
+        for item in old:
+            if item not in new:
+                print(f"  {removed_label}: {item}")
+    
     def print_results(self) -> None:
         """Print validation results."""
         if self.errors:
@@ -305,24 +516,180 @@ class ConfigValidator:
             print(f"\n❌ Configuration has {len(self.errors)} error(s)")
 
 
+def validate_file(path: str, only: Optional[List[str]] = None,
+                  skip: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Validate one config file and return its report (runs in a worker process)."""
+    validator = ConfigValidator(path, select_rules(only, skip))
+    started = time.perf_counter()
+    try:
+        validator.validate()
+    except Exception as e:
+        # Not a rule failing (those are caught per rule), e.g. a config
+        # that is not a mapping; keep the rest of the batch going
+        validator.errors.append(f"Validation failed: {type(e).__name__}: {e}")
+    report = validator.report()
+    report['seconds'] = round(time.perf_counter() - started, 6)
+    return report
+
+
+def expand_config_paths(patterns: List[str]) -> List[str]:
+    """Expand files, directories (their *.yaml/*.yml) and glob patterns."""
+    paths = []
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            paths.extend(str(p) for p in sorted(path.glob('*.y*ml')) if p.suffix in ('.yaml', '.yml'))
+        elif glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            paths.append(pattern)
+    # Keep the first occurrence of each path
+    return list(dict.fromkeys(paths))
+
+
+def validate_batch(paths: List[str], only: Optional[List[str]] = None,
+                   skip: Optional[List[str]] = None, jobs: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Validate many config files in parallel, returning reports in input order."""
+    jobs = min(jobs or os.cpu_count() or 1, len(paths))
+    if jobs <= 1:
+        return [validate_file(path, only, skip) for path in paths]
+    
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        # Batch paths per task; a single config validates faster than a
+        # round trip to a worker process
+        chunksize = max(1, len(paths) // (jobs * 4))
+        return list(pool.map(validate_file, paths, [only] * len(paths),
+                             [skip] * len(paths), chunksize=chunksize))
+
+
+def write_junit(reports: List[Dict[str, Any]], output: str) -> None:
+    """Write reports as JUnit XML: one test suite per config, one test case per rule."""
+    suites = ET.Element('testsuites', name='validate_config')
+    for report in reports:
+        suite = ET.SubElement(suites, 'testsuite', name=report['config'],
+                              tests=str(max(1, len(report['rules']))),
+                              time=f"{report['seconds']:.6f}")
+        failures = 0
+        if not report['rules']:
+            # The file could not be loaded, so no rule ran
+            case = ET.SubElement(suite, 'testcase', classname=report['config'], name='load')
+            ET.SubElement(case, 'failure', message=report['errors'][0]).text = '\n'.join(report['errors'])
+            failures = 1
+        for name, result in report['rules'].items():
+            case = ET.SubElement(suite, 'testcase', classname=report['config'], name=name,
+                                 time=f"{result['seconds']:.6f}")
+            if result['errors']:
+                failures += 1
+                ET.SubElement(case, 'failure', message=result['errors'][0]).text = \
+                    '\n'.join(result['errors'])
+            if result['warnings']:
+                ET.SubElement(case, 'system-out').text = \
+                    '\n'.join(f"WARNING: {w}" for w in result['warnings'])
+        suite.set('failures', str(failures))
+    
+    tree = ET.ElementTree(suites)
+    ET.indent(tree)
+    tree.write(output, encoding='utf-8', xml_declaration=True)
+
+
+def print_batch_results(reports: List[Dict[str, Any]], elapsed: float) -> None:
+    """Print a one-line summary per config, with errors listed under failures."""
+    for report in reports:
+        if not report['valid']:
+            print(f"❌ {report['config']}: {len(report['errors'])} error(s)")
+            for error in report['errors']:
+                print(f"  - {error}")
+        elif report['warnings']:
+            print(f"✅ {report['config']} ({len(report['warnings'])} warning(s))")
+        else:
+            print(f"✅ {report['config']}")
+    
+    invalid = sum(1 for r in reports if not r['valid'])
+    print("=" * 60)
+    print(f"{len(reports) - invalid}/{len(reports)} configuration(s) valid in {elapsed:.2f}s")
+
+
 def main():
     """Main entry point."""
-    if len(sys.argv) != 2:
-        print("Usage: python validate_config.py <config_file>")
-        print("\nExample:")
-        print("  python validate_config.py config.yaml")
+    parser = argparse.ArgumentParser(
+        description='Validate esports LAN config files',
+        epilog='Example: python validate_config.py config.yaml'
+    )
+    parser.add_argument('configs', nargs='*', metavar='config',
+                        help='Config file(s), directories of configs, or glob patterns')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and revalidate whenever the file changes')
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help='Seconds between file checks in watch mode (default: 1)')
+    parser.add_argument('--rules', help='Comma-separated rules to run (default: all)')
+    parser.add_argument('--skip', help='Comma-separated rules to skip')
+    parser.add_argument('--list-rules', action='store_true', help='List available rules and exit')
+    parser.add_argument('--jobs', type=int, help='Parallel worker processes (default: CPU count)')
+    parser.add_argument('--json', metavar='FILE', help="Write JSON results to FILE ('-' for stdout)")
+    parser.add_argument('--junit', metavar='FILE', help='Write JUnit XML results to FILE')
+    args = parser.parse_args()
+    
+    if args.list_rules:
+        for r in RULES.values():
+            files = f"  files: {', '.join(r.files)}" if r.files else ''
+            print(f"{r.name:<16} sections: {', '.join(r.sections)}{files}")
+        sys.exit(0)
+    if not args.configs:
+        parser.error('at least one config file is required')
+    
+    only = args.rules.split(',') if args.rules else None
+    skip = args.skip.split(',') if args.skip else None
+    try:
+        rules = select_rules(only, skip)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    paths = expand_config_paths(args.configs)
+    if not paths:
+        print(f"No config files found in: {' '.join(args.configs)}")
         sys.exit(1)
+    batch = len(paths) > 1 or args.json or args.junit or paths[0] not in args.configs
     
-    config_path = sys.argv[1]
+    if args.watch:
+        if batch:
+            parser.error('--watch takes a single config file')
+        validator = ConfigValidator(paths[0], rules)
+        print(f"Validating configuration: {paths[0]}")
+        print("=" * 60)
+        try:
+            validator.watch(args.interval)
+        except KeyboardInterrupt:
+            print("\nStopped watching.")
+        sys.exit(0)
     
-    print(f"Validating configuration: {config_path}")
-    print("=" * 60)
+    if not batch:
+        config_path = paths[0]
+        
+        print(f"Validating configuration: {config_path}")
+        print("=" * 60)
+        
+        validator = ConfigValidator(config_path, rules)
+        is_valid = validator.validate()
+        validator.print_results()
+        
+        sys.exit(0 if is_valid else 1)
     
-    validator = ConfigValidator(config_path)
-    is_valid = validator.validate()
-    validator.print_results()
+    started = time.perf_counter()
+    reports = validate_batch(paths, only, skip, args.jobs)
+    elapsed = time.perf_counter() - started
+    
+    if args.json:
+        payload = json.dumps({'seconds': round(elapsed, 6), 'results': reports}, indent=2)
+        if args.json == '-':
+            print(payload)
+        else:
+            Path(args.json).write_text(payload + '\n')
+    if args.junit:
+        write_junit(reports, args.junit)
+    if args.json != '-':
+        print_batch_results(reports, elapsed)
     
-    sys.exit(0 if is_valid else 1)
+    sys.exit(0 if all(r['valid'] for r in reports) else 1)
 
 
 if __name__ == "__main__":
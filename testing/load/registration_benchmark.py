@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Registration Load Test
+High School Esports LAN Infrastructure
+
+Simulates a registration rush against registration/webapp.py without a real
+file server. The webapp runs in a child process with its file server pool
+replaced by FakeFileServer, which answers the pdbedit/create-user commands
+after a configurable delay. Simulated players then load the form, submit
+it and poll until their account is provisioned.
+
+Reports throughput and p50/p95/p99 latency per endpoint, plus end-to-end
+provisioning time, and saves the results as JSON so runs can be compared
+before and after a change.
+
+Usage:
+    python3 registration_benchmark.py --players 200 --concurrency 50
+    python3 registration_benchmark.py --latency 0.3 --workers 2 --threads 8
+    python3 registration_benchmark.py --output results/baseline.json
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+REGISTRATION_DIR = PROJECT_ROOT / "registration"
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+class FakeFileServer:
+    """Stands in for FileServerPool, answering the webapp's remote commands."""
+
+    def __init__(self, latency=0.1, jitter=0.05, size=4, existing_users=0,
+                 failure_rate=0.0, command_timeout=10):
+        self.latency = latency
+        self.jitter = jitter
+        self.size = size
+        self.failure_rate = failure_rate
+        self.command_timeout = command_timeout
+        self.users = {f'existing{i}' for i in range(existing_users)}
+        self._slots = threading.Semaphore(size)
+        self._lock = threading.Lock()
+
+    def _delay(self, scale=1.0):
+        time.sleep((self.latency + random.uniform(0, self.jitter)) * scale)
+
+    def _create(self, username):
+        """Create one account. Returns (returncode, stdout, stderr)."""
+        if random.random() < self.failure_rate:
+            return 1, '', 'smbpasswd: simulated failure'
+        with self._lock:
+            if username in self.users:
+                return 1, 'User may already exist', ''
+            self.users.add(username)
+        return 0, f'User {username} created successfully\n', ''
+
+    def run(self, command, timeout=None, input=None):
+        """Mimic FileServerPool.run with simulated latency."""
+        # Import here: the webapp module is only loaded in the server process
+        from webapp import USER_EXISTS_EXIT
+
+        with self._slots:
+            returncode, stdout, stderr = 0, '', ''
+
+            if input is not None:
+                # Bulk import: one line of output per account
+                lines = [line.split('\t', 1)[0] for line in input.splitlines() if line]
+                self._delay(1 + 0.1 * len(lines))
+                out = []
+                for username in lines:
+                    if username in self.users:
+                        out.append(f'{username}\texists')
+                        continue
+                    code, _, err = self._create(username)
+                    out.append(f'{username}\tcreated' if code == 0 else f'{username}\tfailed\t{err}')
+                stdout = '\n'.join(out) + '\n'
+
+            elif 'create-user' in command:
+                self._delay()
+                username = re.search(r'pdbedit -u (\S+)', command).group(1)
+                if username in self.users:
+                    returncode = USER_EXISTS_EXIT
+                else:
+                    returncode, stdout, stderr = self._create(username)
+
+            elif 'wc -l' in command:
+                self._delay()
+                stdout = f'{len(self.users)}\n'
+
+            elif 'pdbedit -L' in command:
+                self._delay(1 + len(self.users) / 10000)
+                with self._lock:
+                    stdout = ''.join(f'{name}:1000:\n' for name in sorted(self.users))
+
+            else:
+                returncode, stderr = 1, f'fake file server: unknown command {command!r}'
+
+        return subprocess.CompletedProcess(['ssh', command], returncode, stdout, stderr)
+
+    def close(self):
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Server process
+# ---------------------------------------------------------------------------
+
+def build_app(args):
+    """Import the webapp and swap in the fake file server."""
+    sys.path.insert(0, str(REGISTRATION_DIR))
+    import webapp
+
+    webapp.file_server.close()
+    webapp.file_server = FakeFileServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        size=args.pool_size,
+        existing_users=args.existing_users,
+        failure_rate=args.failure_rate
+    )
+    webapp.registered_count.start()
+    webapp.usernames.start()
+    return webapp.app
+
+
+def serve(args):
+    """Run the webapp with the fake file server (child process entry point)."""
+    if args.workers <= 1:
+        from werkzeug.serving import make_server
+        server = make_server('127.0.0.1', args.port, build_app(args), threaded=True)
+        server.serve_forever()
+        return
+
+    from gunicorn.app.base import BaseApplication
+
+    class BenchmarkServer(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'127.0.0.1:{args.port}')
+            self.cfg.set('workers', args.workers)
+            self.cfg.set('threads', args.threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('backlog', 2048)
+            self.cfg.set('loglevel', 'warning')
+
+        def load(self):
+            return build_app(args)
+
+    os.environ.setdefault('REGISTRATION_SECRET_KEY', 'benchmark')
+    BenchmarkServer().run()
+
+
+def write_config(workdir, args):
+    """Write a throwaway config.yaml for the webapp under test."""
+    config = {
+        'organization': {'name': 'Load Test'},
+        'network': {'file_server_ip': '127.0.0.1'},
+        'registration': {
+            'ssh_pool_size': args.pool_size,
+            'provisioning_workers': args.pool_size,
+            'provisioning_queue_size': args.queue_size,
+            'database': str(workdir / 'registration.db'),
+        },
+    }
+    path = workdir / 'config.yaml'
+    path.write_text(yaml.safe_dump(config))
+    return path
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(args, workdir):
+    """Launch the server process and wait until it answers /health."""
+    env = dict(os.environ, ESPORTS_CONFIG=str(write_config(workdir, args)))
+    cmd = [sys.executable, __file__, '--serve', '--port', str(args.port),
+           '--latency', str(args.latency), '--jitter', str(args.jitter),
+           '--pool-size', str(args.pool_size), '--existing-users', str(args.existing_users),
+           '--failure-rate', str(args.failure_rate),
+           '--workers', str(args.workers), '--threads', str(args.threads)]
+    process = subprocess.Popen(cmd, env=env)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{args.port}/health', timeout=1)
+            return process
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            if process.poll() is not None:
+                break
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Registration server did not start")
+
+
+# ---------------------------------------------------------------------------
+# Load generator
+# ---------------------------------------------------------------------------
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Recorder:
+    """Thread-safe collection of per-endpoint timings."""
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, seconds, ok=True):
+        with self._lock:
+            self.samples.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def timed_request(opener, recorder, endpoint, url, data=None, timeout=30):
+    """Issue one request, record its latency, and return (status, body)."""
+    start = time.perf_counter()
+    try:
+        with opener.open(url, data=data, timeout=timeout) as response:
+            body = response.read().decode()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        body = e.read().decode(errors='replace')
+        status = e.code
+    except (urllib.error.URLError, ConnectionError, socket.timeout) as e:
+        recorder.add(endpoint, time.perf_counter() - start, ok=False)
+        return None, str(e)
+    recorder.add(endpoint, time.perf_counter() - start, ok=status < 400)
+    return status, body
+
+
+def simulate_player(number, base_url, recorder, run_id, poll_interval, provision_timeout):
+    """One player: load the form, register, and wait for the account."""
+    opener = urllib.request.build_opener(NoRedirect)
+    username = f'p{run_id}{number}'[:15]
+
+    timed_request(opener, recorder, 'GET /', f'{base_url}/')
+    timed_request(opener, recorder, 'GET /api/username-available',
+                  f'{base_url}/api/username-available?username={username}')
+
+    form = urllib.parse.urlencode({
+        'username': username,
+        'password': 'benchmark-pass',
+        'confirm_password': 'benchmark-pass',
+        'email': f'{username}@example.com',
+        'team': f'Team {number % 10}',
+    }).encode()
+    submitted = time.perf_counter()
+    status, body = timed_request(opener, recorder, 'POST /register', f'{base_url}/register', form)
+    match = re.search(r'/register/status/([\w-]+)', body or '')
+    if status != 200 or not match:
+        recorder.add('provisioning', time.perf_counter() - submitted, ok=False)
+        return
+
+    job_url = f'{base_url}/register/status/{match.group(1)}'
+    deadline = submitted + provision_timeout
+    while time.perf_counter() < deadline:
+        status, body = timed_request(opener, recorder, 'GET /register/status', job_url)
+        state = json.loads(body).get('state') if status == 200 else 'unknown'
+        if state in ('succeeded', 'failed', 'unknown'):
+            recorder.add('provisioning', time.perf_counter() - submitted, ok=state == 'succeeded')
+            return
+        time.sleep(poll_interval)
+    recorder.add('provisioning', time.perf_counter() - submitted, ok=False)
+
+
+def summarize(recorder, elapsed):
+    """Per-endpoint request counts, throughput and latency percentiles (ms)."""
+    summary = {}
+    for endpoint, samples in sorted(recorder.samples.items()):
+        ordered = sorted(samples)
+        summary[endpoint] = {
+            'requests': len(ordered),
+            'errors': recorder.errors.get(endpoint, 0),
+            'throughput_rps': round(len(ordered) / elapsed, 2),
+            'mean_ms': round(statistics.fmean(ordered) * 1000, 2),
+            'p50_ms': round(percentile(ordered, 50) * 1000, 2),
+            'p95_ms': round(percentile(ordered, 95) * 1000, 2),
+            'p99_ms': round(percentile(ordered, 99) * 1000, 2),
+            'max_ms': round(ordered[-1] * 1000, 2),
+        }
+    return summary
+
+
+def print_summary(summary, elapsed, players):
+    print(f"\n{players} players in {elapsed:.1f}s ({players / elapsed:.1f} registrations/s)")
+    print("=" * 92)
+    print(f"{'Endpoint':<30}{'Requests':>9}{'Errors':>8}{'Req/s':>9}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'Max ms':>9}")
+    print("-" * 92)
+    for endpoint, row in summary.items():
+        print(f"{endpoint:<30}{row['requests']:>9}{row['errors']:>8}{row['throughput_rps']:>9}"
+              f"{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}{row['max_ms']:>9}")
+
+
+def run_benchmark(args):
+    """Start the server, drive the simulated players and save the results."""
+    workdir = Path(tempfile.mkdtemp(prefix='registration-bench-'))
+    args.port = args.port or free_port()
+    base_url = f'http://127.0.0.1:{args.port}'
+    run_id = format(int(time.time()) % 46656, 'x')
+
+    print(f"Starting registration server on {base_url} "
+          f"(fake file server latency {args.latency * 1000:.0f}ms, "
+          f"{'werkzeug threaded' if args.workers <= 1 else f'{args.workers} workers x {args.threads} threads'})")
+    server = start_server(args, workdir)
+    recorder = Recorder()
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for number in range(args.players):
+                pool.submit(simulate_player, number, base_url, recorder, run_id,
+                            args.poll_interval, args.provision_timeout)
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=args.provision_timeout)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    summary = summarize(recorder, elapsed)
+    print_summary(summary, elapsed, args.players)
+
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'parameters': {
+            'players': args.players,
+            'concurrency': args.concurrency,
+            'latency': args.latency,
+            'jitter': args.jitter,
+            'pool_size': args.pool_size,
+            'existing_users': args.existing_users,
+            'failure_rate': args.failure_rate,
+            'workers': args.workers,
+            'threads': args.threads,
+        },
+        'elapsed_seconds': round(elapsed, 3),
+        'registrations_per_second': round(args.players / elapsed, 2),
+        'endpoints': summary,
+    }
+    output = Path(args.output) if args.output else \
+        RESULTS_DIR / f"registration-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + '\n')
+    print(f"\nResults saved to {output}")
+
+    failed = sum(row['errors'] for row in summary.values())
+    return 0 if failed == 0 else 1
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Load-test the registration webapp')
+    parser.add_argument('--players', type=int, default=200, help='Simulated players (default: 200)')
+    parser.add_argument('--concurrency', type=int, default=50,
+                        help='Players active at once (default: 50)')
+    parser.add_argument('--latency', type=float, default=0.2,
+                        help='Fake file server latency per command, seconds (default: 0.2)')
+    parser.add_argument('--jitter', type=float, default=0.05,
+                        help='Random extra latency, seconds (default: 0.05)')
+    parser.add_argument('--pool-size', type=int, default=4,
+                        help='File server sessions / provisioning workers (default: 4)')
+    parser.add_argument('--queue-size', type=int, default=500,
+                        help='Provisioning queue size (default: 500)')
+    parser.add_argument('--existing-users', type=int, default=500,
+                        help='Accounts already on the fake file server (default: 500)')
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help='Fraction of create-user calls that fail (default: 0)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='gunicorn worker processes; 1 uses the werkzeug threaded server')
+    parser.add_argument('--threads', type=int, default=8, help='Threads per gunicorn worker')
+    parser.add_argument('--poll-interval', type=float, default=0.5,
+                        help='Seconds between status polls (default: 0.5)')
+    parser.add_argument('--provision-timeout', type=float, default=120,
+                        help='Give up on a registration after this many seconds')
+    parser.add_argument('--port', type=int, default=0, help='Server port (default: random)')
+    parser.add_argument('--output', help='Results JSON path (default: results/registration-<time>.json)')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    sys.exit(run_benchmark(args))
+
+
+if __name__ == '__main__':
+    main()
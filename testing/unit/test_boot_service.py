@@ -0,0 +1,93 @@
+"""Unit tests for ipxe/scripts/boot_service.py (MAC index, boot script cache)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip('jinja2')
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "ipxe" / "scripts"))
+
+from boot_service import BootScripts, build_index  # noqa: E402
+
+MAC = 'aa:bb:cc:dd:ee:01'
+OTHER = 'aa:bb:cc:dd:ee:02'
+
+
+def test_index_normalizes_macs_and_skips_bad_entries():
+    index = build_index({'mac_mappings': {'AA-BB-CC-DD-EE-01': 'enterprise', 'not-a-mac': 'x', OTHER: ''}})
+    assert list(index) == [MAC]
+    assert index[MAC] == {'name': 'enterprise', 'mac': MAC, 'hostname': 'ENTERPRISE'}
+
+
+def test_index_prefix_uppercase_and_max_length():
+    data = {
+        'mac_mappings': {MAC: 'Enterprise', OTHER: 'Voyager'},
+        'themes': {'startrek': {'prefix': 'NCC', 'names': ['ENTERPRISE']}},
+        'display': {'show_prefix': True, 'uppercase': False, 'max_length': 12},
+    }
+    index = build_index(data)
+    assert index[MAC]['hostname'] == 'NCC-Enterpri'
+    assert index[OTHER]['hostname'] == 'Voyager'
+
+    data['display'] = {'show_prefix': False}
+    assert build_index(data)[MAC]['hostname'] == 'ENTERPRISE'
+
+
+def test_overrides_by_name_or_mac():
+    index = build_index({
+        'mac_mappings': {MAC: 'enterprise', 'AA-BB-CC-DD-EE-02': 'voyager'},
+        'boot_overrides': {
+            'ENTERPRISE': {'maintenance': True},
+            OTHER: {'default_boot': 'local'},
+        },
+    })
+    assert index[MAC]['maintenance'] is True
+    assert index[OTHER]['default_boot'] == 'local'
+    assert 'maintenance' not in index[OTHER]
+
+
+@pytest.fixture
+def scripts(tmp_path):
+    (tmp_path / 'config').mkdir()
+    (tmp_path / 'config.yaml').write_text("organization:\n  name: Test High\n")
+    (tmp_path / 'config' / 'mac-addresses.yaml').write_text(f"mac_mappings:\n  '{MAC}': enterprise\n")
+    template = tmp_path / 'boot.ipxe.j2'
+    template.write_text("{{ organization.name }} {{ machine.hostname | default('menu') }}"
+                        " {{ machine.default_boot | default('windows') }}")
+    return BootScripts(tmp_path / 'config.yaml', template, check_interval=0)
+
+
+def test_scripts_are_cached_per_mac(scripts):
+    assert scripts.script(MAC.upper()) == b"Test High ENTERPRISE windows"
+    assert scripts.script(MAC) == b"Test High ENTERPRISE windows"
+    assert scripts.script(OTHER) == b"Test High menu windows"
+    assert scripts.script('garbage') == b"Test High menu windows"
+    assert (scripts.renders, scripts.hits) == (2, 2)
+
+
+def test_mac_file_change_invalidates_cache(scripts, tmp_path):
+    scripts.script(MAC)
+    (tmp_path / 'config' / 'mac-addresses.yaml').write_text(
+        f"mac_mappings:\n  '{MAC}': voyager\nboot_overrides:\n  voyager:\n    default_boot: local\n")
+    assert scripts.script(MAC) == b"Test High VOYAGER local"
+    assert scripts.renders == 2
+
+
+def test_render_overlapping_invalidation_is_not_cached(scripts):
+    template = scripts.template
+
+    class Racing:
+        def render(self, *args, **kwargs):
+            body = template.render(*args, **kwargs)
+            scripts._invalidate('config.yaml')  # another thread saw a change mid-render
+            return body
+
+    scripts.template = Racing()
+    scripts.script(MAC)
+    assert scripts.cache == {}
+    scripts.template = template
+    scripts.script(MAC)
+    assert MAC in scripts.cache
@@ -0,0 +1,133 @@
+"""Unit tests for scripts/boot_waves.py (wave admission, stage tracking, log tailing)."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+import boot_waves  # noqa: E402
+from boot_waves import LogTail, Orchestrator  # noqa: E402
+from fleet_controller import Inventory  # noqa: E402
+
+MACS = [f"aa:bb:cc:dd:ee:{n:02x}" for n in range(1, 7)]
+
+
+@pytest.fixture
+def fleet(tmp_path):
+    (tmp_path / 'config').mkdir()
+    (tmp_path / 'config' / 'mac-addresses.yaml').write_text(
+        "mac_mappings:\n" + ''.join(f"  '{mac}': PC{n}\n" for n, mac in enumerate(MACS, 1))
+    )
+    leases = tmp_path / 'dnsmasq.leases'
+    leases.write_text(f"1000 {MACS[0]} 192.168.1.150 pc1 *\n")
+    return tmp_path, leases
+
+
+def orchestrator(fleet, **options):
+    config_dir, leases = fleet
+    inventory = Inventory(config_dir, leases)
+    options.setdefault('wave_size', 2)
+    return Orchestrator(inventory.all_named(), inventory, '192.168.1.255',
+                        access_log=config_dir / 'access.log', leases=leases, **options)
+
+
+def send(orch, now):
+    """Mark the next wave as woken without sending packets."""
+    for boot in orch.waves[len(orch.wave_sent)]:
+        boot.woken = now
+        boot.old_lease = orch.inventory.lease_expiry.get(boot.host.mac)
+    orch.wave_sent.append(now)
+
+
+def test_first_wave_admitted(fleet):
+    assert orchestrator(fleet)._admit(100.0) is None
+
+
+def test_minimum_gap(fleet):
+    orch = orchestrator(fleet, min_gap=15, max_booting=10)
+    send(orch, 100.0)
+    assert orch._admit(110.0) == 'minimum gap'
+    assert orch._admit(116.0) is None
+
+
+def test_booting_cap(fleet):
+    orch = orchestrator(fleet, min_gap=0, max_booting=3)
+    send(orch, 100.0)
+    assert orch._admit(101.0) == '2 still booting'
+    orch.waves[0][0].up = 150.0
+    assert orch._admit(151.0) is None
+
+
+def test_cap_below_wave_size_still_admits_one_wave(fleet):
+    orch = orchestrator(fleet, min_gap=0, max_booting=1)
+    assert orch._admit(100.0) is None
+
+
+def test_rate_cap(fleet):
+    orch = orchestrator(fleet, max_rate=1.0)
+    orch.requests.extend([100.0] * 20)  # 2 req/s over the window
+    assert orch._admit(100.0) == 'nginx at 2 req/s'
+    assert orch._admit(100.0 + boot_waves.RATE_WINDOW + 1) is None
+
+
+def test_old_ip_is_not_probed_before_new_lease(fleet, monkeypatch):
+    probed = []
+
+    async def fake_probe(ip, timeout, port):
+        probed.append(ip)
+        return True
+
+    monkeypatch.setattr(boot_waves, 'probe', fake_probe)
+    orch = orchestrator(fleet)
+    send(orch, 100.0)
+    pc1 = orch.waves[0][0]
+    assert pc1.ip == '192.168.1.150'  # known from the old lease
+
+    orch._observe(101.0)
+    assert probed == [] and pc1.up is None
+
+    _, leases = fleet
+    leases.write_text(f"2000 {MACS[0]} 192.168.1.160 pc1 *\n")
+    orch._observe(130.0)
+    assert (pc1.dhcp, pc1.ip, pc1.up) == (130.0, '192.168.1.160', 130.0)
+    assert probed == ['192.168.1.160']
+
+
+def test_log_tail_reads_only_new_complete_lines(tmp_path):
+    log = tmp_path / 'access.log'
+    log.write_text("before start\n")
+    tail = LogTail(log)
+    assert tail.read() == []
+    with open(log, 'a') as f:
+        f.write("one\ntwo\npart")
+    assert tail.read() == ['one', 'two']
+    with open(log, 'a') as f:
+        f.write("ial\n")
+    assert tail.read() == ['partial']
+
+
+def test_log_tail_follows_rotation_and_truncation(tmp_path):
+    log = tmp_path / 'access.log'
+    log.write_text("old line\n")
+    tail = LogTail(log)
+
+    rotated = tmp_path / 'access.log.new'
+    rotated.write_text("first after rotate\n")
+    os.replace(rotated, log)
+    assert tail.read() == ['first after rotate']
+
+    log.write_text("")  # copytruncate
+    assert tail.read() == []
+    log.write_text("after truncate\n")
+    assert tail.read() == ['after truncate']
+
+
+def test_log_tail_missing_file(tmp_path):
+    tail = LogTail(tmp_path / 'missing.log')
+    assert tail.read() == []
+    (tmp_path / 'missing.log').write_text("created\n")
+    assert tail.read() == ['created']
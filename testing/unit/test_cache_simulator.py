@@ -0,0 +1,68 @@
+"""Unit tests for tools/cache_simulator.py (slice LRU against a reference model)."""
+
+import random
+import sys
+from collections import OrderedDict
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "tools"))
+
+from cache_simulator import ObjectLRU, SliceLRU  # noqa: E402
+
+
+class ReferenceLRU:
+    """One OrderedDict entry per slice: slow, but obviously right."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.slices = OrderedDict()
+
+    def request(self, obj: int, start: int, end: int) -> int:
+        hits = 0
+        for index in range(start, end):
+            key = (obj, index)
+            if key in self.slices:
+                hits += 1
+                self.slices.move_to_end(key)
+            else:
+                self.slices[key] = None
+                while len(self.slices) > self.capacity:
+                    self.slices.popitem(last=False)
+        return hits
+
+
+def test_split_pieces_keep_their_age():
+    # The right piece of a cut extent must be evicted before later slices
+    # of the same original request
+    cache, reference = SliceLRU(40), ReferenceLRU(40)
+    for request in [(0, 1, 50), (0, 31, 34), (0, 25, 26), (1, 5, 25), (0, 31, 43)]:
+        assert cache.request(*request) == reference.request(*request), request
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_matches_reference_lru(seed):
+    rng = random.Random(seed)
+    capacity = rng.choice([1, 2, 3, 5, 8, 13, 20, 40, 80])
+    objects = rng.randint(1, 4)
+    span = rng.choice([10, 30, 100])
+    cache, reference = SliceLRU(capacity), ReferenceLRU(capacity)
+    for n in range(60):
+        obj = rng.randrange(objects)
+        start = rng.randrange(span)
+        end = start + rng.randint(1, rng.choice([2, 10, span]))
+        assert cache.request(obj, start, end) == reference.request(obj, start, end), \
+            f"request {n}: {(obj, start, end)}"
+        assert cache.used == len(reference.slices)
+
+
+def test_object_lru_is_all_or_nothing():
+    cache = ObjectLRU(100, {1: 60, 2: 60, 3: 200})
+    assert cache.request(1, 0, 60) == 0
+    assert cache.request(1, 0, 60) == 60
+    assert cache.request(2, 0, 60) == 0  # evicts 1
+    assert cache.request(1, 0, 60) == 0
+    assert cache.request(3, 0, 200) == 0  # never fits
+    assert 3 not in cache.entries
@@ -0,0 +1,52 @@
+"""Unit tests for scripts/config_loader.py (disk cache)."""
+
+import os
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+import config_loader  # noqa: E402
+from config_loader import load_yaml  # noqa: E402
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    path = tmp_path / 'cache'
+    monkeypatch.setattr(config_loader, 'CACHE_DIR', path)
+    return path
+
+
+def write(path: Path, text: str) -> None:
+    stat_before = path.stat() if path.exists() else None
+    path.write_text(text)
+    if stat_before:
+        os.utime(path, ns=(stat_before.st_atime_ns, stat_before.st_mtime_ns + 1_000_000_000))
+
+
+def test_one_owner_only_entry_per_file(cache_dir, tmp_path):
+    config = tmp_path / 'config.yaml'
+    old_umask = os.umask(0o022)
+    try:
+        for password in ('first', 'second', 'third'):
+            write(config, f"admin_password: {password}\n")
+            assert load_yaml(config) == {'admin_password': password}
+    finally:
+        os.umask(old_umask)
+
+    [entry] = cache_dir.iterdir()
+    assert stat.S_IMODE(entry.stat().st_mode) == 0o600
+    assert b'first' not in entry.read_bytes()
+
+
+def test_stale_entry_is_not_reused(cache_dir, tmp_path):
+    config = tmp_path / 'config.yaml'
+    write(config, "value: 1\n")
+    load_yaml(config)
+    config_loader._memory_cache.clear()
+    write(config, "value: 2\n")
+    assert load_yaml(config) == {'value': 2}
@@ -0,0 +1,109 @@
+"""Unit tests for scripts/validate_config.py (rule registry, incremental re-checks)."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+from game_catalog import PREFILL_SCRIPT  # noqa: E402
+from network_conflicts import MAC_ADDRESSES_FILE  # noqa: E402
+from validate_config import (  # noqa: E402
+    RULES, ConfigValidator, select_rules, validate_batch, validate_file, write_junit,
+)
+
+
+def test_rules_registered_in_method_order():
+    assert list(RULES)[:3] == ['required_fields', 'network', 'address_conflicts']
+    for r in RULES.values():
+        assert callable(getattr(ConfigValidator, r.method))
+
+
+def test_select_rules():
+    assert [r.name for r in select_rules(['games', 'network'])] == ['network', 'games']
+    assert 'security' not in [r.name for r in select_rules(skip=['security'])]
+    with pytest.raises(ValueError, match='nope'):
+        select_rules(['nope'])
+
+
+def test_rules_declare_the_files_they_read():
+    assert MAC_ADDRESSES_FILE in RULES['address_conflicts'].files
+    assert str(PREFILL_SCRIPT) in RULES['vm_resources'].files
+
+
+@pytest.fixture
+def site(tmp_path):
+    config = yaml.safe_load((PROJECT_ROOT / 'config.example.yaml').read_text())
+    path = tmp_path / 'config.yaml'
+    path.write_text(yaml.safe_dump(config))
+    macs = tmp_path / MAC_ADDRESSES_FILE
+    macs.parent.mkdir()
+    macs.write_text("mac_mappings:\n  'aa:bb:cc:dd:ee:01': ENTERPRISE\n")
+    return path
+
+
+def touch_later(path: Path, text: str) -> None:
+    """Rewrite a file with an mtime that is sure to differ from the last one."""
+    stat = path.stat()
+    path.write_text(text)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_watched_files_cover_rule_files(site):
+    validator = ConfigValidator(site)
+    watched = validator.watched_files()
+    assert watched[0] == site
+    assert site.parent / MAC_ADDRESSES_FILE in watched
+    assert PREFILL_SCRIPT in watched
+    assert len(watched) == len(set(watched))
+
+
+def test_mac_file_edit_rechecks_only_address_conflicts(site):
+    validator = ConfigValidator(site)
+    validator.validate()
+    assert not any('mapped more than once' in e for e in validator.errors)
+
+    touch_later(site.parent / MAC_ADDRESSES_FILE,
+                "mac_mappings:\n  'aa:bb:cc:dd:ee:01': ENTERPRISE\n  'AA:BB:CC:DD:EE:01': VOYAGER\n")
+    assert validator.run_checks(only_changed=True) == ['address_conflicts']
+    assert any('mapped more than once' in e for e in validator.errors)
+
+
+def test_unchanged_inputs_recheck_nothing(site):
+    validator = ConfigValidator(site)
+    validator.validate()
+    assert validator.run_checks(only_changed=True) == []
+
+
+def test_crashing_rule_is_reported_on_that_rule(site):
+    config = yaml.safe_load(site.read_text())
+    config['vms']['file_server']['memory'] = '16G'
+    site.write_text(yaml.safe_dump(config))
+
+    report = validate_file(str(site))
+    assert not report['valid']
+    [error] = report['rules']['vm_resources']['errors']
+    assert error.startswith('Rule vm_resources failed: TypeError')
+    # The other rules still ran
+    assert set(report['rules']) == set(RULES)
+
+
+def test_batch_survives_bad_configs(site, tmp_path):
+    config = yaml.safe_load(site.read_text())
+    config['vms']['file_server']['memory'] = '16G'
+    bad = tmp_path / 'bad.yaml'
+    bad.write_text(yaml.safe_dump(config))
+    not_a_mapping = tmp_path / 'list.yaml'
+    not_a_mapping.write_text('- just\n- a list\n')
+
+    reports = validate_batch([str(site), str(bad), str(not_a_mapping)], jobs=2)
+    assert [r['config'] for r in reports] == [str(site), str(bad), str(not_a_mapping)]
+    assert [r['valid'] for r in reports] == [True, False, False]
+
+    junit = tmp_path / 'results.xml'
+    write_junit(reports, str(junit))
+    assert 'Rule vm_resources failed' in junit.read_text()
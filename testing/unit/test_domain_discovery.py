@@ -0,0 +1,111 @@
+"""Unit tests for lancache/scripts/domain_discovery.py (trie matching, candidate grouping)."""
+
+import json
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "lancache" / "scripts"))
+
+from domain_discovery import (  # noqa: E402
+    Classifier, DomainTrie, load_cache_domains, suggest_candidates,
+)
+
+
+def trie(*patterns):
+    domains = DomainTrie()
+    for pattern, group in patterns:
+        domains.add(pattern, group)
+    return domains
+
+
+def test_exact_match():
+    domains = trie(('lancache.steamcontent.com', 'steam'))
+    assert domains.match('lancache.steamcontent.com') == 'steam'
+    assert domains.match('steamcontent.com') is None
+    assert domains.match('x.lancache.steamcontent.com') is None
+
+
+def test_wildcard_matches_subdomains_only():
+    domains = trie(('*.steamcontent.com', 'steam'))
+    assert domains.match('cache1.steamcontent.com') == 'steam'
+    assert domains.match('a.b.steamcontent.com') == 'steam'
+    assert domains.match('steamcontent.com') is None
+
+
+def test_deepest_match_wins():
+    domains = trie(('*.example.com', 'generic'), ('*.cdn.example.com', 'cdn'),
+                   ('dl.example.com', 'dl'))
+    assert domains.match('edge1.cdn.example.com') == 'cdn'
+    assert domains.match('www.example.com') == 'generic'
+    assert domains.match('dl.example.com') == 'dl'
+
+
+def test_non_match():
+    domains = trie(('*.steamcontent.com', 'steam'))
+    assert domains.match('steamcontent.org') is None
+    assert domains.match('notsteamcontent.com') is None
+    assert domains.match('com') is None
+
+
+def test_loads_uklans_layout(tmp_path):
+    (tmp_path / 'steam.txt').write_text("# Steam\nlancache.steamcontent.com\n*.steamcontent.com\n\n")
+    (tmp_path / 'cache_domains.json').write_text(json.dumps({'cache_domains': [
+        {'name': 'steam', 'domain_files': ['steam.txt']},
+        {'name': 'inline', 'domains': ['dl.example.com']},
+    ]}))
+    domains = load_cache_domains(tmp_path / 'cache_domains.json')
+    assert domains.size == 3
+    assert domains.match('cache9.steamcontent.com') == 'steam'
+    assert domains.match('dl.example.com') == 'inline'
+
+
+def classify(lines, domains=None):
+    classifier = Classifier(domains or trie(('*.steamcontent.com', 'steam')))
+    log = ''.join(
+        f"client @0x7f3c 192.168.1.{client}#53122 ({name}): query: {name} IN {qtype} + (172.18.0.2)\n"
+        for name, client, qtype in lines
+    )
+    classifier.consume(log.encode())
+    return classifier
+
+
+def test_classifier_skips_cached_and_ignored_names():
+    classifier = classify([
+        ('cache1.steamcontent.com', 1, 'A'),
+        ('dl.example.com', 1, 'A'),
+        ('dl.example.com', 2, 'AAAA'),
+        ('1.1.168.192.in-addr.arpa', 1, 'PTR'),
+        ('printer.local', 1, 'A'),
+    ])
+    assert classifier.cached == {'steam': 1}
+    assert dict(classifier.uncached) == {'dl.example.com': 2}
+    assert classifier.clients['dl.example.com'] == {b'192.168.1.1', b'192.168.1.2'}
+
+
+def test_siblings_group_into_wildcard():
+    lines = [(f"edge{n}.cdn.example.com", n, 'A') for n in range(1, 4) for _ in range(n)]
+    lines += [('cdn.example.com', 9, 'A'), ('dl.other.net', 1, 'A'), ('dl.other.net', 2, 'A')]
+    candidates = suggest_candidates(classify(lines), wildcard_after=3)
+    by_pattern = {c.pattern: c for c in candidates}
+
+    assert set(by_pattern) == {'*.cdn.example.com', 'cdn.example.com', 'dl.other.net'}
+    wildcard = by_pattern['*.cdn.example.com']
+    assert (wildcard.queries, wildcard.clients) == (6, 3)
+    assert wildcard.hostnames == ['edge3.cdn.example.com', 'edge2.cdn.example.com',
+                                  'edge1.cdn.example.com']
+    assert candidates[0].pattern == '*.cdn.example.com'  # most queries first
+
+
+def test_few_siblings_stay_exact():
+    lines = [('edge1.cdn.example.com', 1, 'A'), ('edge2.cdn.example.com', 1, 'A'),
+             ('www.example.com', 1, 'A')]
+    candidates = suggest_candidates(classify(lines), wildcard_after=3)
+    assert sorted(c.pattern for c in candidates) == [
+        'edge1.cdn.example.com', 'edge2.cdn.example.com', 'www.example.com']
+
+
+def test_min_queries_and_cdn_only():
+    lines = [('dl.example.com', 1, 'A')] * 3 + [('www.example.com', 1, 'A')] * 3 + [('cdn.rare.net', 1, 'A')]
+    candidates = suggest_candidates(classify(lines), min_queries=2, cdn_only=True)
+    assert [c.pattern for c in candidates] == ['dl.example.com']
@@ -0,0 +1,52 @@
+"""Unit tests for registration/fileserver.py (against a fake ssh on PATH)."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "registration"))
+
+from fileserver import FileServerError, FileServerPool  # noqa: E402
+
+# Masters "connect" instantly; commands echo, or hang when asked to
+FAKE_SSH = """#!/bin/sh
+echo "$*" >> "$SSH_LOG"
+case "$*" in
+    *ControlMaster=yes*|*"-O exit"*) exit 0 ;;
+esac
+for arg; do command=$arg; done
+case "$command" in
+    hang) sleep 5 ;;
+    *) echo "ran $command" ;;
+esac
+"""
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    (bin_dir / 'ssh').write_text(FAKE_SSH)
+    (bin_dir / 'ssh').chmod(0o755)
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv('SSH_LOG', str(tmp_path / 'ssh.log'))
+    pool = FileServerPool('fileserver', size=1, command_timeout=0.5)
+    yield pool
+    pool.close()
+
+
+def test_run_over_pooled_session(pool):
+    assert pool.run('true').stdout == 'ran true\n'
+
+
+def test_timeout_raises_and_resets_slot(pool, tmp_path):
+    pool.run('true')
+    with pytest.raises(FileServerError, match='did not respond'):
+        pool.run('hang')
+    assert pool._connected == [False]
+    # The slot went back to the pool and starts a new master on next use
+    assert pool.run('true').stdout == 'ran true\n'
+    assert (tmp_path / 'ssh.log').read_text().count('ControlMaster=yes') == 2
@@ -0,0 +1,111 @@
+"""Unit tests for scripts/fleet_controller.py (target resolution)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+from config_loader import Config  # noqa: E402
+from fleet_controller import Host, Inventory, resolve_targets, wake_targets  # noqa: E402
+
+CONFIG = Config({'network': {'dhcp_range_start': '192.168.1.100', 'dhcp_range_end': '192.168.1.109'}})
+ENTERPRISE, VOYAGER, DEFIANT = 'aa:bb:cc:dd:ee:01', 'aa:bb:cc:dd:ee:02', 'aa:bb:cc:dd:ee:03'
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    (tmp_path / 'config').mkdir()
+    (tmp_path / 'config' / 'mac-addresses.yaml').write_text(
+        f"mac_mappings:\n  '{ENTERPRISE}': ENTERPRISE\n  '{VOYAGER}': VOYAGER\n  '{DEFIANT}': DEFIANT\n"
+    )
+    (tmp_path / 'config' / 'clusters.yaml').write_text(
+        "bridge:\n  - enterprise\n  - 192.168.1.120\nghosts:\n  - ENTERPRISE\n  - ROMULAN\n"
+    )
+    leases = tmp_path / 'dnsmasq.leases'
+    leases.write_text(f"1000 {ENTERPRISE} 192.168.1.101 enterprise *\n"
+                      f"1000 {VOYAGER} 192.168.1.150 voyager *\n")
+    return Inventory(tmp_path, leases)
+
+
+def resolve(inventory, target, value=None):
+    return resolve_targets(target, value, CONFIG, inventory)
+
+
+def ips(hosts):
+    return [host.ip for host in hosts]
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('100-102', ['192.168.1.100', '192.168.1.101', '192.168.1.102']),
+    ('192.168.2.5-6', ['192.168.2.5', '192.168.2.6']),
+    ('192.168.1.254-192.168.2.1', ['192.168.1.254', '192.168.1.255', '192.168.2.0', '192.168.2.1']),
+    (' 101 - 101 ', ['192.168.1.101']),
+])
+def test_range(inventory, value, expected):
+    assert ips(resolve(inventory, 'range', value)) == expected
+
+
+def test_range_names_known_machines(inventory):
+    hosts = resolve(inventory, 'range', '100-101')
+    assert hosts == [Host('192.168.1.100'), Host('192.168.1.101', 'ENTERPRISE', ENTERPRISE)]
+
+
+@pytest.mark.parametrize('value, message', [
+    ('1-2-3', "invalid range '1-2-3': expected START-END"),
+    ('100', "invalid range '100': expected START-END"),
+    ('100-', "invalid range '100-': expected START-END"),
+    ('abc-5', "invalid range 'abc-5': 192.168.1.abc is not an IPv4 address"),
+    ('100-300', "invalid range '100-300': 192.168.1.300 is not an IPv4 address"),
+    ('150-100', "range 192.168.1.150-192.168.1.100 is empty"),
+])
+def test_bad_range(inventory, value, message):
+    with pytest.raises(ValueError, match=message):
+        resolve(inventory, 'range', value)
+
+
+def test_ip(inventory):
+    assert resolve(inventory, 'ip', '192.168.1.150') == [Host('192.168.1.150', 'VOYAGER', VOYAGER)]
+    with pytest.raises(ValueError):
+        resolve(inventory, 'ip', '192.168.1')
+
+
+def test_machine_by_name_or_ip(inventory):
+    assert resolve(inventory, 'machine', 'voyager') == [Host('192.168.1.150', 'VOYAGER', VOYAGER)]
+    assert resolve(inventory, 'machine', 'DEFIANT') == [Host(None, 'DEFIANT', DEFIANT)]  # no lease
+    assert resolve(inventory, 'machine', '192.168.1.101') == [Host('192.168.1.101', 'ENTERPRISE', ENTERPRISE)]
+    with pytest.raises(ValueError, match="unknown machine 'ROMULAN'"):
+        resolve(inventory, 'machine', 'ROMULAN')
+
+
+def test_cluster(inventory):
+    hosts = resolve(inventory, 'cluster', 'bridge')
+    assert hosts == [Host('192.168.1.101', 'ENTERPRISE', ENTERPRISE), Host('192.168.1.120')]
+    with pytest.raises(ValueError, match="cluster 'ghosts': unknown machine 'ROMULAN'"):
+        resolve(inventory, 'cluster', 'ghosts')
+    with pytest.raises(ValueError, match=r"unknown cluster 'engineering' \(defined: bridge, ghosts\)"):
+        resolve(inventory, 'cluster', 'engineering')
+
+
+def test_missing_value(inventory):
+    with pytest.raises(ValueError, match="--target machine needs a value"):
+        resolve(inventory, 'machine')
+
+
+def test_all_is_the_dhcp_range(inventory):
+    hosts = resolve(inventory, 'all')
+    assert ips(hosts) == [f'192.168.1.{n}' for n in range(100, 110)]
+    assert [host.name for host in hosts if host.name] == ['ENTERPRISE']
+
+
+def test_wake_all_adds_named_macs(inventory):
+    hosts = wake_targets(resolve(inventory, 'all'), inventory)
+    # ENTERPRISE once (from its lease), the others from mac-addresses.yaml;
+    # addresses without a known MAC can't be woken
+    assert hosts == [
+        Host('192.168.1.101', 'ENTERPRISE', ENTERPRISE),
+        Host('192.168.1.150', 'VOYAGER', VOYAGER),
+        Host(None, 'DEFIANT', DEFIANT),
+    ]
@@ -0,0 +1,105 @@
+"""Unit tests for registration/jobs.py (job queue, store I/O outside the lock)."""
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "registration"))
+
+from jobs import QUEUED, SUCCEEDED, DuplicateJob, JobQueue, QueueFull  # noqa: E402
+
+
+class SlowStore:
+    """In-memory stand-in for RegistrationStore whose writes can be held open."""
+
+    def __init__(self):
+        self.jobs = {}
+        self.hold = threading.Event()
+        self.hold.set()
+        self.writing = threading.Event()
+
+    def save_job(self, job):
+        self.writing.set()
+        assert self.hold.wait(5)
+        self.jobs[job['id']] = dict(job)
+
+    def load_job(self, job_id):
+        return self.jobs.get(job_id)
+
+    def job_pending(self, key, max_age):
+        return any(job['key'] == key and job['state'] in ('queued', 'running')
+                   for job in self.jobs.values())
+
+    def prune_jobs(self, before):
+        pass
+
+
+def wait_until_finished(jobs, job_id):
+    for _ in range(500):
+        status = jobs.status(job_id)
+        if status['state'] not in (QUEUED, 'running'):
+            return status
+        threading.Event().wait(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_runs_and_hides_password():
+    jobs = JobQueue(lambda username, password: (True, f"created {username}"), workers=1)
+    job_id = jobs.submit(key='alice', username='alice', password='secret')
+    status = wait_until_finished(jobs, job_id)
+    assert status['state'] == SUCCEEDED
+    assert status['message'] == 'created alice'
+    assert 'password' not in status['params']
+
+
+def test_duplicate_key_and_full_queue():
+    release = threading.Event()
+    jobs = JobQueue(lambda **params: (release.wait(5), ''), workers=1, max_pending=1)
+    jobs.submit(key='a')
+    for _ in range(500):
+        if jobs.in_flight:
+            break
+        threading.Event().wait(0.01)
+    with pytest.raises(DuplicateJob):
+        jobs.submit(key='a')
+    # One running, one queued; the next doesn't fit
+    jobs.submit(key='b')
+    with pytest.raises(QueueFull):
+        jobs.submit(key='c')
+    release.set()
+
+
+def test_pending_in_another_process():
+    store = SlowStore()
+    store.jobs['other'] = {'id': 'other', 'key': 'alice', 'state': 'running'}
+    jobs = JobQueue(lambda **params: (True, ''), workers=1, store=store)
+    with pytest.raises(DuplicateJob):
+        jobs.submit(key='alice')
+    # The rejected submit gave its reservation back
+    assert jobs.status(jobs.submit(key='bob')) is not None
+    assert jobs.status('other') == store.jobs['other']
+
+
+def test_status_does_not_wait_for_store_writes():
+    store = SlowStore()
+    jobs = JobQueue(lambda **params: (True, ''), workers=1, store=store)
+    first = jobs.submit(key='a')
+    wait_until_finished(jobs, first)
+
+    store.hold.clear()
+    store.writing.clear()
+    submitter = threading.Thread(target=jobs.submit, kwargs={'key': 'b'})
+    submitter.start()
+    assert store.writing.wait(5)
+
+    polled = []
+    poller = threading.Thread(target=lambda: polled.append(jobs.status(first)))
+    poller.start()
+    poller.join(1)
+    assert polled and polled[0]['state'] == SUCCEEDED  # answered while the save is stuck
+
+    store.hold.set()
+    submitter.join(5)
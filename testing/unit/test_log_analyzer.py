@@ -0,0 +1,73 @@
+"""Unit tests for lancache/scripts/log_analyzer.py (incremental parsing)."""
+
+import random
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "lancache" / "scripts"))
+
+from log_analyzer import Follower, LogStats, render_metrics  # noqa: E402
+
+
+def log_lines(count, seed=0):
+    rng = random.Random(seed)
+    lines = []
+    for n in range(count):
+        cdn = rng.choice(['steam', 'epicgames', 'blizzard'])
+        client = f"10.0.0.{rng.randint(1, 20)}"
+        cache = rng.choice(['HIT', 'MISS', 'MISS', '-'])
+        lines.append(
+            f'[{cdn}] {client} / - - - [17/Oct/2026:14:{n // 60 % 60:02d}:{n % 60:02d} +0000] '
+            f'"GET /depot/{rng.randint(1, 50)}/chunk HTTP/1.1" 200 {rng.randint(0, 10**6)} '
+            f'"-" "Valve/Steam HTTP Client 1.0" "{cache}" "{cdn}.cdn.example" "-"\n'
+        )
+        if n % 97 == 0:
+            lines.append("not a cachelog line\n")
+    return ''.join(lines).encode()
+
+
+def totals(stats):
+    return (stats.requests, stats.bytes, stats.client_bytes, stats.client_span,
+            stats.uncached, stats.lines, stats.unparsed)
+
+
+def test_merged_halves_match_one_pass():
+    data = log_lines(2000)
+    whole = LogStats()
+    whole.consume(data, 0, len(data))
+
+    split = data.index(b'\n', len(data) // 2) + 1
+    first, second = LogStats(), LogStats()
+    first.consume(data, 0, split)
+    second.consume(data, split, len(data))
+    first.merge(second)
+    assert totals(first) == totals(whole)
+
+
+def test_follower_reads_appended_lines(tmp_path):
+    log = tmp_path / 'access.log'
+    data = log_lines(500)
+    split = data.index(b'\n', len(data) // 3) + 1
+    log.write_bytes(data[:split] + b'[steam] partial line')
+    follower = Follower(log, tmp_path / 'checkpoint.json')
+    assert follower.poll()
+    assert follower.offset == split
+
+    log.write_bytes(data)
+    assert follower.poll()
+    assert not follower.poll()
+    whole = LogStats()
+    whole.consume(data, 0, len(data))
+    assert totals(follower.stats) == totals(whole)
+    assert follower.offset == len(data)
+
+
+def test_metrics_have_no_per_object_labels():
+    data = log_lines(2000)
+    stats = LogStats()
+    stats.consume(data, 0, len(data))
+    assert stats.top_uncached()
+    metrics = render_metrics(stats, len(data))
+    assert 'path=' not in metrics and 'host=' not in metrics
+    assert 'lancache_bytes_total{cdn="steam",source="upstream"}' in metrics
@@ -0,0 +1,100 @@
+"""Unit tests for tools/network_calculator.py (boot storm simulation, NIC sizing)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip('numpy')
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "tools"))
+
+from network_calculator import (  # noqa: E402
+    GBPS, Scenario, fair_share, nic_sweep, simulate, summarize,
+)
+import numpy as np  # noqa: E402
+
+
+def scenario(**overrides):
+    """
+    A fleet with no randomness in the first two stages: everyone powers on
+    and logs in at once, the boot image is 1 Gbit and every profile is
+    capped at 0.1 Gbit. No games, so that stage is just the launch delay.
+    """
+    values = dict(
+        clients=10, client_link_gbps=1.0, server_nic_gbps=1.0, uplink_gbps=None,
+        boot_window=0, boot_image_mb=125, os_boot_seconds=0, login_window=0,
+        profile_mb=1000, max_profile_mb=12.5, game_sizes_gb=[], games_per_client=0,
+        download_fraction=1.0, service_caps_gbps={}, seed=1,
+    )
+    values.update(overrides)
+    return Scenario(**values)
+
+
+def test_server_bound_fleet():
+    summary = summarize(simulate(scenario()))
+    times = summary['time_to_ready_seconds']
+    # 10 Gbit of boot images through 1 Gbps, then 1 Gbit of profiles
+    assert times['pxe']['p50'] == pytest.approx(10)
+    assert times['pxe']['p100'] == pytest.approx(10)
+    assert times['profile']['p95'] == pytest.approx(11)
+    assert 11 <= times['games']['p50'] <= 41  # 0-30s to launch the game client
+    assert summary['peak_gbps'] == pytest.approx(1.0)
+    assert summary['peak_utilization'] == pytest.approx(1.0)
+    assert summary['saturated_seconds'] == pytest.approx(11)
+
+
+def test_client_link_bound_fleet():
+    summary = summarize(simulate(scenario(clients=4, server_nic_gbps=10.0)))
+    assert summary['time_to_ready_seconds']['pxe']['p100'] == pytest.approx(1)
+    assert summary['peak_gbps'] == pytest.approx(4.0)
+    assert summary['peak_utilization'] == pytest.approx(0.4)
+    assert summary['saturated_seconds'] == 0
+
+
+def test_uplink_limits_capacity():
+    summary = summarize(simulate(scenario(server_nic_gbps=10.0, uplink_gbps=2.0)))
+    assert summary['time_to_ready_seconds']['pxe']['p50'] == pytest.approx(5)
+    assert summary['peak_gbps'] == pytest.approx(2.0)
+
+
+def test_service_cap_limits_its_stage():
+    summary = summarize(simulate(scenario(
+        clients=4, server_nic_gbps=10.0, game_sizes_gb=[1.25], games_per_client=1,
+        service_caps_gbps={'games': 0.5},
+    )))
+    assert summary['peak_gbps_by_server']['LANCache'] == pytest.approx(0.5)
+    # 40 Gbit in all through at most 0.5 Gbps, starting after the 1.1s desktop
+    games = summary['time_to_ready_seconds']['games']
+    assert games['p100'] >= 1.1 + 40 / 0.5
+
+
+def test_fair_share_water_fills():
+    counts = np.array([2, 0, 4])
+    caps = np.array([np.inf, np.inf, 1.0 * GBPS])  # shared by the games stage's 4 flows
+    rates = fair_share(counts, 1.0 * GBPS, caps, 3.0 * GBPS)
+    assert rates[2] == pytest.approx(0.25 * GBPS)
+    assert rates[0] == pytest.approx(1.0 * GBPS)  # client link bound, not the server
+    rates = fair_share(counts, 1.0 * GBPS, caps, 1.5 * GBPS)
+    assert rates[2] == pytest.approx(0.25 * GBPS)
+    assert rates[0] == pytest.approx(0.25 * GBPS)  # what's left of 1.5 after the capped flows
+    assert rates[1] == 0
+
+
+def test_nic_search_finds_slowest_sufficient_speed():
+    # 100 clients: ready at 110s on 1G, 44s on 2.5G, 22s on 5G, 11s on 10G
+    sweep, needed = nic_sweep(scenario(clients=100), target_desktop=30, target_games=1e9)
+    assert needed == 5
+    profile_p95 = {row['nic_gbps']: row['summary']['time_to_ready_seconds']['profile']['p95']
+                   for row in sweep}
+    assert profile_p95[1] == pytest.approx(110)
+    assert profile_p95[2.5] == pytest.approx(44)
+    assert profile_p95[10] == pytest.approx(11)
+    assert profile_p95[100] == pytest.approx(1.1)  # client links are the limit
+    assert [row['meets_targets'] for row in sweep] == [False, False, True, True, True, True, True]
+
+
+def test_nic_search_when_nothing_is_enough():
+    _, needed = nic_sweep(scenario(clients=100), target_desktop=1, target_games=1e9)
+    assert needed is None
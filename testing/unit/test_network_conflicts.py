@@ -0,0 +1,118 @@
+"""Unit tests for scripts/network_conflicts.py (interval sweep, MAC checks)."""
+
+import ipaddress
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+from network_conflicts import (  # noqa: E402
+    IntervalSet, MacEntry, check_macs, find_conflicts, load_mac_mappings, parse_mac,
+)
+
+NETWORK = {
+    'subnet': '192.168.1.0/24',
+    'gateway': '192.168.1.1',
+    'ipxe_server_ip': '192.168.1.10',
+    'lancache_server_ip': '192.168.1.11',
+    'file_server_ip': '192.168.1.12',
+    'dns_primary': '192.168.1.11',
+    'dhcp_range_start': '192.168.1.100',
+    'dhcp_range_end': '192.168.1.250',
+    'expected_clients': 100,
+}
+
+
+def ip(text):
+    return int(ipaddress.ip_address(text))
+
+
+def pairs(intervals):
+    return {frozenset((a.label, b.label)) for a, b in intervals.overlaps()}
+
+
+def test_overlaps_match_brute_force():
+    intervals = IntervalSet()
+    spans = [(0, 10), (5, 5), (10, 20), (21, 30), (25, 40), (41, 41), (0, 100)]
+    for n, (start, end) in enumerate(spans):
+        intervals.add(start, end, f"i{n}", 'server')
+    expected = {
+        frozenset((f"i{a}", f"i{b}"))
+        for a in range(len(spans)) for b in range(a + 1, len(spans))
+        if spans[a][0] <= spans[b][1] and spans[b][0] <= spans[a][1]
+    }
+    assert pairs(intervals) == expected
+
+
+def test_adjacent_intervals_do_not_overlap():
+    intervals = IntervalSet()
+    intervals.add(0, 9, 'a', 'dhcp')
+    intervals.add(10, 19, 'b', 'dhcp')
+    assert pairs(intervals) == set()
+
+
+def test_clean_network_has_no_conflicts():
+    report = find_conflicts(NETWORK)
+    assert report.errors == []
+    assert report.warnings == []
+
+
+def test_server_inside_dhcp_range():
+    report = find_conflicts({**NETWORK, 'file_server_ip': '192.168.1.120'})
+    assert report.errors == ["network.file_server_ip (192.168.1.120) is inside the "
+                             "DHCP range 192.168.1.100-192.168.1.250 and could be leased to a client"]
+
+
+def test_duplicate_server_ips_but_dns_may_share():
+    report = find_conflicts({**NETWORK, 'file_server_ip': '192.168.1.10'})
+    assert report.errors == ["network.ipxe_server_ip and network.file_server_ip are both 192.168.1.10"]
+
+
+def test_dhcp_range_covering_broadcast():
+    report = find_conflicts({**NETWORK, 'dhcp_range_end': '192.168.1.255'})
+    assert any("broadcast address" in e for e in report.errors)
+
+
+def test_pool_smaller_than_mapped_machines():
+    network = {**NETWORK, 'dhcp_range_start': '192.168.1.200', 'dhcp_range_end': '192.168.1.201'}
+    macs = [MacEntry(f"aa:bb:cc:dd:ee:{n:02x}", f"PC{n}", n + 1) for n in range(3)]
+    report = find_conflicts(network, macs)
+    assert "DHCP range has 2 free IPs but 3 machines are mapped" in report.errors[0]
+
+
+def test_expected_clients_from_yaml_string():
+    report = find_conflicts({**NETWORK, 'expected_clients': '200'})
+    assert report.errors == []
+    assert report.warnings == ["DHCP range provides 151 IPs for up to 200 clients. This may be tight."]
+
+
+def test_bad_expected_clients_is_an_error():
+    report = find_conflicts({**NETWORK, 'expected_clients': 'lots'})
+    assert report.errors == ["network.expected_clients must be a number, got 'lots'"]
+
+
+def test_parse_mac_formats():
+    assert parse_mac('aa:bb:cc:dd:ee:ff') == parse_mac('AA-BB-CC-DD-EE-FF') == parse_mac('aabbccddeeff')
+    with pytest.raises(ValueError):
+        parse_mac('aa:bb:cc-dd:ee:ff')
+
+
+def test_duplicate_macs_and_names():
+    entries = [
+        MacEntry('aa:bb:cc:dd:ee:01', 'ENTERPRISE', 3),
+        MacEntry('AA-BB-CC-DD-EE-01', 'VOYAGER', 4),
+        MacEntry('aa:bb:cc:dd:ee:02', 'enterprise', 5),
+    ]
+    report, unique = check_macs(entries)
+    assert unique == 2
+    assert any("mapped more than once (lines 3, 4)" in e for e in report.errors)
+    assert any("name ENTERPRISE is used by 2 MACs (lines 3, 5)" in e for e in report.errors)
+
+
+def test_load_keeps_repeated_keys(tmp_path):
+    path = tmp_path / 'macs.yaml'
+    path.write_text("mac_mappings:\n  'aa:bb:cc:dd:ee:01': A\n  'aa:bb:cc:dd:ee:01': B\n")
+    assert [(e.name, e.line) for e in load_mac_mappings(path)] == [('A', 2), ('B', 3)]
@@ -0,0 +1,122 @@
+"""Unit tests for lancache/scripts/prefill_scheduler.py (queue order, download admission)."""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "lancache" / "scripts"))
+
+import prefill_scheduler  # noqa: E402
+from config_loader import Config  # noqa: E402
+from game_catalog import Game  # noqa: E402
+from prefill_scheduler import RAMP_UP, Job, PrefillState, Scheduler, build_jobs  # noqa: E402
+
+CATALOG = {
+    'csgo': Game('csgo', 25, 'Steam', '730'),
+    'dota2': Game('dota2', 35, 'Steam', '570'),
+    'overwatch': Game('overwatch', 30, 'Battle.net', 'pro'),
+    'fortnite': Game('fortnite', 30, 'Epic'),
+}
+COMMANDS = dict(prefill_scheduler.PLATFORM_COMMANDS)
+
+
+def jobs_for(games, expected=None):
+    config = Config({'games': {'enabled': games, 'expected_players': expected or {}}})
+    return build_jobs(config, CATALOG, COMMANDS)
+
+
+def test_order_follows_games_enabled_without_expected_players():
+    assert [j.game for j in jobs_for(['dota2', 'overwatch', 'csgo'])] == ['dota2', 'overwatch', 'csgo']
+
+
+def test_expected_players_first_then_smaller_games():
+    jobs = jobs_for(['dota2', 'overwatch', 'csgo'], {'dota2': 40, 'overwatch': 60, 'csgo': 40})
+    assert [(j.game, j.players) for j in jobs] == [('overwatch', 60), ('csgo', 40), ('dota2', 40)]
+
+
+def test_unknown_and_manual_games(capsys):
+    jobs = jobs_for(['fortnite', 'tetris', 'csgo'])
+    assert [j.game for j in jobs] == ['fortnite', 'csgo']
+    assert jobs[0].command is None  # no Epic command: prefilled by hand
+    assert jobs[1].command == ['steamcmd', '+login', 'anonymous', '+app_update', '730', 'validate', '+quit']
+    assert "Unknown game 'tetris'" in capsys.readouterr().out
+
+
+class FakeDownload:
+    """Stands in for a prefill process."""
+
+    def __init__(self, job, log_dir):
+        self.job = job
+        self.started = time.monotonic()
+        self.bytes = 0.0
+
+
+@pytest.fixture
+def scheduler(tmp_path, monkeypatch):
+    monkeypatch.setattr(prefill_scheduler, 'Download', FakeDownload)
+
+    def make(jobs, parallel=3, budget=None):
+        return Scheduler(jobs, PrefillState(tmp_path / 'state.json'), parallel, budget,
+                         None, None, retries=1, log_dir=tmp_path / 'logs')
+    return make
+
+
+def job(game, platform):
+    return Job(game, platform, 10, 1, ['true'])
+
+
+def running(scheduler):
+    return [d.job.game for d in scheduler.running]
+
+
+def test_one_download_per_platform(scheduler):
+    sched = scheduler([job('a', 'Steam'), job('b', 'Steam'), job('c', 'Battle.net')], parallel=3)
+    sched._start_jobs()
+    assert running(sched) == ['a', 'c']
+    assert [j.game for j in sched.queue] == ['b']
+
+
+def test_parallel_limit(scheduler):
+    sched = scheduler([job('a', 'Steam'), job('c', 'Battle.net')], parallel=1)
+    sched._start_jobs()
+    assert running(sched) == ['a']
+
+
+def test_budget_starts_one_download_per_ramp_up(scheduler):
+    sched = scheduler([job('a', 'Steam'), job('c', 'Battle.net')], budget=100e6)
+    sched._start_jobs()
+    assert running(sched) == ['a']
+    sched.last_start -= RAMP_UP  # the first one has had time to ramp up
+    sched._start_jobs()
+    assert running(sched) == ['a', 'c']
+
+
+def test_over_budget_holds_new_downloads(scheduler):
+    sched = scheduler([job('a', 'Steam'), job('c', 'Battle.net')], budget=100e6)
+    sched._start_jobs()
+    sched.last_start -= RAMP_UP  # the first one has had time to ramp up
+
+    sched.rate = 110e6
+    sched._govern()
+    sched._start_jobs()
+    assert running(sched) == ['a']
+
+    sched.rate = 95e6  # between the thresholds: keep holding
+    sched._govern()
+    assert not sched._can_start(time.monotonic())
+
+    sched.rate = 80e6
+    sched._govern()
+    sched._start_jobs()
+    assert running(sched) == ['a', 'c']
+
+
+def test_first_download_starts_despite_other_traffic(scheduler):
+    sched = scheduler([job('a', 'Steam')], budget=100e6)
+    sched.rate = 500e6
+    sched._govern()
+    sched._start_jobs()
+    assert running(sched) == ['a']
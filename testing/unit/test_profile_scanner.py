@@ -0,0 +1,99 @@
+"""Unit tests for fileserver/scripts/profile_scanner.py (incremental scans)."""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "fileserver" / "scripts"))
+
+from profile_scanner import Scanner, load_state, save_state  # noqa: E402
+
+HOUR_AGO = time.time() - 3600
+
+
+def age(path: Path, when: float = HOUR_AGO) -> None:
+    """Give a directory an mtime well outside the racy window."""
+    os.utime(path, (when, when))
+
+
+@pytest.fixture
+def profiles(tmp_path):
+    root = tmp_path / 'profiles'
+    for rel, size in [('alice.V6/Desktop/a.txt', 100), ('alice.V6/AppData/b.bin', 1000),
+                      ('alice.V2/old.txt', 10), ('bob.V6/Documents/c.txt', 50)]:
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'x' * size)
+    for path in sorted(root.rglob('*'), reverse=True):
+        if path.is_dir():
+            age(path)
+    return root
+
+
+def test_first_scan_lists_everything(profiles):
+    scanner = Scanner(profiles, {}, workers=2)
+    users = scanner.scan()
+    assert users == {
+        'alice': {'bytes': 1110, 'files': 3, 'dirs': 4},
+        'bob': {'bytes': 50, 'files': 1, 'dirs': 2},
+    }
+    assert (scanner.listed, scanner.reused) == (6, 0)
+
+
+def test_unchanged_directories_are_reused(profiles):
+    first = Scanner(profiles, {}, workers=2)
+    users = first.scan()
+    second = Scanner(profiles, first.dirs, workers=2)
+    assert second.scan() == users
+    assert (second.listed, second.reused) == (0, 6)
+
+
+def test_only_changed_directory_is_listed(profiles):
+    first = Scanner(profiles, {}, workers=2)
+    first.scan()
+    desktop = profiles / 'alice.V6' / 'Desktop'
+    (desktop / 'new.txt').write_bytes(b'x' * 5)
+    age(desktop, HOUR_AGO + 60)
+
+    second = Scanner(profiles, first.dirs, workers=2)
+    users = second.scan()
+    assert users['alice']['bytes'] == 1115
+    assert second.listed == 1
+    assert second.dirs[os.path.join('alice.V6', 'Desktop')].files == 2
+
+
+def test_recently_modified_directory_is_not_trusted(profiles):
+    first = Scanner(profiles, {}, workers=2)
+    first.scan()
+    documents = profiles / 'bob.V6' / 'Documents'
+    (documents / 'd.txt').write_bytes(b'x')  # mtime is now: inside the racy window
+
+    second = Scanner(profiles, first.dirs, workers=2)
+    second.scan()
+    assert second.dirs[os.path.join('bob.V6', 'Documents')].mtime == 0
+    third = Scanner(profiles, second.dirs, workers=2)
+    third.scan()
+    assert third.listed == 1
+
+
+def test_full_scan_ignores_cache(profiles):
+    first = Scanner(profiles, {}, workers=2)
+    first.scan()
+    full = Scanner(profiles, first.dirs, workers=2, full=True)
+    full.scan()
+    assert (full.listed, full.reused) == (6, 0)
+
+
+def test_cache_survives_state_file(profiles, tmp_path):
+    first = Scanner(profiles, {}, workers=2)
+    first.scan()
+    state_path = tmp_path / 'state.json'
+    save_state(state_path, {'dirs': {rel: list(entry) for rel, entry in first.dirs.items()}})
+
+    second = Scanner(profiles, load_state(state_path)['dirs'], workers=2)
+    second.scan()
+    assert second.reused == 6
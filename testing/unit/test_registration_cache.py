@@ -0,0 +1,110 @@
+"""Unit tests for registration/cache.py (resyncs racing local updates)."""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "registration"))
+
+from cache import RegisteredCountCache, UsernameIndex  # noqa: E402
+from store import RegistrationStore  # noqa: E402
+
+
+class FakeServer:
+    """Lists its accounts as of the start of a fetch; can hold a fetch open."""
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.hold = False
+        self.fetching = threading.Event()
+        self.release = threading.Event()
+
+    def list_names(self):
+        snapshot = list(self.names)
+        if self.hold:
+            self.hold = False
+            self.fetching.set()
+            self.release.wait(5)
+        return snapshot
+
+    def slow_refresh(self, cache):
+        """Start cache.refresh() in a thread and wait until its fetch is in flight."""
+        self.hold = True
+        thread = threading.Thread(target=cache.refresh)
+        thread.start()
+        assert self.fetching.wait(5)
+        return thread
+
+
+def test_seed_loads_before_first_check():
+    server = FakeServer(['Alice'])
+    index = UsernameIndex(server.list_names, resync_interval=3600)
+    assert index.seed()
+    assert index.ready
+    assert 'alice' in index
+
+
+def test_add_during_fetch_survives_resync():
+    server = FakeServer(['alice'])
+    index = UsernameIndex(server.list_names, resync_interval=3600)
+    index.seed()
+
+    thread = server.slow_refresh(index)
+    server.names.append('bob')
+    index.add('Bob')
+    server.release.set()
+    thread.join()
+
+    assert 'bob' in index
+    assert len(index) == 2
+
+
+def test_later_resync_drops_removed_names():
+    server = FakeServer(['alice'])
+    index = UsernameIndex(server.list_names, resync_interval=3600)
+    index.seed()
+    index.add('carol')  # e.g. created, then deleted on the file server
+    index.refresh()
+    assert 'carol' not in index
+
+
+def test_count_includes_registrations_since_fetch_started():
+    server = FakeServer(['alice', 'bob'])
+    created = []  # time.time() of each registration, as the store records them
+
+    def create(name):
+        server.names.append(name)
+        created.append(time.time())
+
+    count = RegisteredCountCache(lambda: len(server.list_names()),
+                                 lambda since: sum(at >= since for at in created) if since else len(created),
+                                 ttl=3600)
+    count.seed()
+    create('carol')  # before the next fetch: included in it
+    time.sleep(0.01)
+
+    thread = server.slow_refresh(count)
+    create('dave')  # during the fetch: only counted through created_since
+    server.release.set()
+    thread.join()
+
+    assert count.get() == 4
+    count.refresh()
+    assert count.get() == 4
+
+
+def test_store_counts_since_at_full_precision(tmp_path):
+    store = RegistrationStore(tmp_path / 'registration.db', flush_interval=0)
+    # Keep alice and started within one second, which int() used to merge
+    while time.time() % 1 > 0.5:
+        time.sleep(0.05)
+    store.record('alice')
+    time.sleep(0.01)
+    started = time.time()
+    store.record('bob')
+    store.flush()
+    assert store.count_since(None) == 2
+    assert store.count_since(started) == 1
+    store.close()
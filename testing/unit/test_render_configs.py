@@ -0,0 +1,125 @@
+"""Unit tests for scripts/render_configs.py (dependency extraction, incremental renders)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+jinja2 = pytest.importorskip("jinja2")
+from render_configs import Renderer, Target, lookup, template_inputs  # noqa: E402
+
+TEMPLATE = """# {{ organization.name }}
+timeout={{ advanced.pxe.timeout_seconds }}
+{% if network.vlan_id is defined %}vlan={{ network.vlan_id }}{% endif %}
+{% for host in static_hosts %}{{ host.mac }}{% endfor %}
+"""
+
+CONFIG = {
+    'organization': {'name': 'Test School'},
+    'advanced': {'pxe': {'timeout_seconds': 5, 'default_boot': 'windows'}},
+    'network': {'subnet': '192.168.1.0/24'},
+    'static_hosts': [],
+}
+
+
+def env():
+    return jinja2.Environment(trim_blocks=True)
+
+
+def test_inputs_keep_whole_attribute_chains():
+    inputs = template_inputs(env(), TEMPLATE)
+    assert 'advanced.pxe.timeout_seconds' in inputs
+    assert 'organization.name' in inputs
+    assert 'advanced' not in inputs
+    assert 'advanced.pxe' not in inputs
+
+
+def test_inputs_mark_defined_tests_and_skip_loop_variables():
+    inputs = template_inputs(env(), TEMPLATE)
+    assert 'network.vlan_id' in inputs          # also read, so no separate '?' entry
+    assert 'network.vlan_id?' not in inputs
+    assert 'static_hosts' in inputs
+    assert not any(path.startswith('host') for path in inputs)
+
+
+def test_inputs_existence_only():
+    inputs = template_inputs(env(), "{% if advanced is defined %}x{% endif %}")
+    assert inputs == ['advanced?']
+
+
+def test_lookup_missing_paths():
+    assert lookup(CONFIG, 'advanced.pxe.timeout_seconds') == 5
+    assert lookup(CONFIG, 'network.vlan_id?') is False
+    assert lookup(CONFIG, 'network.subnet?') is True
+    # A missing leaf fingerprints its nearest parent
+    assert lookup(CONFIG, 'network.vlan_id') == ['<missing>', CONFIG['network']]
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / 'repo'
+    (root / 'conf').mkdir(parents=True)
+    (root / 'conf' / 'a.j2').write_text(TEMPLATE)
+    (root / 'conf' / 'b.j2').write_text("name={{ organization.name }}\n")
+    targets = [Target('conf/a.j2', 'server', '/etc/a.conf', 'a', 'reload a'),
+               Target('conf/b.j2', 'server', '/etc/b.conf', 'b', 'reload b')]
+    return root, tmp_path / 'out', targets
+
+
+def run(tree, config):
+    root, output, targets = tree
+    renderer = Renderer(config, output, targets=targets, root=root)
+    return renderer, {r['target'].template: r['status'] for r in renderer.render()}
+
+
+def test_second_run_renders_nothing(tree):
+    run(tree, CONFIG)
+    _, statuses = run(tree, CONFIG)
+    assert set(statuses.values()) == {'unchanged'}
+
+
+def test_value_change_renders_only_dependent_templates(tree):
+    run(tree, CONFIG)
+    config = {**CONFIG, 'advanced': {'pxe': {'timeout_seconds': 9, 'default_boot': 'windows'}}}
+    renderer, statuses = run(tree, config)
+    assert statuses == {'conf/a.j2': 'rendered', 'conf/b.j2': 'unchanged'}
+    assert 'timeout=9' in renderer.path_of(renderer.targets[0]).read_text()
+
+
+def test_unread_value_change_renders_nothing(tree):
+    run(tree, CONFIG)
+    config = {**CONFIG, 'advanced': {'pxe': {'timeout_seconds': 5, 'default_boot': 'local'}}}
+    _, statuses = run(tree, config)
+    assert set(statuses.values()) == {'unchanged'}
+
+
+def test_source_only_edit_rerenders(tree):
+    root, _, _ = tree
+    run(tree, CONFIG)
+    (root / 'conf' / 'b.j2').write_text("# edited\nname={{ organization.name }}\n")
+    renderer, statuses = run(tree, CONFIG)
+    assert statuses == {'conf/a.j2': 'unchanged', 'conf/b.j2': 'rendered'}
+    assert renderer.path_of(renderer.targets[1]).read_text().startswith('# edited')
+
+
+def test_pending_until_applied(tree):
+    renderer, _ = run(tree, CONFIG)
+    assert [t.template for t in renderer.pending()] == ['conf/a.j2', 'conf/b.j2']
+    renderer.mark_applied(renderer.targets[0])
+    assert [t.template for t in renderer.pending()] == ['conf/b.j2']
+
+
+def test_timezone_defaults_unless_given_as_fact(tree):
+    root, output, _ = tree
+    (root / 'conf' / 'env.j2').write_text("TZ={{ ansible_date_time.tz | default('America/New_York') }}\n")
+    target = Target('conf/env.j2', 'server', '/etc/env')
+    renderer = Renderer(CONFIG, output, targets=[target], root=root)
+    renderer.render()
+    assert renderer.path_of(target).read_text() == 'TZ=America/New_York\n'
+
+    renderer = Renderer(CONFIG, output, {'ansible_date_time.tz': 'America/Chicago'}, targets=[target], root=root)
+    assert [r['status'] for r in renderer.render()] == ['rendered']
+    assert renderer.path_of(target).read_text() == 'TZ=America/Chicago\n'
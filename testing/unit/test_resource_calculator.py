@@ -0,0 +1,131 @@
+"""Unit tests for tools/resource_calculator.py (VM placement, node-failure analysis)."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "tools"))
+
+from resource_calculator import (  # noqa: E402
+    Resources, _Search, capacity_warnings, place, plan,
+)
+
+
+def node(name, cores=10, memory_gb=100, storage_gb=1000):
+    return Resources(name, cores, memory_gb, storage_gb)
+
+
+def vm(name, cores=1, memory_gb=0, storage_gb=0):
+    return Resources(name, cores, memory_gb, storage_gb)
+
+
+# First-fit decreasing puts 4+2+2 on one node (peak 0.8); 4+3 / 3+2+2 gives 0.7
+UNEVEN = [vm('a', 4), vm('b', 3), vm('c', 3), vm('d', 2), vm('e', 2)]
+TWO_NODES = [node('pve1'), node('pve2')]
+
+
+def test_heuristic_alone_is_not_optimal():
+    search = _Search(UNEVEN, TWO_NODES, [], None)
+    greedy, unplaced = search.greedy()
+    assert unplaced == []
+    assert search.peak_with(greedy) == pytest.approx(0.8)
+
+
+def test_exact_search_improves_and_proves_optimal():
+    placement = place(UNEVEN, TWO_NODES, anti_affinity=[])
+    assert placement.peak == pytest.approx(0.7)
+    assert placement.optimal
+    assert placement.unplaced == []
+    loads = {}
+    for name, host in placement.assignment.items():
+        loads[host] = loads.get(host, 0) + next(v.cores for v in UNEVEN if v.name == name)
+    assert sorted(loads.values()) == [7, 7]
+
+
+def test_falls_back_to_heuristic_when_search_budget_runs_out():
+    placement = place(UNEVEN, TWO_NODES, anti_affinity=[], max_steps=1)
+    assert placement.peak == pytest.approx(0.8)
+    assert not placement.optimal
+    assert len(placement.assignment) == len(UNEVEN)
+
+
+@pytest.mark.parametrize('demand', [
+    {'cores': 12},
+    {'memory_gb': 128},
+    {'storage_gb': 2000},
+])
+def test_each_resource_limits_placement(demand):
+    placement = place([vm('big', **{'cores': 1, **demand}), vm('small')], [node('pve1')])
+    assert placement.unplaced == ['big']
+    assert placement.assignment == {'small': 'pve1'}
+
+
+def test_file_server_and_lancache_kept_apart():
+    vms = [vm('file_server', 2), vm('lancache_server', 2), vm('ipxe_server', 1)]
+    placement = place(vms, TWO_NODES)
+    assert placement.anti_affinity
+    assert placement.assignment['file_server'] != placement.assignment['lancache_server']
+
+
+def test_anti_affinity_relaxed_only_when_nothing_else_fits():
+    vms = [vm('file_server', 2), vm('lancache_server', 2)]
+    placement = place(vms, [node('pve1'), node('tiny', cores=1)])
+    assert not placement.anti_affinity
+    assert placement.assignment == {'file_server': 'pve1', 'lancache_server': 'pve1'}
+
+
+def config(nodes, vms, capacity=None):
+    return {
+        'proxmox': {'node_capacity': capacity or {'cores': 8, 'memory_gb': 64, 'storage_gb': 1000}},
+        'advanced': {'high_availability': {'enabled': True, 'nodes': nodes}},
+        'vms': vms,
+    }
+
+
+def test_node_failure_moves_vms_to_survivors():
+    result = plan(config(['pve1', 'pve2', 'pve3'], {
+        'file_server': {'cores': 2, 'memory': 4096, 'disk_size': 100},
+        'lancache_server': {'cores': 2, 'memory': 4096, 'cache_disk_size': 500},
+        'ipxe_server': {'cores': 1, 'memory': 2048, 'disk_size': 20},
+    }))
+    assert result['optimal'] and result['unplaced'] == []
+    for failed, failure in result['node_failures'].items():
+        moved = [name for name, host in result['placement'].items() if host == failed]
+        assert sorted(failure['moved']) == sorted(moved)
+        assert failed not in failure['moved'].values()
+        assert failure['stranded'] == []
+        assert failure['anti_affinity_kept']
+    assert capacity_warnings(result) == []
+
+
+def test_failure_that_strands_vms_is_reported():
+    result = plan(config(['pve1', 'pve2'], {
+        'file_server': {'cores': 6, 'memory': 8192},
+        'lancache_server': {'cores': 6, 'memory': 8192},
+        'registration': {'cores': 1, 'memory': 1024},
+    }))
+    assert result['anti_affinity_kept']
+    assert all(failure['stranded'] for failure in result['node_failures'].values())
+    warnings = capacity_warnings(result)
+    assert any("pve1 fails" in w and "cannot be restarted" in w for w in warnings)
+    assert not any("would use" in w for w in warnings)  # 7 of 8 cores is under 90%
+
+
+def test_warnings_for_unplaced_vm_and_split_pair():
+    result = plan(config(['pve1', {'name': 'tiny', 'cores': 1}], {
+        'file_server': {'cores': 2, 'memory': 2048},
+        'lancache_server': {'cores': 2, 'memory': 2048},
+        'giant': {'cores': 4, 'memory': 128 * 1024},
+    }))
+    assert result['unplaced'] == ['giant']
+    assert result['node_failures'] == {}  # only analyzed when everything fits
+    warnings = capacity_warnings(result)
+    assert warnings[0].startswith("VM giant does not fit on any Proxmox node (needs 4 cores, 128.0GB RAM")
+    assert "Could not keep file_server/lancache_server on separate Proxmox nodes" in warnings
+
+
+def test_headroom_warning_above_ninety_percent():
+    result = plan(config(['pve1'], {'lancache_server': {'cores': 8, 'memory': 1024}}))
+    assert capacity_warnings(result) == ["Proxmox node pve1 would use 8 of 8 cores (100%)"]
@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+LANCache Cache Simulator for High School Esports LAN Infrastructure
+
+Sizes vms.lancache_server.cache_disk_size by replaying a request trace
+through a cache model and reporting hit rate and WAN traffic as the cache
+size varies. Two eviction models are compared:
+
+- slice: LANCache's own behaviour. nginx caches 1 MB slices
+  (CACHE_SLICE_SIZE) and evicts the least recently used slices, so a game
+  can be partly cached and a cache slightly too small for a download
+  cycle keeps evicting the slices it is about to need.
+- object: whole-game LRU, the "does our game mix fit" estimate.
+
+The trace is either synthetic (games.enabled with sizes from prefill.sh,
+players per game, patches between events, re-imaged clients) or a real
+LANCache access log. Requests are slice ranges and the cache stores runs
+of consecutive slices (extents) in a heap ordered by last use, so a 50 GB
+download costs a handful of operations instead of 50,000; tens of
+millions of slice requests replay in seconds.
+
+Usage:
+    python3 cache_simulator.py
+    python3 cache_simulator.py --events 12 --patch-probability 0.7
+    python3 cache_simulator.py --trace /srv/lancache/logs/access.log --sizes 2000 5000 10000
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import random
+import re
+import sys
+from bisect import bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+from config_loader import load_config
+from game_catalog import game_key, load_game_catalog
+
+GB = 1000  # slices are counted in MB
+SLICE_MB = 1  # CACHE_SLICE_SIZE in lancache.env.j2
+POLICIES = ('slice', 'object')
+
+# How close to an unlimited cache counts as big enough
+DEFAULT_TOLERANCE = 0.01
+
+# (object, first slice, end slice, during an event) - prefill traffic is not "during"
+Request = Tuple[int, int, int, bool]
+
+
+class SliceLRU:
+    """
+    LRU cache of fixed-size slices, stored as extents [obj, start, end, stamp].
+
+    Slices of an extent were used together, in order, so the oldest slice of
+    the cache is the first slice of the extent with the lowest stamp. Each
+    object keeps its extents sorted by start for range lookups, and a heap
+    (with lazy deletion) finds the least recently used extent.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self.used = 0
+        self.clock = 0
+        self.seq = 0
+        self.live = 0  # extents in the cache (the heap also holds stale entries)
+        self.heap: List = []
+        self.starts: Dict[int, List[int]] = {}
+        self.extents: Dict[int, List[list]] = {}
+
+    def _insert(self, ext: list) -> None:
+        starts = self.starts.setdefault(ext[0], [])
+        extents = self.extents.setdefault(ext[0], [])
+        i = bisect_right(starts, ext[1])
+        starts.insert(i, ext[1])
+        extents.insert(i, ext)
+        self.live += 1
+        self.seq += 1
+        # Extents with the same stamp are pieces of one request's range, used
+        # in slice order; a piece split off the right of a cut must still
+        # come before the later pieces, so order by start, not insertion
+        heapq.heappush(self.heap, (ext[3], ext[1], self.seq, ext))
+
+    def _index(self, ext: list) -> int:
+        return bisect_right(self.starts[ext[0]], ext[1]) - 1
+
+    def _drop(self, ext: list, i: int) -> None:
+        obj = ext[0]
+        del self.starts[obj][i]
+        del self.extents[obj][i]
+        self.live -= 1
+        ext[1] = ext[2]  # empty extents are skipped when they reach the top of the heap
+
+    def _cut(self, ext: list, i: int, start: int, end: int) -> None:
+        """Remove [start, end) from ext (which covers it); the rest keeps its age."""
+        if end < ext[2]:
+            if start > ext[1]:
+                right = [ext[0], end, ext[2], ext[3]]
+                ext[2] = start
+                self._insert(right)
+                return
+            ext[1] = self.starts[ext[0]][i] = end
+        elif start > ext[1]:
+            ext[2] = start
+        else:
+            self._drop(ext, i)
+
+    def _evict(self) -> None:
+        heap = self.heap
+        while self.used > self.capacity:
+            ext = heap[0][-1]
+            if ext[1] >= ext[2]:
+                heapq.heappop(heap)
+                continue
+            i = self._index(ext)
+            take = min(ext[2] - ext[1], self.used - self.capacity)
+            self.used -= take
+            if take == ext[2] - ext[1]:
+                self._drop(ext, i)
+                heapq.heappop(heap)
+            else:
+                ext[1] = self.starts[ext[0]][i] = ext[1] + take
+        if len(heap) > 4 * self.live + 1024:
+            self.heap = [entry for entry in heap if entry[-1][1] < entry[-1][2]]
+            heapq.heapify(self.heap)
+
+    def request(self, obj: int, start: int, end: int) -> int:
+        """Read slices [start, end) of obj in order; returns how many were cached."""
+        self.clock += 1
+        hits = 0
+        current = None  # the extent this request builds, most recently used
+        pos = start
+        while pos < end:
+            starts = self.starts.get(obj)
+            i = bisect_right(starts, pos) - 1 if starts else -1
+            ext = self.extents[obj][i] if i >= 0 else None
+            if ext is not None and ext[2] > pos:
+                stop = min(end, ext[2])
+                hits += stop - pos
+                self._cut(ext, i, pos, stop)
+            else:
+                following = starts[i + 1] if starts and i + 1 < len(starts) else end
+                stop = min(end, following)
+                self.used += stop - pos
+            if current is None:
+                current = [obj, pos, stop, self.clock]
+                self._insert(current)
+            else:
+                current[2] = stop
+            if self.used > self.capacity:
+                self._evict()
+            pos = stop
+        return hits
+
+
+class ObjectLRU:
+    """LRU cache of whole objects (a game install or patch is all or nothing)."""
+
+    def __init__(self, capacity: int, sizes: Dict[int, int]):
+        self.capacity = max(1, int(capacity))
+        self.sizes = sizes
+        self.used = 0
+        self.entries: OrderedDict = OrderedDict()
+
+    def request(self, obj: int, start: int, end: int) -> int:
+        entries = self.entries
+        if obj in entries:
+            entries.move_to_end(obj)
+            return end - start
+        size = self.sizes.get(obj, end)
+        if size > self.capacity:
+            return 0
+        entries[obj] = size
+        self.used += size
+        while self.used > self.capacity:
+            self.used -= entries.popitem(last=False)[1]
+        return 0
+
+
+class Workload(NamedTuple):
+    """Inputs for a synthetic trace."""
+    games: List[Tuple[str, float, int]]  # name, install size (GB), players per event
+    events: int
+    patch_probability: float  # chance a game patches between two events
+    patch_fraction: float  # share of the install a patch replaces
+    reinstall_fraction: float  # players whose install is wiped between events
+    other_gb: float  # one-off downloads per event (updates, other games)
+    prefill: bool  # prefill every game before each event
+    seed: int
+
+
+class Trace(NamedTuple):
+    requests: List[Request]
+    sizes: Dict[int, int]  # object -> slices, for the object model
+    names: Dict[int, str]
+
+
+def synthetic_trace(w: Workload) -> Trace:
+    """
+    Requests for a season of events. A patch replaces the tail of the base
+    install with a new object, so a full install at version k reads the
+    unreplaced part of the base plus every patch; a player who kept their
+    install only reads the patches released since the last event.
+    """
+    rng = random.Random(w.seed)
+    sizes: Dict[int, int] = {}
+    names: Dict[int, str] = {}
+
+    def new_object(name: str, slices: int) -> int:
+        obj = len(sizes)
+        sizes[obj] = slices
+        names[obj] = name
+        return obj
+
+    games = []
+    for name, size_gb, players in w.games:
+        slices = max(1, int(size_gb * GB / SLICE_MB))
+        games.append({'name': name, 'players': players, 'base': new_object(name, slices),
+                      'slices': slices, 'replaced': 0, 'patches': [], 'new': []})
+
+    def full_install(game, during):
+        kept = game['slices'] - game['replaced']
+        ranges = [(game['base'], 0, kept, during)] if kept > 0 else []
+        return ranges + [(obj, 0, sizes[obj], during) for obj in game['patches']]
+
+    requests: List[Request] = []
+    for event in range(w.events):
+        for game in games:
+            game['new'] = []
+            if event and rng.random() < w.patch_probability:
+                slices = max(1, int(game['slices'] * w.patch_fraction))
+                obj = new_object(f"{game['name']} patch {len(game['patches']) + 1}", slices)
+                game['patches'].append(obj)
+                game['new'].append(obj)
+                game['replaced'] = min(game['slices'], game['replaced'] + slices)
+
+        if w.prefill:
+            for game in games:
+                requests.extend(full_install(game, False))
+
+        batch: List[List[Request]] = []
+        for game in games:
+            for _ in range(game['players']):
+                if event == 0 or rng.random() < w.reinstall_fraction:
+                    batch.append(full_install(game, True))
+                elif game['new']:
+                    batch.append([(obj, 0, sizes[obj], True) for obj in game['new']])
+        if w.other_gb > 0:
+            obj = new_object(f"other downloads, event {event + 1}", int(w.other_gb * GB / SLICE_MB))
+            batch.append([(obj, 0, sizes[obj], True)])
+        rng.shuffle(batch)
+        for install in batch:
+            requests.extend(install)
+    return Trace(requests, sizes, names)
+
+
+# lancachenet/monolithic cachelog; see lancache/scripts/log_analyzer.py
+TRACE_LINE_RE = re.compile(
+    rb'^\[([^\]]*)\] (\S+) / \S+ - \S+ \[[^\]]+\] "\S+ (\S+)[^"]*" \d{3} (\d+|-) '
+    rb'"[^"]*" "[^"]*" "[^"]*" "[^"]*" "(?:bytes=(\d+)-[^"]*|[^"]*)"',
+    re.MULTILINE
+)
+
+
+def access_log_trace(paths: Iterable[Path]) -> Trace:
+    """
+    Requests from LANCache access logs. Each line is one slice (or a whole
+    small file); consecutive slices one client reads from one object are
+    merged into a single range request.
+    """
+    import mmap
+    objects: Dict[bytes, int] = {}
+    sizes: Dict[int, int] = {}
+    requests: List[Request] = []
+    runs: Dict[bytes, list] = {}  # client -> [obj, start, end]
+    slice_bytes = SLICE_MB * 1000 * 1000
+
+    for path in paths:
+        with open(path, 'rb') as f:
+            if f.seek(0, 2) == 0:
+                continue
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for m in TRACE_LINE_RE.finditer(mm):
+                    cdn, client, uri, sent, range_start = m.groups()
+                    key = cdn + b' ' + uri
+                    obj = objects.get(key)
+                    if obj is None:
+                        obj = objects[key] = len(objects)
+                    if range_start is not None:
+                        start = int(range_start) // slice_bytes
+                        end = start + 1
+                    else:
+                        start = 0
+                        end = max(1, -(-int(sent if sent != b'-' else 0) // slice_bytes))
+                    if sizes.get(obj, 0) < end:
+                        sizes[obj] = end
+                    run = runs.get(client)
+                    if run and run[0] == obj and run[2] == start:
+                        run[2] = end
+                        continue
+                    if run:
+                        requests.append((run[0], run[1], run[2], True))
+                    runs[client] = [obj, start, end]
+    requests.extend((run[0], run[1], run[2], True) for run in runs.values())
+    names = {obj: key.decode(errors='replace') for key, obj in objects.items()}
+    return Trace(requests, sizes, names)
+
+
+class SimResult(NamedTuple):
+    policy: str
+    cache_gb: float
+    event_hit_rate: float  # share of bytes requested during events served from cache
+    event_wan_gb: float  # upstream traffic during events
+    total_wan_gb: float  # including prefill
+
+
+def simulate(trace: Trace, cache_gb: float, policy: str = 'slice') -> SimResult:
+    capacity = cache_gb * GB / SLICE_MB
+    cache = SliceLRU(capacity) if policy == 'slice' else ObjectLRU(capacity, trace.sizes)
+    request = cache.request
+    requested = event_hits = wan = event_wan = 0
+    for obj, start, end, during in trace.requests:
+        hits = request(obj, start, end)
+        misses = end - start - hits
+        wan += misses
+        if during:
+            requested += end - start
+            event_hits += hits
+            event_wan += misses
+    to_gb = SLICE_MB / GB
+    return SimResult(policy, cache_gb, event_hits / requested if requested else 1.0,
+                     event_wan * to_gb, wan * to_gb)
+
+
+def unique_gb(trace: Trace) -> float:
+    """Distinct content in the trace: what an unlimited cache would hold."""
+    return sum(trace.sizes.values()) * SLICE_MB / GB
+
+
+def minimum_size(trace: Trace, tolerance: float = DEFAULT_TOLERANCE) -> float:
+    """
+    Smallest cache (slice model) whose event hit rate is within tolerance of
+    an unlimited cache, found by bisection (LRU hit rate only grows with size).
+    """
+    high = max(1.0, unique_gb(trace))
+    resolution_gb = max(1.0, high / 200)
+    target = simulate(trace, high).event_hit_rate - tolerance
+    low = 0.0
+    while high - low > resolution_gb:
+        middle = (low + high) / 2
+        if simulate(trace, middle).event_hit_rate >= target:
+            high = middle
+        else:
+            low = middle
+    return float(math.ceil(high))
+
+
+def workload_from_config(config, events: int = 8, patch_probability: float = 0.5,
+                         patch_fraction: float = 0.1, reinstall_fraction: float = 0.2,
+                         other_gb: float = 50, seed: int = 1) -> Workload:
+    """Synthetic workload for games.enabled; raises FileNotFoundError without prefill.sh."""
+    catalog = load_game_catalog()
+    enabled = [game_key(name) for name in (config.games.enabled or [])]
+    enabled = [key for key in enabled if key in catalog]
+    expected = config.get('games.expected_players') or {}
+    default_players = max(1, config.network.expected_clients // max(1, len(enabled)))
+    games = [
+        (catalog[key].name, catalog[key].size_gb, int(expected.get(key, default_players)))
+        for key in enabled
+    ]
+    prefill = bool(config.get('advanced.lancache.prefill_enabled', False))
+    return Workload(games, events, patch_probability, patch_fraction, reinstall_fraction,
+                    other_gb, prefill, seed)
+
+
+def sizing_warnings(config) -> List[str]:
+    """Warnings when cache_disk_size is too small for the simulated game mix."""
+    cache_gb = config.get('vms.lancache_server.cache_disk_size')
+    if cache_gb is None or not config.games.enabled:
+        return []
+    if not isinstance(cache_gb, (int, float)) or cache_gb <= 0:
+        raise ValueError(f"vms.lancache_server.cache_disk_size must be a positive number of GB, got {cache_gb!r}")
+
+    trace = synthetic_trace(workload_from_config(config))
+    best = simulate(trace, unique_gb(trace))
+    configured = simulate(trace, cache_gb)
+    if configured.event_hit_rate >= best.event_hit_rate - DEFAULT_TOLERANCE:
+        return []
+    needed = minimum_size(trace)
+    return [
+        f"LANCache cache_disk_size ({cache_gb:g}GB) is too small for the enabled games: "
+        f"simulated hit rate {configured.event_hit_rate:.0%} vs {best.event_hit_rate:.0%} "
+        f"with enough space (about {needed:,.0f}GB; see tools/cache_simulator.py)"
+    ]
+
+
+def default_sizes(trace: Trace, configured: Optional[float]) -> List[float]:
+    """Cache sizes to sweep: fractions of the distinct content, plus the configured size."""
+    total = unique_gb(trace)
+    sizes = {round(total * f / 100) * 100 for f in (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.2)}
+    if configured:
+        sizes.add(float(configured))
+    return sorted(s for s in sizes if s > 0)
+
+
+def print_report(trace: Trace, rows: List[Tuple[SimResult, SimResult]], configured: Optional[float],
+                 needed: float, workload: Optional[Workload]) -> None:
+    print("LANCache Cache Simulation")
+    print("=" * 60)
+    if workload:
+        players = sum(p for _, _, p in workload.games)
+        print(f"Games:              {len(workload.games)} ({players} installs per event)")
+        print(f"Events:             {workload.events} "
+              f"(patch chance {workload.patch_probability:.0%}, {workload.patch_fraction:.0%} of install; "
+              f"{workload.reinstall_fraction:.0%} reinstall)")
+        print(f"Prefill:            {'yes' if workload.prefill else 'no'}")
+    slices = sum(end - start for _, start, end, _ in trace.requests)
+    print(f"Requests:           {len(trace.requests):,} ranges, {slices:,} slices "
+          f"({slices * SLICE_MB / GB:,.0f}GB)")
+    print(f"Distinct content:   {unique_gb(trace):,.0f}GB")
+
+    print(f"\n  {'Cache':>9}  {'Slice LRU':>10}{'WAN (event)':>13}{'WAN (total)':>13}  {'Object LRU':>10}")
+    for slice_result, object_result in rows:
+        mark = ' <- configured' if configured and slice_result.cache_gb == configured else ''
+        print(f"  {slice_result.cache_gb:>7,.0f}GB  {slice_result.event_hit_rate:>10.1%}"
+              f"{slice_result.event_wan_gb:>11,.0f}GB{slice_result.total_wan_gb:>11,.0f}GB"
+              f"  {object_result.event_hit_rate:>10.1%}{mark}")
+
+    print(f"\nSmallest cache within {DEFAULT_TOLERANCE:.0%} of the best hit rate: {needed:,.0f}GB")
+    if configured:
+        if configured >= needed:
+            print(f"✅ cache_disk_size {configured:,.0f}GB is enough")
+        else:
+            print(f"⚠️  cache_disk_size {configured:,.0f}GB is too small; use at least {needed:,.0f}GB")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Simulate LANCache hit rate to size cache_disk_size')
+    parser.add_argument('--config', default=os.environ.get('ESPORTS_CONFIG', PROJECT_ROOT / 'config.yaml'),
+                        help='Path to config.yaml')
+    parser.add_argument('--trace', nargs='+', metavar='LOG', help='Replay LANCache access logs instead')
+    parser.add_argument('--sizes', nargs='+', type=float, metavar='GB', help='Cache sizes to simulate')
+    parser.add_argument('--events', type=int, default=8, help='Events to simulate (default: 8)')
+    parser.add_argument('--patch-probability', type=float, default=0.5,
+                        help='Chance a game patches between events (default: 0.5)')
+    parser.add_argument('--patch-fraction', type=float, default=0.1,
+                        help='Share of an install a patch replaces (default: 0.1)')
+    parser.add_argument('--reinstall-fraction', type=float, default=0.2,
+                        help='Players who reinstall each event (default: 0.2)')
+    parser.add_argument('--other-gb', type=float, default=50,
+                        help='One-off downloads per event in GB (default: 50)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    parser.add_argument('--json', metavar='FILE', help="Write results as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    config_path = Path(args.config)
+    if not config_path.exists():
+        config_path = PROJECT_ROOT / 'config.example.yaml'
+        print(f"Note: using {config_path.name}", file=sys.stderr)
+    config = load_config(config_path)
+    configured = config.get('vms.lancache_server.cache_disk_size')
+
+    workload = None
+    if args.trace:
+        try:
+            trace = access_log_trace(Path(p) for p in args.trace)
+        except OSError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        workload = workload_from_config(config, args.events, args.patch_probability, args.patch_fraction,
+                                        args.reinstall_fraction, args.other_gb, args.seed)
+        if not workload.games:
+            print("❌ No known games in games.enabled", file=sys.stderr)
+            sys.exit(1)
+        trace = synthetic_trace(workload)
+
+    sizes = args.sizes or default_sizes(trace, configured)
+    rows = [(simulate(trace, size, 'slice'), simulate(trace, size, 'object')) for size in sizes]
+    needed = minimum_size(trace)
+
+    if args.json:
+        payload = json.dumps({
+            'distinct_gb': unique_gb(trace),
+            'minimum_cache_gb': needed,
+            'configured_cache_gb': configured,
+            'results': [r._asdict() for pair in rows for r in pair],
+        }, indent=2)
+        if args.json == '-':
+            print(payload)
+            return
+        Path(args.json).write_text(payload + '\n')
+
+    print_report(trace, rows, configured, needed, workload)
+
+
+if __name__ == '__main__':
+    main()
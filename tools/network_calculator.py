@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Network Capacity Planner for High School Esports LAN Infrastructure
+
+Simulates a whole fleet of clients starting up at an event:
+
+1. PXE boot: wimboot and boot.wim over HTTP from the iPXE server
+2. Windows boot, then a player logs in and the roaming profile loads
+   from the file server
+3. Game downloads from LANCache (games.enabled, sizes from prefill.sh)
+
+Transfers share bandwidth max-min fairly. Each client is capped by its own
+link and every flow shares the server NIC/uplink (all infrastructure VMs
+sit behind one Proxmox host). Optional per-service limits can model a
+disk-bound LANCache. The simulation is event driven and every client is
+advanced at once with NumPy arrays, so 1000+ clients take well under a
+second per scenario.
+
+Output: time-to-ready percentiles per phase, peak link utilization and the
+smallest standard server NIC speed that meets the time targets.
+
+Usage:
+    python3 network_calculator.py
+    python3 network_calculator.py --clients 300 --server-nic-gbps 10
+    python3 network_calculator.py --clients 300 --boot-window 600 --json plan.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    print("numpy is not installed. Install it with: pip3 install numpy")
+    sys.exit(1)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+from config_loader import load_config
+from game_catalog import game_key, load_game_catalog
+
+GBPS = 1e9 / 8  # bytes per second
+MB = 1e6
+GB = 1e9
+
+STANDARD_NIC_GBPS = (1, 2.5, 5, 10, 25, 40, 100)
+
+# Transfer stages each client goes through, in order
+STAGES = ('pxe', 'profile', 'games')
+STAGE_SERVER = {'pxe': 'iPXE server', 'profile': 'file server', 'games': 'LANCache'}
+
+PERCENTILES = (50, 90, 95, 99, 100)
+
+
+class Scenario(NamedTuple):
+    """Inputs for one simulation run."""
+    clients: int
+    client_link_gbps: float
+    server_nic_gbps: float
+    uplink_gbps: Optional[float]
+    boot_window: float  # seconds over which clients are powered on
+    boot_image_mb: float
+    os_boot_seconds: float
+    login_window: float  # seconds over which players log in after boot
+    profile_mb: float  # median profile size
+    max_profile_mb: float
+    game_sizes_gb: List[float]
+    games_per_client: int
+    download_fraction: float
+    service_caps_gbps: Dict[str, Optional[float]]
+    seed: int
+
+
+class Result(NamedTuple):
+    ready: np.ndarray  # seconds from power-on to the end of each stage, shape (clients, 3)
+    segments: np.ndarray  # (start, duration, pxe B/s, profile B/s, games B/s) rows
+    capacity: float  # bytes per second through the server NIC/uplink
+
+
+def build_workload(s: Scenario):
+    """Per-client power-on times, delays before each stage and bytes per stage."""
+    rng = np.random.default_rng(s.seed)
+    n = s.clients
+
+    power_on = rng.uniform(0, s.boot_window, n) if s.boot_window > 0 else np.zeros(n)
+
+    # Delay before each stage starts, measured from the end of the previous one
+    delays = np.empty((n, 3))
+    delays[:, 0] = power_on
+    os_boot = rng.normal(s.os_boot_seconds, 0.15 * s.os_boot_seconds, n)
+    delays[:, 1] = np.maximum(os_boot, 0.5 * s.os_boot_seconds) + rng.uniform(0, s.login_window, n)
+    delays[:, 2] = rng.uniform(0, 30, n)  # launching the game client
+
+    sizes = np.empty((n, 3))
+    sizes[:, 0] = s.boot_image_mb * MB
+    profile = rng.lognormal(np.log(s.profile_mb), 0.8, n)
+    sizes[:, 1] = np.minimum(profile, s.max_profile_mb) * MB
+
+    games = np.asarray(s.game_sizes_gb, dtype=float)
+    per_client = min(s.games_per_client, len(games))
+    if per_client:
+        # Each client installs a random selection of the enabled games
+        picks = rng.random((n, len(games))).argsort(axis=1)[:, :per_client]
+        sizes[:, 2] = games[picks].sum(axis=1) * GB * s.download_fraction
+    else:
+        sizes[:, 2] = 0.0
+
+    return power_on, delays, sizes
+
+
+def fair_share(counts: np.ndarray, client_cap: float, service_caps: np.ndarray,
+               capacity: float) -> np.ndarray:
+    """
+    Max-min fair per-flow rate for each stage's flows.
+
+    Flows of a stage are limited by the client link and their share of the
+    stage's service cap; all flows then share the server capacity.
+    """
+    rates = np.zeros(len(counts))
+    busy = counts > 0
+    if not busy.any():
+        return rates
+    flow_cap = np.minimum(client_cap, service_caps[busy] / counts[busy])
+    flows = counts[busy]
+
+    # Water-fill: raise a common level until the server capacity is used
+    order = np.argsort(flow_cap)
+    remaining_capacity = capacity
+    remaining_flows = flows.sum()
+    level = 0.0
+    for i in order:
+        fair = remaining_capacity / remaining_flows
+        if flow_cap[i] <= fair:
+            remaining_capacity -= flow_cap[i] * flows[i]
+            remaining_flows -= flows[i]
+        else:
+            level = fair
+            break
+    else:
+        level = np.inf
+    rates[busy] = np.minimum(flow_cap, level)
+    return rates
+
+
+def simulate(s: Scenario) -> Result:
+    """Run the event-driven fluid simulation for every client at once."""
+    power_on, delays, sizes = build_workload(s)
+    n = s.clients
+    clients = np.arange(n)
+
+    capacity = s.server_nic_gbps * GBPS
+    if s.uplink_gbps:
+        capacity = min(capacity, s.uplink_gbps * GBPS)
+    client_cap = s.client_link_gbps * GBPS
+    service_caps = np.array([
+        (s.service_caps_gbps.get(stage) or np.inf) * GBPS for stage in STAGES
+    ])
+
+    stage = np.zeros(n, dtype=int)  # 3 once a client is finished
+    waiting = np.ones(n, dtype=bool)  # in the delay before the current stage
+    start_at = delays[:, 0].copy()
+    remaining = sizes[:, 0].copy()
+    finish = np.zeros((n, 3))
+
+    t = 0.0
+    segments = []
+    while True:
+        # Stages whose delay is over start transferring
+        starting = waiting & (stage < 3) & (start_at <= t)
+        waiting[starting] = False
+
+        active = ~waiting & (stage < 3)
+        # Empty transfers (e.g. no games to download) finish immediately
+        done = active & (remaining <= 1.0)
+        if done.any():
+            idx = clients[done]
+            finish[idx, stage[idx]] = t
+            stage[idx] += 1
+            more = idx[stage[idx] < 3]
+            waiting[idx] = True
+            start_at[more] = t + delays[more, stage[more]]
+            remaining[more] = sizes[more, stage[more]]
+            continue
+
+        pending = waiting & (stage < 3)
+        if not active.any() and not pending.any():
+            break
+
+        counts = np.bincount(stage[active], minlength=3)
+        per_flow = fair_share(counts, client_cap, service_caps, capacity)
+        rate = per_flow[stage[active]]
+
+        # Advance to the next completion or the next stage start
+        dt = np.inf
+        if active.any():
+            dt = (remaining[active] / rate).min()
+        if pending.any():
+            dt = min(dt, start_at[pending].min() - t)
+
+        remaining[active] -= rate * dt
+        segments.append((t, dt, *(per_flow * counts)))
+        t += dt
+
+    ready = finish - power_on[:, None]
+    return Result(ready, np.array(segments).reshape(-1, 5), capacity)
+
+
+def summarize(result: Result) -> Dict:
+    """Time-to-ready percentiles and link utilization for one run."""
+    ready = result.ready
+    segments = result.segments
+    busy = segments[:, 1] > 0
+    total = segments[busy, 2:].sum(axis=1)
+    per_stage_peak = segments[busy, 2:].max(axis=0) if busy.any() else np.zeros(3)
+    saturated = busy.copy()
+    saturated[busy] = total >= 0.99 * result.capacity
+
+    return {
+        'time_to_ready_seconds': {
+            stage: {f'p{p}': float(np.percentile(ready[:, i], p)) for p in PERCENTILES}
+            for i, stage in enumerate(STAGES)
+        },
+        'peak_gbps': float(total.max() / GBPS) if total.size else 0.0,
+        'peak_utilization': float(total.max() / result.capacity) if total.size else 0.0,
+        'peak_gbps_by_server': {
+            STAGE_SERVER[stage]: float(per_stage_peak[i] / GBPS) for i, stage in enumerate(STAGES)
+        },
+        'saturated_seconds': float(segments[saturated, 1].sum()),
+        'total_seconds': float(ready.max()),
+    }
+
+
+def meets_targets(summary: Dict, target_desktop: float, target_games: float) -> bool:
+    times = summary['time_to_ready_seconds']
+    return times['profile']['p95'] <= target_desktop and times['games']['p95'] <= target_games
+
+
+def nic_sweep(scenario: Scenario, target_desktop: float, target_games: float):
+    """
+    Summaries at each standard server NIC speed (same workload, same seed)
+    and the slowest one that meets the targets, or None.
+    """
+    sweep = []
+    needed = None
+    for nic in STANDARD_NIC_GBPS:
+        result = summarize(simulate(scenario._replace(server_nic_gbps=nic, uplink_gbps=None)))
+        ok = meets_targets(result, target_desktop, target_games)
+        sweep.append({'nic_gbps': nic, 'meets_targets': ok, 'summary': result})
+        if ok and needed is None:
+            needed = nic
+    return sweep, needed
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+def print_report(scenario: Scenario, summary: Dict, sweep: List[Dict],
+                 needed: Optional[float], targets) -> None:
+    print("Network Capacity Plan")
+    print("=" * 60)
+    print(f"Clients:            {scenario.clients} on {scenario.client_link_gbps:g} Gbps links")
+    link = f"{scenario.server_nic_gbps:g} Gbps server NIC"
+    if scenario.uplink_gbps:
+        link += f", {scenario.uplink_gbps:g} Gbps uplink"
+    print(f"Server side:        {link}")
+    print(f"Power-on window:    {format_duration(scenario.boot_window)}")
+    print(f"Games per client:   {scenario.games_per_client} "
+          f"({scenario.download_fraction:.0%} of install size)")
+
+    print("\nTime to ready (from power-on):")
+    print(f"  {'Stage':<22}" + ''.join(f"{'p' + str(p) if p < 100 else 'max':>9}" for p in PERCENTILES))
+    labels = {'pxe': 'PXE boot done', 'profile': 'Desktop ready', 'games': 'Games installed'}
+    for stage in STAGES:
+        row = summary['time_to_ready_seconds'][stage]
+        print(f"  {labels[stage]:<22}" + ''.join(f"{format_duration(row[f'p{p}']):>9}" for p in PERCENTILES))
+
+    print("\nServer link:")
+    print(f"  Peak throughput:    {summary['peak_gbps']:.2f} Gbps "
+          f"({summary['peak_utilization']:.0%} of capacity)")
+    for server, peak in summary['peak_gbps_by_server'].items():
+        print(f"    {server:<16} {peak:.2f} Gbps peak")
+    print(f"  Saturated for:      {format_duration(summary['saturated_seconds'])}")
+
+    target_desktop, target_games = targets
+    print(f"\nServer NIC needed (p95 desktop <= {format_duration(target_desktop)}, "
+          f"p95 games <= {format_duration(target_games)}):")
+    for row in sweep:
+        mark = '✅' if row['meets_targets'] else '❌'
+        times = row['summary']['time_to_ready_seconds']
+        print(f"  {mark} {row['nic_gbps']:>5g} Gbps: desktop p95 {format_duration(times['profile']['p95']):>7}, "
+              f"games p95 {format_duration(times['games']['p95']):>7}")
+    if needed is None:
+        print("\n❌ No standard NIC speed meets the targets; client links or the "
+              "power-on window are the limit. Relax the targets or stagger boots.")
+    elif needed <= scenario.server_nic_gbps:
+        print(f"\n✅ {scenario.server_nic_gbps:g} Gbps is enough (minimum: {needed:g} Gbps)")
+    else:
+        print(f"\n⚠️  Upgrade needed: at least {needed:g} Gbps for {scenario.clients} clients")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Simulate a LAN boot storm and size the server link')
+    parser.add_argument('--config', default=os.environ.get('ESPORTS_CONFIG', PROJECT_ROOT / 'config.yaml'),
+                        help='Path to config.yaml')
+    parser.add_argument('--clients', type=int, help='Number of clients (default: network.expected_clients)')
+    parser.add_argument('--client-link-gbps', type=float, default=1.0, help='Client NIC speed (default: 1)')
+    parser.add_argument('--server-nic-gbps', type=float, default=10.0,
+                        help='Proxmox host NIC speed shared by all VMs (default: 10)')
+    parser.add_argument('--uplink-gbps', type=float, help='Switch uplink to the server, if slower than the NIC')
+    parser.add_argument('--boot-window', type=float, default=0,
+                        help='Seconds over which clients are powered on (default: 0, all at once)')
+    parser.add_argument('--boot-image-mb', type=float, default=600,
+                        help='wimboot + boot.wim size per client (default: 600)')
+    parser.add_argument('--os-boot-seconds', type=float, default=45, help='Windows boot time (default: 45)')
+    parser.add_argument('--login-window', type=float, default=120,
+                        help='Seconds over which players log in after boot (default: 120)')
+    parser.add_argument('--profile-mb', type=float, default=150, help='Median roaming profile size (default: 150)')
+    parser.add_argument('--games-per-client', type=int, default=1,
+                        help='Games each client installs from LANCache (default: 1)')
+    parser.add_argument('--download-fraction', type=float, default=1.0,
+                        help='Share of each game downloaded, e.g. 0.1 for patches (default: 1.0)')
+    parser.add_argument('--lancache-gbps', type=float, help='LANCache throughput limit, e.g. disk-bound')
+    parser.add_argument('--fileserver-gbps', type=float, help='File server throughput limit')
+    parser.add_argument('--target-desktop', type=float, default=10,
+                        help='Target p95 minutes from power-on to desktop (default: 10)')
+    parser.add_argument('--target-games', type=float, default=60,
+                        help='Target p95 minutes from power-on to games installed (default: 60)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    parser.add_argument('--json', metavar='FILE', help="Write results as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    config_path = Path(args.config)
+    if not config_path.exists():
+        config_path = PROJECT_ROOT / 'config.example.yaml'
+        print(f"Note: {args.config} not found, using {config_path.name}\n", file=sys.stderr)
+    config = load_config(config_path)
+
+    catalog = load_game_catalog()
+    game_sizes = []
+    for name in config.games.enabled or []:
+        game = catalog.get(game_key(name))
+        if game is None:
+            print(f"Warning: no size known for game '{name}' (not in prefill.sh), skipping",
+                  file=sys.stderr)
+            continue
+        game_sizes.append(game.size_gb)
+
+    scenario = Scenario(
+        clients=args.clients or config.network.expected_clients,
+        client_link_gbps=args.client_link_gbps,
+        server_nic_gbps=args.server_nic_gbps,
+        uplink_gbps=args.uplink_gbps,
+        boot_window=args.boot_window,
+        boot_image_mb=args.boot_image_mb,
+        os_boot_seconds=args.os_boot_seconds,
+        login_window=args.login_window,
+        profile_mb=args.profile_mb,
+        max_profile_mb=config.get('profiles.max_profile_size_mb', 2048),
+        game_sizes_gb=game_sizes,
+        games_per_client=args.games_per_client,
+        download_fraction=args.download_fraction,
+        service_caps_gbps={'games': args.lancache_gbps, 'profile': args.fileserver_gbps},
+        seed=args.seed,
+    )
+    targets = (args.target_desktop * 60, args.target_games * 60)
+
+    summary = summarize(simulate(scenario))
+
+    sweep, needed = nic_sweep(scenario, *targets)
+
+    if args.json:
+        payload = json.dumps({
+            'scenario': scenario._asdict(),
+            'summary': summary,
+            'nic_sweep': sweep,
+            'nic_needed_gbps': needed,
+        }, indent=2)
+        if args.json == '-':
+            print(payload)
+            return
+        Path(args.json).write_text(payload + '\n')
+
+    print_report(scenario, summary, sweep, needed, targets)
+    if args.uplink_gbps and needed is not None and args.uplink_gbps < needed:
+        print(f"⚠️  The {args.uplink_gbps:g} Gbps uplink is below the {needed:g} Gbps needed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Proxmox Resource Planner for High School Esports LAN Infrastructure
+
+Places the VMs from the vms section of config.yaml onto the Proxmox nodes
+(proxmox.node_name, or advanced.high_availability.nodes when HA is enabled)
+and reports:
+
+- Which node each VM should run on, respecting cores, RAM and storage and
+  keeping the file server and LANCache on different nodes when possible
+- Headroom left on every node
+- What happens if a node fails: whether its VMs can restart elsewhere
+
+Placement minimizes the busiest node's utilization (its most used
+resource). A first-fit-decreasing heuristic finds a placement quickly; a
+branch-and-bound search then improves it or proves it optimal, within a
+step budget that is ample for a handful of nodes and VMs.
+
+Node capacities come from proxmox.node_capacity (defaults: 32 cores, 388GB
+RAM, 40TB storage). HA nodes can override them individually:
+
+    advanced:
+      high_availability:
+        enabled: true
+        nodes:
+          - "pve1"
+          - {name: "pve2", memory_gb: 256}
+
+Usage:
+    python3 resource_calculator.py
+    python3 resource_calculator.py --config config.yaml --json plan.json
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+from config_loader import load_yaml
+
+RESOURCES = ('cores', 'memory_gb', 'storage_gb')
+RESOURCE_LABELS = {'cores': 'cores', 'memory_gb': 'GB RAM', 'storage_gb': 'GB storage'}
+
+DEFAULT_NODE_CAPACITY = {'cores': 32, 'memory_gb': 388, 'storage_gb': 40000}
+
+# VM pairs that should not share a node: losing one host shouldn't take
+# down both game downloads and player profiles
+ANTI_AFFINITY = [('file_server', 'lancache_server')]
+
+# Warn when a node's busiest resource is above this
+HEADROOM_WARNING = 0.9
+
+EXACT_SEARCH_STEPS = 200_000
+
+
+class Resources(NamedTuple):
+    name: str
+    cores: float
+    memory_gb: float
+    storage_gb: float
+
+
+class Placement(NamedTuple):
+    assignment: Dict[str, str]  # VM name -> node name
+    unplaced: List[str]
+    peak: float  # highest resource utilization on any node
+    optimal: bool  # True when the exact search finished
+    anti_affinity: bool  # False if it had to be relaxed
+
+
+def vms_from_config(vms: Dict[str, Any]) -> List[Resources]:
+    """VM demands from the vms section (memory in MB, disks in GB)."""
+    result = []
+    for name, spec in (vms or {}).items():
+        if not isinstance(spec, dict):
+            continue
+        storage = sum(v for k, v in spec.items()
+                      if k.endswith('disk_size') and isinstance(v, (int, float)))
+        result.append(Resources(name, spec.get('cores', 1), spec.get('memory', 0) / 1024, storage))
+    return result
+
+
+def nodes_from_config(config: Dict[str, Any]) -> List[Resources]:
+    """Node capacities from proxmox and advanced.high_availability."""
+    proxmox = config.get('proxmox') or {}
+    defaults = dict(DEFAULT_NODE_CAPACITY)
+    defaults.update(proxmox.get('node_capacity') or {})
+
+    ha = (config.get('advanced') or {}).get('high_availability') or {}
+    entries = ha.get('nodes') if ha.get('enabled') else None
+    if not entries:
+        entries = [proxmox.get('node_name') or 'pve']
+
+    nodes = []
+    for entry in entries:
+        spec = dict(defaults)
+        if isinstance(entry, dict):
+            spec.update(entry)
+        else:
+            spec['name'] = str(entry)
+        nodes.append(Resources(spec['name'], *(float(spec[r]) for r in RESOURCES)))
+    return nodes
+
+
+class _Search:
+    """Placement search state: VMs sorted largest first, loads per node."""
+
+    def __init__(self, vms, nodes, anti_affinity, preplaced):
+        self.nodes = nodes
+        self.capacity = [[getattr(n, r) for r in RESOURCES] for n in nodes]
+        largest = [max(c[i] for c in self.capacity) or 1 for i in range(len(RESOURCES))]
+        # Largest dominant share first: hardest to fit, best pruning
+        self.vms = sorted(vms, key=lambda vm: -max(
+            getattr(vm, r) / largest[i] for i, r in enumerate(RESOURCES)))
+        self.demand = [[getattr(vm, r) for r in RESOURCES] for vm in self.vms]
+        self.apart = {}
+        for a, b in anti_affinity:
+            self.apart.setdefault(a, set()).add(b)
+            self.apart.setdefault(b, set()).add(a)
+
+        node_index = {n.name: i for i, n in enumerate(nodes)}
+        self.load = [[0.0] * len(RESOURCES) for _ in nodes]
+        self.members = [set() for _ in nodes]
+        for vm, node in (preplaced or {}).items():
+            i = node_index[node.name]
+            for k, value in enumerate(RESOURCES):
+                self.load[i][k] += getattr(vm, value)
+            self.members[i].add(vm.name)
+
+    def utilization(self, node: int, extra=None) -> float:
+        """Busiest resource on a node, optionally with an extra VM added."""
+        peak = 0.0
+        for k, cap in enumerate(self.capacity[node]):
+            used = self.load[node][k] + (extra[k] if extra else 0)
+            if used > cap + 1e-9:
+                return float('inf')
+            peak = max(peak, used / cap if cap else (0.0 if used == 0 else float('inf')))
+        return peak
+
+    def allowed(self, v: int, node: int) -> bool:
+        return not (self.apart.get(self.vms[v].name, set()) & self.members[node])
+
+    def assign(self, v: int, node: int, sign: int) -> None:
+        for k, value in enumerate(self.demand[v]):
+            self.load[node][k] += sign * value
+        if sign > 0:
+            self.members[node].add(self.vms[v].name)
+        else:
+            self.members[node].discard(self.vms[v].name)
+
+    def greedy(self) -> Tuple[Dict[int, int], List[int]]:
+        """First-fit decreasing onto the node left least utilized."""
+        chosen, unplaced = {}, []
+        for v in range(len(self.vms)):
+            best, best_peak = None, float('inf')
+            for node in range(len(self.nodes)):
+                if not self.allowed(v, node):
+                    continue
+                peak = self.utilization(node, self.demand[v])
+                if peak < best_peak:
+                    best, best_peak = node, peak
+            if best is None:
+                unplaced.append(v)
+            else:
+                self.assign(v, best, 1)
+                chosen[v] = best
+        for v, node in chosen.items():
+            self.assign(v, node, -1)
+        return chosen, unplaced
+
+    def current_peak(self) -> float:
+        return max((self.utilization(n) for n in range(len(self.nodes))), default=0.0)
+
+    def peak_with(self, chosen: Dict[int, int]) -> float:
+        """Peak utilization if the given VM -> node choices were applied."""
+        for v, node in chosen.items():
+            self.assign(v, node, 1)
+        peak = self.current_peak()
+        for v, node in chosen.items():
+            self.assign(v, node, -1)
+        return peak
+
+    def names(self, chosen: Dict[int, int]) -> Dict[str, str]:
+        return {self.vms[v].name: self.nodes[node].name for v, node in chosen.items()}
+
+    def exact(self, bound: float, max_steps: int):
+        """Branch and bound for the placement minimizing the peak utilization."""
+        best = {'peak': bound, 'assignment': None}
+        steps = [0]
+
+        def search(v, peak):
+            steps[0] += 1
+            if steps[0] > max_steps:
+                return False
+            if v == len(self.vms):
+                best['peak'], best['assignment'] = peak, dict(current)
+                return True
+            tried_empty = set()
+            for node in range(len(self.nodes)):
+                if not self.allowed(v, node):
+                    continue
+                # Identical empty nodes are interchangeable; try only one
+                if not self.members[node] and not any(self.load[node]):
+                    signature = tuple(self.capacity[node])
+                    if signature in tried_empty:
+                        continue
+                    tried_empty.add(signature)
+                new_peak = max(peak, self.utilization(node, self.demand[v]))
+                if new_peak >= best['peak'] - 1e-12:
+                    continue
+                self.assign(v, node, 1)
+                current[v] = node
+                finished = search(v + 1, new_peak)
+                del current[v]
+                self.assign(v, node, -1)
+                if not finished:
+                    return False
+            return True
+
+        current = {}
+        completed = search(0, self.current_peak())
+        return best['assignment'], best['peak'], completed
+
+
+def place(vms: List[Resources], nodes: List[Resources],
+          anti_affinity=ANTI_AFFINITY, preplaced: Optional[Dict[Resources, Resources]] = None,
+          max_steps: int = EXACT_SEARCH_STEPS) -> Placement:
+    """
+    Place VMs on nodes (on top of any preplaced VMs), minimizing the peak
+    utilization. Anti-affinity is relaxed only if nothing fits otherwise.
+    """
+    for honor in ([True, False] if anti_affinity else [True]):
+        search = _Search(vms, nodes, anti_affinity if honor else [], preplaced)
+        greedy, unplaced = search.greedy()
+        bound = float('inf') if unplaced else search.peak_with(greedy)
+
+        # The small margin lets the exact search reproduce the greedy result
+        # and so prove it optimal
+        exact, peak, completed = search.exact(bound + 1e-9, max_steps)
+        if exact is not None:
+            return Placement(search.names(exact), [], peak, completed, honor)
+        if not unplaced:
+            return Placement(search.names(greedy), [], bound, False, honor)
+
+    # Nothing fits everything: keep the partial placement that leaves out the
+    # fewest VMs, so only VMs that fit nowhere are reported as not fitting
+    best = None
+    for honor in ([True, False] if anti_affinity else [True]):
+        search = _Search(vms, nodes, anti_affinity if honor else [], preplaced)
+        greedy, unplaced = search.greedy()
+        if best is None or len(unplaced) < len(best[2]):
+            best = (search, greedy, unplaced, honor)
+    search, greedy, unplaced, honor = best
+    return Placement(search.names(greedy), [search.vms[v].name for v in unplaced],
+                     search.peak_with(greedy), False, honor)
+
+
+def node_usage(vms: List[Resources], nodes: List[Resources],
+               assignment: Dict[str, str]) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Used and free capacity per node and resource."""
+    usage = {n.name: {r: {'used': 0.0, 'capacity': getattr(n, r)} for r in RESOURCES} for n in nodes}
+    for vm in vms:
+        node = assignment.get(vm.name)
+        if node is not None:
+            for r in RESOURCES:
+                usage[node][r]['used'] += getattr(vm, r)
+    for resources in usage.values():
+        for r in resources.values():
+            r['free'] = r['capacity'] - r['used']
+            r['utilization'] = r['used'] / r['capacity'] if r['capacity'] else 0.0
+    return usage
+
+
+def plan(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Placement, headroom and node-failure analysis for a loaded config."""
+    vms = vms_from_config(config.get('vms'))
+    nodes = nodes_from_config(config)
+    placement = place(vms, nodes)
+
+    failures = {}
+    if len(nodes) > 1 and not placement.unplaced:
+        by_name = {vm.name: vm for vm in vms}
+        for failed in nodes:
+            survivors = [n for n in nodes if n.name != failed.name]
+            node_by_name = {n.name: n for n in survivors}
+            staying = {by_name[v]: node_by_name[n] for v, n in placement.assignment.items()
+                       if n != failed.name}
+            moving = [by_name[v] for v, n in placement.assignment.items() if n == failed.name]
+            result = place(moving, survivors, preplaced=staying)
+            failures[failed.name] = {
+                'moved': result.assignment,
+                'stranded': result.unplaced,
+                'anti_affinity_kept': result.anti_affinity,
+                'peak_utilization': result.peak,
+            }
+
+    return {
+        'nodes': [n._asdict() for n in nodes],
+        'vms': [vm._asdict() for vm in vms],
+        'placement': placement.assignment,
+        'unplaced': placement.unplaced,
+        'optimal': placement.optimal,
+        'anti_affinity_kept': placement.anti_affinity,
+        'peak_utilization': placement.peak,
+        'usage': node_usage(vms, nodes, placement.assignment),
+        'node_failures': failures,
+    }
+
+
+def capacity_warnings(result: Dict[str, Any]) -> List[str]:
+    """Human-readable problems with a plan, for the config validator."""
+    warnings = []
+    vms = {vm['name']: vm for vm in result['vms']}
+    for name in result['unplaced']:
+        vm = vms[name]
+        warnings.append(
+            f"VM {name} does not fit on any Proxmox node (needs {vm['cores']:g} cores, "
+            f"{vm['memory_gb']:.1f}GB RAM, {vm['storage_gb']:g}GB storage)"
+        )
+    if len(result['nodes']) > 1 and not result['anti_affinity_kept']:
+        pairs = ', '.join(f"{a}/{b}" for a, b in ANTI_AFFINITY)
+        warnings.append(f"Could not keep {pairs} on separate Proxmox nodes")
+    for node, resources in result['usage'].items():
+        for r, usage in resources.items():
+            if usage['utilization'] > HEADROOM_WARNING:
+                warnings.append(
+                    f"Proxmox node {node} would use {usage['used']:g} of {usage['capacity']:g} "
+                    f"{RESOURCE_LABELS[r]} ({usage['utilization']:.0%})"
+                )
+    for node, failure in result['node_failures'].items():
+        if failure['stranded']:
+            warnings.append(
+                f"If Proxmox node {node} fails, {', '.join(failure['stranded'])} "
+                "cannot be restarted on the remaining nodes"
+            )
+    return warnings
+
+
+def print_plan(result: Dict[str, Any]) -> None:
+    print("Proxmox Resource Plan")
+    print("=" * 60)
+
+    quality = 'optimal' if result['optimal'] else 'best found'
+    print(f"\nPlacement ({quality}, busiest resource at {result['peak_utilization']:.0%}):")
+    by_node = {}
+    for vm, node in result['placement'].items():
+        by_node.setdefault(node, []).append(vm)
+    for node in result['nodes']:
+        print(f"  {node['name']}: {', '.join(sorted(by_node.get(node['name'], []))) or '(empty)'}")
+    for vm in result['unplaced']:
+        print(f"  ❌ {vm}: does not fit on any node")
+    if len(result['nodes']) == 1:
+        print("  ⚠️  Single node: file server and LANCache share a host (no anti-affinity)")
+    elif not result['anti_affinity_kept']:
+        print("  ⚠️  Anti-affinity relaxed: file server and LANCache share a host")
+
+    print("\nHeadroom:")
+    for node, resources in result['usage'].items():
+        parts = [
+            f"{usage['free']:g}/{usage['capacity']:g} {RESOURCE_LABELS[r]} free ({usage['utilization']:.0%} used)"
+            for r, usage in resources.items()
+        ]
+        print(f"  {node}: " + ', '.join(parts))
+
+    if result['node_failures']:
+        print("\nNode failure:")
+        for node, failure in result['node_failures'].items():
+            if failure['stranded']:
+                print(f"  ❌ {node} down: {', '.join(failure['stranded'])} cannot restart anywhere")
+                continue
+            moves = ', '.join(f"{vm} -> {target}" for vm, target in failure['moved'].items()) or 'nothing to move'
+            note = '' if failure['anti_affinity_kept'] else ' (breaks anti-affinity)'
+            print(f"  ✅ {node} down: {moves}{note}, "
+                  f"busiest resource at {failure['peak_utilization']:.0%}")
+
+    warnings = capacity_warnings(result)
+    if warnings:
+        print("\n⚠️  WARNINGS:")
+        for warning in warnings:
+            print(f"  - {warning}")
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Plan VM placement on Proxmox nodes')
+    parser.add_argument('--config', default=os.environ.get('ESPORTS_CONFIG', PROJECT_ROOT / 'config.yaml'),
+                        help='Path to config.yaml')
+    parser.add_argument('--json', metavar='FILE', help="Write the plan as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    config_path = Path(args.config)
+    if not config_path.exists():
+        config_path = PROJECT_ROOT / 'config.example.yaml'
+        print(f"Note: {args.config} not found, using {config_path.name}\n", file=sys.stderr)
+    result = plan(load_yaml(config_path) or {})
+
+    if args.json:
+        payload = json.dumps(result, indent=2)
+        if args.json == '-':
+            print(payload)
+        else:
+            Path(args.json).write_text(payload + '\n')
+    if args.json != '-':
+        print_plan(result)
+    sys.exit(1 if result['unplaced'] else 0)
+
+
+if __name__ == '__main__':
+    main()